@@ -1,30 +1,248 @@
+import argparse
+import asyncio
 import os
 
+from cache import AltTextCache
+from checkpoint import Checkpoint, IncrementalState
+from dedup import ImageDeduplicator
+from helper import PIPELINE_WORKERS, console, create_session
+from metrics import Metrics
+from pipeline import FairScheduler
+from plan import RunPlan
+from priority import Budget, Priority, load_pageviews
+from ratelimit import RateLimiter
+from sites import load_sites, make_tagger, run_sites, summary_table
+
+parser = argparse.ArgumentParser(description="Add alt texts to all images on a site")
+parser.add_argument(
+    "--resume",
+    action="store_true",
+    help="skip items finished by a previous run and reuse the alt texts it generated",
+)
+parser.add_argument(
+    "--incremental",
+    action="store_true",
+    help="only process content modified since the last run",
+)
+parser.add_argument(
+    "--plan",
+    action="store_true",
+    help="count what a run would need and estimate how long it takes, without generating or writing anything",
+)
+parser.add_argument(
+    "--sites",
+    metavar="PATH",
+    help="process all sites listed in this JSON file concurrently, instead of the one set by PLATFORM",
+)
+args = parser.parse_args()
+
 PLATFORM = os.environ.get("PLATFORM", "ghost")  # default to ghost for now
 SCENEX_API_KEY = os.environ["SCENEX_API_KEY"]
 SCENEX_URL = os.environ.get("SCENE_URL", "https://api.scenex.jina.ai/v1/describe")
+WORKERS = int(os.environ.get("WORKERS", 1))  # how many items to process concurrently
+ENGINE = os.environ.get("ENGINE", "sync")  # "sync", "async" or "pipeline"
+# worker threads per stage when ENGINE is "pipeline"
+STAGE_WORKERS = {
+    stage: int(os.environ.get(f"{stage.upper()}_WORKERS", workers))
+    for stage, workers in PIPELINE_WORKERS.items()
+}
+CHECKPOINT_PATH = os.environ.get("CHECKPOINT_PATH", ".alt-texter-checkpoint.jsonl")
+STATE_PATH = os.environ.get("STATE_PATH", ".alt-texter-state.json")
+CACHE_PATH = os.environ.get("CACHE_PATH", ".alt-texter-cache.sqlite")  # empty disables
+CACHE_TTL_DAYS = int(os.environ.get("CACHE_TTL_DAYS", 90))
+CACHE_HASH_CONTENT = os.environ.get("CACHE_HASH_CONTENT", "false").lower() == "true"
+VALIDATE_IMAGES = os.environ.get("VALIDATE_IMAGES", "true").lower() == "true"
+DEDUP_HASH_CONTENT = os.environ.get("DEDUP_HASH_CONTENT", "false").lower() == "true"
+
+POOL_MAXSIZE = int(os.environ.get("POOL_MAXSIZE", 10))  # connections per host
+REQUEST_TIMEOUT = float(os.environ.get("REQUEST_TIMEOUT", 60))
+RATE_LIMIT = float(os.environ.get("RATE_LIMIT", 10))  # starting requests/sec per host
+PLAN_DESCRIBE_SECONDS = float(os.environ.get("PLAN_DESCRIBE_SECONDS", 15))
+PLAN_WRITE_SECONDS = float(os.environ.get("PLAN_WRITE_SECONDS", 1))
+# Prometheus text file, written at the end
+METRICS_PATH = os.environ.get("METRICS_PATH")
+METRICS_PORT = os.environ.get("METRICS_PORT")  # serve /metrics during the run
+MAX_SITES = int(os.environ.get("MAX_SITES", 0))  # sites processed at once, 0 for all
+PRIORITY = os.environ.get("PRIORITY", "")  # e.g. "ids,pageviews,published"
+PRIORITY_IDS = os.environ.get("PRIORITY_IDS", "")  # comma-separated IDs, URLs or slugs
+PAGEVIEWS_PATH = os.environ.get("PAGEVIEWS_PATH")  # CSV export of pageviews per page
+MAX_DESCRIBE_CALLS = os.environ.get("MAX_DESCRIBE_CALLS")  # SceneXplain calls per run
+MAX_RUN_MINUTES = os.environ.get("MAX_RUN_MINUTES")
+
+if (PRIORITY or MAX_DESCRIBE_CALLS or MAX_RUN_MINUTES) and not (
+    ENGINE == "pipeline" or args.sites
+):
+    parser.error(
+        "PRIORITY, MAX_DESCRIBE_CALLS and MAX_RUN_MINUTES need ENGINE=pipeline or --sites"
+    )
+
+# describing is the stage that runs most requests at once. With --sites, it's shared by all sites
+if ENGINE == "pipeline" or args.sites:
+    WORKERS = STAGE_WORKERS["describe"]
+
+session = create_session(pool_maxsize=max(POOL_MAXSIZE, WORKERS))
+rate_limiter = RateLimiter(default_rate=RATE_LIMIT)
+checkpoint = None
+if args.resume or not args.plan:  # a fresh checkpoint would wipe the journal
+    checkpoint = Checkpoint(CHECKPOINT_PATH, resume=args.resume)
+state = IncrementalState(STATE_PATH)
+dedup = ImageDeduplicator(hash_content=DEDUP_HASH_CONTENT)
+metrics = Metrics()
+if METRICS_PORT:
+    metrics.serve(int(METRICS_PORT))
+
+
+def run_async(alt_texter, job) -> None:
+    """
+    Run a job from the async engine on a fresh event loop, closing the tagger's connections afterwards.
+    """
+
+    async def main():
+        async with alt_texter:
+            await job
+
+    asyncio.run(main())
+
+
+def run_pipeline(alt_texter, **list_kwargs) -> None:
+    """
+    Run a tagger as a pipeline, with its stages on separately sized worker pools.
+    """
+    tasks = alt_texter.run_pipeline(
+        modified_since=modified_since(alt_texter),
+        workers=STAGE_WORKERS,
+        priority=priority,
+        budget=budget,
+        **list_kwargs,
+    )
+    for _ in tasks:
+        pass
+
+
+def plan(alt_texter, concurrent: bool) -> None:
+    """
+    Print what a run would need instead of running it.
+    """
+    run_plan = RunPlan(alt_texter).build(modified_since=modified_since(alt_texter))
+    run_plan.print_table(
+        workers=WORKERS if concurrent else 1,
+        describe_seconds=PLAN_DESCRIBE_SECONDS,
+        write_seconds=PLAN_WRITE_SECONDS,
+    )
 
-if PLATFORM == "ghost":
+
+def modified_since(alt_texter):
+    """
+    Where the previous run got to, if this is an incremental run.
+    """
+    if args.incremental:
+        return state.get(alt_texter._site_key())
+
+
+cache = None
+if CACHE_PATH:
+    cache = AltTextCache(
+        CACHE_PATH, ttl=CACHE_TTL_DAYS * 24 * 60 * 60, hash_content=CACHE_HASH_CONTENT
+    )
+
+priority = None
+if PRIORITY:
+    priority = Priority(
+        [key.strip() for key in PRIORITY.split(",")],
+        ids=[item_id.strip() for item_id in PRIORITY_IDS.split(",") if item_id.strip()],
+        pageviews=load_pageviews(PAGEVIEWS_PATH) if PAGEVIEWS_PATH else None,
+    )
+
+# the time budget starts now, so it covers listing too
+budget = None
+if MAX_DESCRIBE_CALLS or MAX_RUN_MINUTES:
+    budget = Budget(
+        max_calls=int(MAX_DESCRIBE_CALLS) if MAX_DESCRIBE_CALLS else None,
+        max_seconds=float(MAX_RUN_MINUTES) * 60 if MAX_RUN_MINUTES else None,
+    )
+
+if args.sites:
+    sites = load_sites(args.sites)
+    alt_texters = [
+        make_tagger(
+            site,
+            scenex_api_key=SCENEX_API_KEY,
+            scenex_url=SCENEX_URL,
+            cache=cache,
+            session=session,
+            timeout=REQUEST_TIMEOUT,
+            rate_limiter=rate_limiter,
+            checkpoint=checkpoint,
+            validate_images=VALIDATE_IMAGES,
+            dedup=dedup,
+            metrics=metrics,
+        )
+        for site in sites
+    ]
+
+    if args.plan:
+        for alt_texter in alt_texters:
+            plan(alt_texter, concurrent=True)
+    else:
+        results = run_sites(
+            sites,
+            alt_texters,
+            workers=STAGE_WORKERS,
+            scheduler=FairScheduler(STAGE_WORKERS["describe"]),
+            modified_since=modified_since,
+            max_sites=MAX_SITES,
+            priority=priority,
+            budget=budget,
+        )
+        console.print(summary_table(sites, results))
+
+elif PLATFORM == "ghost":
     GHOST_BLOG_URL = os.environ["GHOST_BLOG_URL"]
     GHOST_API_KEY = os.environ["GHOST_API_KEY"]
 
-    from helper import GhostTagger
+    if ENGINE == "async" and not args.plan:
+        from async_helper import AsyncGhostTagger as GhostTagger
+    else:
+        from helper import GhostTagger
 
     alt_texter = GhostTagger(
         scenex_api_key=SCENEX_API_KEY,
         scenex_url=SCENEX_URL,
         url=GHOST_BLOG_URL,
         ghost_api_key=GHOST_API_KEY,
+        cache=cache,
+        session=session,
+        timeout=REQUEST_TIMEOUT,
+        rate_limiter=rate_limiter,
+        checkpoint=checkpoint,
+        validate_images=VALIDATE_IMAGES,
+        dedup=dedup,
+        metrics=metrics,
     )
 
-    alt_texter.update_all()
+    if args.plan:
+        plan(alt_texter, concurrent=True)
+    elif ENGINE == "pipeline":
+        run_pipeline(alt_texter)
+    elif ENGINE == "async":
+        job = alt_texter.update_all(
+            workers=WORKERS, modified_since=modified_since(alt_texter)
+        )
+        run_async(alt_texter, job)
+    else:
+        alt_texter.update_all(
+            workers=WORKERS, modified_since=modified_since(alt_texter)
+        )
 
 elif PLATFORM == "wordpress":
     WORDPRESS_URL = os.environ["WORDPRESS_URL"]
     WORDPRESS_USER = os.environ["WORDPRESS_USER"]
     WORDPRESS_PASSWORD = os.environ["WORDPRESS_PASSWORD"]
 
-    from helper import WordPressTagger
+    if ENGINE == "async" and not args.plan:
+        from async_helper import AsyncWordPressTagger as WordPressTagger
+    else:
+        from helper import WordPressTagger
 
     alt_texter = WordPressTagger(
         scenex_api_key=SCENEX_API_KEY,
@@ -32,15 +250,36 @@ elif PLATFORM == "wordpress":
         wordpress_url=WORDPRESS_URL,
         wordpress_username=WORDPRESS_USER,
         wordpress_password=WORDPRESS_PASSWORD,
+        cache=cache,
+        session=session,
+        timeout=REQUEST_TIMEOUT,
+        rate_limiter=rate_limiter,
+        checkpoint=checkpoint,
+        validate_images=VALIDATE_IMAGES,
+        dedup=dedup,
+        metrics=metrics,
     )
 
     content_types = ["posts", "media", "pages"]
 
-    content_objects = alt_texter._get_items(limit=10_000, content_types=content_types)
-
-    for item in content_objects:
-        updated_object = alt_texter.add_alts(content_object=item)
-        response = alt_texter.update_item(updated_object)
+    if args.plan:
+        plan(alt_texter, concurrent=ENGINE != "sync")
+    elif ENGINE == "pipeline":
+        run_pipeline(alt_texter, content_types=content_types)
+    elif ENGINE == "async":
+        job = alt_texter.update_all(
+            content_types,
+            limit=10_000,
+            workers=WORKERS,
+            modified_since=modified_since(alt_texter),
+        )
+        run_async(alt_texter, job)
+    else:
+        alt_texter.update_all(
+            content_types=content_types,
+            limit=10_000,
+            modified_since=modified_since(alt_texter),
+        )
 
 elif PLATFORM == "woocommerce":
     WOOCOMMERCE_URL = os.environ["WOOCOMMERCE_URL"]
@@ -54,21 +293,83 @@ elif PLATFORM == "woocommerce":
         woocommerce_consumer_key=WOOCOMMERCE_KEY,
         woocommerce_consumer_secret=WOOCOMMERCE_SECRET,
         scenex_api_key=SCENEX_API_KEY,
+        cache=cache,
+        session=session,
+        timeout=REQUEST_TIMEOUT,
+        rate_limiter=rate_limiter,
+        checkpoint=checkpoint,
+        validate_images=VALIDATE_IMAGES,
+        dedup=dedup,
+        metrics=metrics,
     )
 
-    alt_texter.update_products()
+    if args.plan:
+        plan(alt_texter, concurrent=ENGINE == "pipeline")
+    elif ENGINE == "pipeline":
+        run_pipeline(alt_texter)
+    else:
+        alt_texter.update_products(modified_since=modified_since(alt_texter))
 
 elif PLATFORM == "shopify":
     SHOPIFY_SHOP_NAME = os.environ["SHOPIFY_SHOP_NAME"]
     SHOPIFY_ACCESS_TOKEN = os.environ["SHOPIFY_ACCESS_TOKEN"]
+    # defaults to the shop's Admin API
+    SHOPIFY_API_URL = os.environ.get("SHOPIFY_API_URL")
 
-    from helper import ShopifyHandler
+    SHOPIFY_BACKEND = os.environ.get("SHOPIFY_BACKEND", "rest")  # "rest" or "graphql"
+
+    if SHOPIFY_BACKEND == "graphql":
+        from helper import ShopifyGraphQLHandler as ShopifyHandler
+    elif ENGINE == "async" and not args.plan:
+        from async_helper import AsyncShopifyHandler as ShopifyHandler
+    else:
+        from helper import ShopifyHandler
 
     alt_texter = ShopifyHandler(
         url="foo.com",
         scenex_api_key=SCENEX_API_KEY,
         shopify_shop_name=SHOPIFY_SHOP_NAME,
         shopify_access_token=SHOPIFY_ACCESS_TOKEN,
+        shopify_api_url=SHOPIFY_API_URL,
+        cache=cache,
+        session=session,
+        timeout=REQUEST_TIMEOUT,
+        rate_limiter=rate_limiter,
+        checkpoint=checkpoint,
+        validate_images=VALIDATE_IMAGES,
+        dedup=dedup,
+        metrics=metrics,
     )
 
-    alt_texter.update_products()
+    if args.plan:
+        plan(
+            alt_texter,
+            concurrent=ENGINE == "pipeline"
+            or (ENGINE == "async" and SHOPIFY_BACKEND != "graphql"),
+        )
+    elif ENGINE == "pipeline":
+        run_pipeline(alt_texter)
+    elif ENGINE == "async" and SHOPIFY_BACKEND != "graphql":
+        job = alt_texter.update_products(
+            workers=WORKERS, modified_since=modified_since(alt_texter)
+        )
+        run_async(alt_texter, job)
+    else:
+        alt_texter.update_products(modified_since=modified_since(alt_texter))
+
+if not args.sites:
+    alt_texters = [alt_texter]
+
+# remember how far we got, so the next --incremental run starts from there
+for alt_texter in alt_texters:
+    if alt_texter.high_water_mark.value and not args.plan:
+        state.set(alt_texter._site_key(), alt_texter.high_water_mark.value)
+
+if checkpoint is not None:
+    checkpoint.close()
+if not args.plan:
+    console.print(metrics.summary_table())
+if METRICS_PATH:
+    metrics.write(METRICS_PATH)
+if cache is not None:
+    cache.close()
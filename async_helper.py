@@ -0,0 +1,808 @@
+import asyncio
+import base64
+import copy
+import json
+from collections import deque
+from datetime import datetime
+from itertools import islice
+from urllib.parse import urlparse
+
+import httpx
+
+from helper import (POOL_MAXSIZE, SCENEX_BATCH_SIZE, VALIDATE_WORKERS,
+                    WP_ITEM_FIELDS, AltTexter, GhostTagger, ShopifyHandler,
+                    WordPressTagger, _content_length, _is_temporary_error,
+                    _probe_data_uri, _response_size, log)
+from imageprobe import PROBE_BYTES, rejection_reason
+from metrics import body_size
+from priority import BudgetExhausted
+
+MAX_CONNECTIONS = 200  # open connections across all hosts
+
+
+class AsyncAltTexter(AltTexter):
+    def __init__(
+        self,
+        *args,
+        per_host_limit: int = POOL_MAXSIZE,
+        host_limits: dict = None,
+        max_connections: int = MAX_CONNECTIONS,
+        **kwargs,
+    ):
+        """
+        asyncio counterpart of AltTexter. Fetching content, describing images and writing updates all run
+        cooperatively on one event loop, with a cap on in-flight requests per host.
+
+        Args:
+            per_host_limit (int): Default maximum in-flight requests per host.
+            host_limits (dict): Per-host overrides of per_host_limit, keyed by hostname, e.g. {"api.scenex.jina.ai": 50}.
+            max_connections (int): Maximum open connections across all hosts.
+            *args, **kwargs: Passed on to the synchronous tagger.
+        """
+        super().__init__(*args, **kwargs)
+        self.per_host_limit = per_host_limit
+        self.host_limits = host_limits or {}
+        self.max_connections = max_connections
+        self.client = None
+        self._host_semaphores = {}
+
+    def _create_session(self, pool_maxsize: int, pool_sizes: dict):
+        # requests go through the httpx client, created on first use
+        return None
+
+    def run_pipeline(self, *args, **kwargs):
+        # not a generator, so this is raised on the call rather than once the result is iterated
+        raise TypeError(
+            f"{type(self).__name__} can't run as a pipeline, which runs on threads. "
+            "Use the synchronous tagger, or update_all/update_products here"
+        )
+
+    def iter_missing_alts(self, *args, **kwargs):
+        # the synchronous tagger's listing would get coroutines from this one's
+        raise TypeError(
+            f"{type(self).__name__} can't plan a run. Plan with the synchronous tagger"
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """
+        Close the HTTP client and its connections.
+        """
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+            self._host_semaphores = {}
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).hostname
+        if host not in self._host_semaphores:
+            limit = self.host_limits.get(host, self.per_host_limit)
+            self._host_semaphores[host] = asyncio.Semaphore(limit)
+
+        return self._host_semaphores[host]
+
+    async def _request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        Send an HTTP request under the rate limiter, waiting for a free slot for its host first.
+        Throttled and failed requests are retried with backoff.
+
+        Args:
+            method (str): HTTP method, e.g. 'GET'.
+            url (str): URL to send the request to.
+            **kwargs: Passed through to httpx, e.g. headers, params, json.
+                'cost' is taken out and charged against the rate limit instead. With 'stream', the body
+                isn't read, and the caller must close the response. 'stage' labels the request's metrics.
+                'idempotent' says whether the request may be sent again after a timeout or server error, and
+                defaults to True for everything but POSTs.
+
+        Returns:
+            response (httpx.Response): The response.
+        """
+        cost = kwargs.pop("cost", 1)
+        stream = kwargs.pop("stream", False)
+        stage = kwargs.pop("stage", "fetch" if method == "GET" else "write")
+        idempotent = kwargs.pop("idempotent", method != "POST")
+        if self.client is None:
+            self.client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+
+        attempt = 0
+        while True:
+            await asyncio.sleep(self.rate_limiter.reserve(url, cost))
+            try:
+                async with self._host_semaphore(url):
+                    start = asyncio.get_running_loop().time()
+                    if stream:
+                        request = self.client.build_request(method, url, **kwargs)
+                        response = await self.client.send(request, stream=True)
+                    else:
+                        response = await self.client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                self._record_request(stage, asyncio.get_running_loop().time() - start)
+                delay = None
+                # without a connection, nothing was sent
+                if idempotent or isinstance(
+                    e, (httpx.ConnectError, httpx.ConnectTimeout)
+                ):
+                    delay = self.rate_limiter.retry_delay(attempt)
+                if delay is None:
+                    raise
+                log.warn(f"Request to {url} failed ({e}). Retrying in {delay:.1f}s")
+            else:
+                received = _content_length(response.headers)
+                if received is None:
+                    received = 0 if stream else response.num_bytes_downloaded
+                self._record_request(
+                    stage,
+                    asyncio.get_running_loop().time() - start,
+                    response.status_code,
+                    body_size(response.request.content),
+                    received,
+                )
+                self.rate_limiter.record(url, response.status_code, response.headers)
+                delay = self.rate_limiter.retry_delay(
+                    attempt, response.status_code, response.headers, idempotent
+                )
+                if delay is None:
+                    return response
+                log.warn(
+                    f"Request to {url} returned {response.status_code}. Retrying in {delay:.1f}s"
+                )
+                await response.aclose()
+
+            self.metrics.inc("retries_total", self.platform, stage, site=self.site_name)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def generate_alt_text(
+        self,
+        image_url: str,
+        max_length: int = 125,
+        max_tries: int = 3,
+        language: str = "en",
+    ):
+        """
+        Generate alt text for a given image.
+
+        Args:
+            image_url (str): URL of the image. Can be 'standard' URL or a datauri
+            max_length (int): Maximum length of the alt text. Defaults to 125, which is a recommended standard.
+            max_tries (int): Maximum attempts to generate image before giving up.
+
+        Returns:
+            alt_text (str): The alt text of the input image URL.
+        """
+        alt_texts = await self.generate_alt_texts(
+            [image_url], max_length=max_length, max_tries=max_tries
+        )
+
+        return alt_texts[0]
+
+    async def generate_alt_texts(
+        self,
+        image_urls: list,
+        max_length: int = 125,
+        max_tries: int = 3,
+        batch_size: int = SCENEX_BATCH_SIZE,
+    ) -> list:
+        """
+        Generate alt texts for several images. Batches are sent to SceneXplain concurrently, and each unique
+        image is only described once per run.
+
+        Args:
+            image_urls (list): URLs of the images. Each can be 'standard' URL or a datauri.
+            max_length (int): Maximum length of each alt text. Defaults to 125, which is a recommended standard.
+            max_tries (int): Maximum attempts per image before giving up.
+            batch_size (int): Maximum number of images to send in a single request.
+
+        Returns:
+            alt_texts (list): Alt texts in the same order as image_urls. Images that failed are None.
+        """
+        keys = [
+            f"{await self._dedup_key(url)}|{self.language}|{max_length}"
+            for url in image_urls
+        ]
+        futures, owned = self._claim_images(image_urls, keys)
+
+        alt_texts = [None] * len(owned)
+        out_of_budget = None
+        try:
+            alt_texts = await self._generate_alt_texts(
+                list(owned.values()), max_length, max_tries, batch_size
+            )
+        except BudgetExhausted as e:
+            out_of_budget = e
+            raise
+        finally:
+            self._settle_images(owned, alt_texts, out_of_budget)
+
+        return [await asyncio.wrap_future(futures[key]) for key in keys]
+
+    async def _dedup_key(self, image_url: str) -> str:
+        url_key = self.dedup.url_key(image_url)
+        if not self.dedup.hash_content:
+            return url_key
+
+        return self.dedup.known_content_key(url_key) or self.dedup.content_key(
+            url_key, await self._get_image_bytes(image_url)
+        )
+
+    async def _generate_alt_texts(
+        self, image_urls: list, max_length: int, max_tries: int, batch_size: int
+    ) -> list:
+        alt_texts = [None] * len(image_urls)
+        content_hashes = [None] * len(image_urls)
+        pending = []
+        for i, image_url in enumerate(image_urls):
+            alt_texts[i] = self._get_checkpointed_alt_text(image_url, max_length)
+            if not alt_texts[i] and self.cache is not None:
+                alt_texts[i], content_hashes[i] = await self._get_cached_alt_text(
+                    image_url, max_length
+                )
+                if alt_texts[i]:
+                    self._record_cache_hit("cache")
+            if not alt_texts[i]:
+                pending.append(i)
+
+        if self.validate_images and pending:
+            valid = await self._validate_images([image_urls[i] for i in pending])
+            pending = self._keep_valid(image_urls, pending, valid)
+
+        tries = 0
+        given_up = []
+        while pending and tries < max_tries:
+            chunks = [
+                pending[start : start + batch_size]
+                for start in range(0, len(pending), batch_size)
+            ]
+            results = await asyncio.gather(
+                *[self._describe([image_urls[i] for i in chunk]) for chunk in chunks]
+            )
+
+            failed = []
+            for chunk, texts in zip(chunks, results):
+                if texts is None:
+                    given_up += chunk
+                else:
+                    failed += self._apply_descriptions(
+                        image_urls, chunk, texts, alt_texts, content_hashes, max_length
+                    )
+            pending = failed
+            tries += 1
+            if pending and tries < max_tries:
+                await asyncio.sleep(self.rate_limiter.backoff(tries))
+
+        for i in pending + given_up:
+            log.warn(f"Could not generate alt text for {image_urls[i].split('/')[-1]}")
+
+        return alt_texts
+
+    async def _validate_images(self, image_urls: list) -> list:
+        unchecked = list(
+            {url for url in image_urls if url not in self._validation_results}
+        )
+        results = {}
+
+        async def validate(url):
+            results[url] = await self._validate_image(url)
+
+        await self._gather_bounded(
+            (validate(url) for url in unchecked), VALIDATE_WORKERS
+        )
+
+        return [
+            self._validation_results.get(url, results.get(url)) for url in image_urls
+        ]
+
+    async def _validate_image(self, image_url: str) -> bool:
+        if image_url in self._validation_results:
+            return self._validation_results[image_url]
+
+        filename = (
+            "datauri" if image_url.startswith("data") else image_url.split("/")[-1]
+        )
+        try:
+            reason = await self._probe_image(image_url)
+        except Exception as e:
+            log.warn(f"Could not check {filename}, will try again later: {e}")
+            return None
+
+        if reason:
+            log.warn(f"Skipping {filename}: {reason}")
+
+        self._validation_results[image_url] = reason is None
+        return reason is None
+
+    async def _probe_image(self, image_url: str):
+        if image_url.startswith("data"):
+            return _probe_data_uri(image_url)
+
+        response = await self._request(
+            "GET",
+            image_url,
+            headers={"Range": f"bytes=0-{PROBE_BYTES - 1}"},
+            stream=True,
+            stage="validate",
+        )
+        try:
+            if _is_temporary_error(response.status_code):
+                response.raise_for_status()
+            if response.status_code not in [200, 206]:
+                return f"status code {response.status_code}"
+
+            head = b""
+            async for chunk in response.aiter_bytes(PROBE_BYTES):
+                head += chunk
+                if len(head) >= PROBE_BYTES:
+                    break
+
+            return rejection_reason(
+                head,
+                response.headers.get("Content-Type"),
+                size=_response_size(response.status_code, response.headers),
+            )
+        finally:
+            await response.aclose()
+
+    async def _get_cached_alt_text(self, image_url: str, max_length: int) -> tuple:
+        alt_text = self.cache.get(image_url, self.language, max_length)
+        if alt_text or not self.cache.hash_content:
+            return alt_text, None
+
+        content = await self._get_image_bytes(image_url)
+        if content is None:
+            return None, None
+
+        content_hash = self.cache.content_hash(content)
+        alt_text = self.cache.get(
+            image_url, self.language, max_length, content_hash=content_hash
+        )
+        if alt_text:
+            self.cache.set(image_url, self.language, max_length, alt_text)
+
+        return alt_text, content_hash
+
+    async def _get_image_bytes(self, image_url: str):
+        try:
+            if image_url.startswith("data"):
+                return base64.b64decode(image_url.split(",", 1)[1])
+
+            response = await self._request("GET", image_url)
+            response.raise_for_status()
+            return response.content
+        except Exception as e:
+            log.warn(f"Could not download {image_url.split('/')[-1]}: {e}")
+            return None
+
+    async def _describe(self, image_urls: list) -> list:
+        if self.budget is not None and not self.budget.spend():
+            raise BudgetExhausted()
+
+        data = self._describe_data(image_urls)
+
+        try:
+            response = await self._request(
+                "POST",
+                self.scenex_url,
+                headers=self.scenex_headers,
+                json=data,
+                stage="describe",
+            )
+            response.raise_for_status()
+            results = response.json()["result"]
+        except Exception as e:
+            log.error(f"SceneXplain request failed: {e}")
+            return None
+
+        return self._describe_texts(results, len(image_urls))
+
+    async def _gather_bounded(self, coros, workers: int) -> None:
+        """
+        Run coroutines with at most `workers` of them in flight, logging any failures.
+
+        Args:
+            coros: Iterable or async iterable of coroutines. It is consumed lazily.
+            workers (int): Maximum number of coroutines running at once.
+        """
+        slots = asyncio.Semaphore(workers)
+        tasks = set()
+
+        async def run(coro):
+            try:
+                await coro
+            except Exception as e:
+                log.error(f"Failed to process item: {e}")
+            finally:
+                slots.release()
+
+        async def submit(coro):
+            await slots.acquire()
+            task = asyncio.ensure_future(run(coro))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        if hasattr(coros, "__aiter__"):
+            async for coro in coros:
+                await submit(coro)
+        else:
+            for coro in coros:
+                await submit(coro)
+
+        if tasks:
+            await asyncio.gather(*tasks)
+
+
+class AsyncGhostTagger(AsyncAltTexter, GhostTagger):
+    async def _get_post_ids(
+        self,
+        status: str = "published",
+        limit: int = 10_000,
+        order: str = "published_at desc",
+    ) -> list:
+        log.info("Getting Ghost post IDs")
+        post_ids = []
+        async for post in self._iter_posts(status=status, order=order, fields="id"):
+            post_ids.append(post["id"])
+            if len(post_ids) >= limit:
+                break
+
+        return post_ids
+
+    async def _iter_posts(
+        self,
+        status: str = "published",
+        order: str = "published_at desc",
+        page_size: int = 100,
+        fields: str = None,
+        formats: str = None,
+        modified_since: datetime = None,
+    ):
+        params = self._posts_params(
+            status, order, page_size, fields, formats, modified_since
+        )
+
+        page = 1
+        while page:
+            response = await self._request(
+                "GET",
+                f"{self.ghost_url}/ghost/api/admin/posts/",
+                headers=self._renew_headers(self.ghost_api_key),
+                params={**params, "page": page},
+                stage="list",
+            )
+            posts, page = self._posts_page(response)
+            for post in posts:
+                yield post
+
+    async def _get_post(self, post_id: str) -> dict:
+        url = f"{self.ghost_url}/ghost/api/admin/posts/{post_id}"
+
+        response = await self._request(
+            "GET",
+            url,
+            headers=self._renew_headers(self.ghost_api_key),
+            params={"formats": "lexical"},
+        )
+
+        return self._post_from_response(response, post_id)
+
+    async def update_post(self, post_id, post_data) -> dict:
+        url = f"{self.ghost_url}/ghost/api/admin/posts/{post_id}/"
+        data = {"posts": [post_data]}
+
+        log.info("Sending updated post to Ghost")
+        response = await self._request(
+            "PUT", url, headers=self._renew_headers(self.ghost_api_key), json=data
+        )
+
+        return response.json()
+
+    async def add_alts(self, post_id=None, max_tries=3, post: dict = None) -> dict:
+        if post is None:
+            post = await self._get_post(post_id)
+        else:
+            post = copy.deepcopy(post)
+        log.info(f"Processing {post['title']}")
+
+        lexical, image_nodes, process_feature_image = self._collect_post_images(post)
+        image_urls = [node["src"] for node in image_nodes]
+        if process_feature_image:
+            image_urls.append(post["feature_image"])
+
+        alt_texts = await self.generate_alt_texts(image_urls, max_tries=max_tries)
+        self._apply_post_alts(post, lexical, image_nodes, alt_texts)
+
+        return post
+
+    async def add_alt_text_recursive(self, rows) -> None:
+        image_nodes = self._collect_image_nodes(rows)
+        alt_texts = await self.generate_alt_texts([node["src"] for node in image_nodes])
+
+        for node, alt_text in zip(image_nodes, alt_texts):
+            node["alt"] = alt_text
+
+    async def update_all(
+        self, post_ids: list = [], workers: int = 50, modified_since: datetime = None
+    ) -> None:
+        """
+        Create alt texts for all blog posts and write to Ghost.
+
+        Args:
+            post_ids (list): IDs of posts to process. If unset, process all published posts.
+            workers (int): How many posts to keep in flight at once.
+            modified_since (datetime): Only process posts updated after this time.
+        """
+
+        async def updates():
+            if post_ids:
+                for post_id in post_ids:
+                    yield self._update_post_alts(post_id)
+            else:
+                posts = self._iter_posts(
+                    formats="lexical", modified_since=modified_since
+                )
+                async for post in posts:
+                    yield self._update_post_alts(post["id"], post)
+
+        await self._gather_bounded(updates(), workers)
+        log.info("All done!")
+
+    async def _update_post_alts(self, post_id: str, post: dict = None) -> None:
+        if self._is_done(post_id):
+            return
+
+        original_post = post
+        try:
+            original_post = original_post or await self._get_post(post_id)
+            modified = original_post.get("updated_at")
+            updated_post = await self.add_alts(post=original_post)
+            if self._is_post_changed(original_post, updated_post):
+                response = await self.update_post(
+                    post_id=post_id, post_data=updated_post
+                )
+                status = self._item_status(post_id, "posts" in response)
+            else:
+                status = self._item_status(post_id)
+            self._record_item(post_id, status, modified)
+        except Exception:
+            self._record_item(
+                post_id, "failed", (original_post or {}).get("updated_at")
+            )
+            raise
+        finally:
+            self.changes.forget(post_id)
+
+
+class AsyncWordPressTagger(AsyncAltTexter, WordPressTagger):
+    async def _iter_items(
+        self,
+        content_types: list = ["posts"],
+        status: str = "publish",
+        modified_since: datetime = None,
+        fields: str = WP_ITEM_FIELDS,
+        workers: int = 4,
+    ):
+        for content_type in content_types:
+            url = f"{self.url}/wp-json/wp/v2/{content_type}"
+            params = self._list_params(content_type, status, modified_since, fields)
+
+            log.info(f"Getting WordPress {content_type}")
+            response = await self._get_items_page(url, params, 1)
+            if response is None:
+                continue
+
+            for item in response.json():
+                yield item
+            total_pages = int(response.headers.get("X-WP-TotalPages", 1))
+
+            pages = iter(range(2, total_pages + 1))
+            in_flight = deque(
+                asyncio.ensure_future(self._get_items_page(url, params, page))
+                for page in islice(pages, workers)
+            )
+            try:
+                while in_flight:
+                    response = await in_flight.popleft()
+                    page = next(pages, None)
+                    if page is not None:
+                        in_flight.append(
+                            asyncio.ensure_future(
+                                self._get_items_page(url, params, page)
+                            )
+                        )
+                    if response is not None:
+                        for item in response.json():
+                            yield item
+            finally:
+                for task in in_flight:
+                    task.cancel()
+
+    async def _get_items_page(self, url: str, params: dict, page: int):
+        response = await self._request(
+            "GET", url, params={**params, "page": page}, stage="list"
+        )
+        return self._checked_page(response, url, page)
+
+    async def _get_items(
+        self,
+        content_types: list = ["posts"],
+        limit: int = 100,
+        status: str = "publish",
+        modified_since: datetime = None,
+    ) -> list:
+        all_items = []
+        async for item in self._iter_items(content_types, status, modified_since):
+            if len(all_items) >= limit:
+                break
+            all_items.append(item)
+
+        return all_items
+
+    async def get_item(self, item_type: str, item_id: str):
+        item_url = f"{self.full_url}{item_type}/{item_id}"
+        response = await self._request(
+            "GET",
+            item_url,
+            auth=(self.wordpress_username, self.wordpress_password),
+        )
+        return self._item_from_response(response, item_type, item_id)
+
+    async def add_alts(self, content_object):
+        log.info(f"Processing {content_object['title']['rendered']}")
+        self.changes.start(self._item_key(content_object))
+
+        missing_alts = self._missing_alt_images(content_object)
+        alt_texts = await self.generate_alt_texts([img["src"] for img in missing_alts])
+
+        return self._set_item_alts(content_object, missing_alts, alt_texts)
+
+    async def update_item(self, content_object):
+        url, new_content = self._update_request(content_object)
+
+        log.info(f"Updating content item {content_object['id']}")
+        return await self._request(
+            "POST",
+            url,
+            auth=(self.wordpress_username, self.wordpress_password),
+            json=new_content,
+        )
+
+    async def update_all(
+        self,
+        content_types: list = ["posts", "media", "pages"],
+        limit: int = 10_000,
+        workers: int = 50,
+        modified_since: datetime = None,
+    ) -> None:
+        """
+        Create alt texts for all content items and write to WordPress.
+
+        Args:
+            content_types (list): WordPress content types to process, e.g. 'posts', 'pages', 'media'.
+            limit (int): maximum number of items to process. If there are more, the high-water mark isn't moved.
+            workers (int): How many items to keep in flight at once.
+            modified_since (datetime): Only process items modified after this time.
+        """
+
+        async def updates():
+            count = 0
+            items = self._iter_items(content_types, modified_since=modified_since)
+            async for item in items:
+                if count >= limit:
+                    log.warn(f"Stopped after {limit} items")
+                    self.high_water_mark.stop_early()
+                    break
+                count += 1
+                yield self._update_item_alts(item)
+
+        await self._gather_bounded(updates(), workers)
+        log.info("All done!")
+
+    async def _update_item_alts(self, item: dict) -> None:
+        item_id = self._item_key(item)
+        if self._is_done(item_id):
+            return
+
+        updated_object = await self.add_alts(content_object=item)
+        if self.changes.is_changed(item_id):
+            response = await self.update_item(updated_object)
+            status = self._item_status(item_id, response.is_success)
+        else:
+            status = self._item_status(item_id)
+        self.changes.forget(item_id)
+        self._record_item(item_id, status, item.get("modified_gmt"))
+
+
+class AsyncShopifyHandler(AsyncAltTexter, ShopifyHandler):
+    async def get_products(self, modified_since: datetime = None):
+        url = self.shopify_url + "products.json"
+        params = self._products_params(modified_since)
+
+        products = []
+        while url:
+            response = await self._request(
+                "GET", url, headers=self.shopify_headers, params=params, stage="list"
+            )
+            if response.status_code != 200:
+                log.error(
+                    f"Failed to fetch products. Status code: {response.status_code}"
+                )
+                break
+
+            products += response.json()["products"]
+            url = response.links.get("next", {}).get("url")
+            params = None
+
+        return products
+
+    async def get_product(self, product_id):
+        url = self.shopify_url + f"products/{product_id}.json"
+        response = await self._request("GET", url, headers=self.shopify_headers)
+        product = None
+        if response.status_code == 200:
+            product = response.json()["product"]
+        return product
+
+    async def add_alts(self, product):
+        log.info(f"Processing {product['title']}")
+        self.changes.start(product["id"])
+        missing_alts = [image for image in product["images"] if not image["alt"]]
+        alt_texts = await self.generate_alt_texts(
+            [image["src"] for image in missing_alts]
+        )
+
+        return self._set_product_alts(product, missing_alts, alt_texts)
+
+    async def update_product(self, updated_data):
+        url = self.shopify_url + f"products/{updated_data['id']}.json"
+        payload = {"product": updated_data}
+        log.info("Updating product")
+        response = await self._request(
+            "PUT", url, headers=self.shopify_headers, content=json.dumps(payload)
+        )
+        return self._updated_product(response)
+
+    async def update_products(
+        self, products: list = [], workers: int = 50, modified_since: datetime = None
+    ):
+        """
+        Create alt texts for all products and write to Shopify.
+
+        Args:
+            products (list): Products to process. If unset, process all products.
+            workers (int): How many products to keep in flight at once.
+            modified_since (datetime): Only process products updated after this time.
+        """
+        if not products:
+            products = await self.get_products(modified_since=modified_since)
+
+        await self._gather_bounded(
+            (self._update_product_alts(product) for product in products), workers
+        )
+        log.info("All done!")
+
+    async def _update_product_alts(self, product: dict) -> None:
+        if self._is_done(product["id"]):
+            return
+
+        modified = product.get("updated_at")
+        updated_data = await self.add_alts(product)
+
+        if "images" in updated_data:
+            response = await self.update_product(updated_data)
+            status = self._item_status(product["id"], bool(response))
+        else:
+            log.info("Skipping product. Nothing to update")
+            status = self._item_status(product["id"])
+        self._record_item(product["id"], status, modified)
+        self.changes.forget(product["id"])
@@ -0,0 +1,344 @@
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import multiprocessing
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+from rich.table import Table
+
+from helper import SHOPIFY_API_VERSION, console
+from metrics import STAGES, Metrics
+from stub_server import StubConfig, StubServer
+
+PLATFORMS = ["ghost", "wordpress", "woocommerce", "shopify", "shopify-graphql"]
+# platforms whose sync tagger processes items concurrently, and ones with an async tagger
+SYNC_WORKER_PLATFORMS = ["ghost"]
+ASYNC_PLATFORMS = ["ghost", "wordpress", "shopify"]
+# fine buckets from 1ms to ~80s, 10% apart, so percentiles are close to exact
+BENCHMARK_BUCKETS = [0.001 * 1.1**i for i in range(120)]
+HTTP_STAGES = [stage for stage in STAGES if stage != "diff"]
+
+
+def make_tagger(platform: str, engine: str, stub_url: str, workers: int, metrics):
+    """
+    Build a tagger pointed at the stub.
+
+    Args:
+        platform (str): One of PLATFORMS.
+        engine (str): 'sync' or 'async'.
+        stub_url (str): URL of the stub server.
+        workers (int): Concurrency the run will use, to size the connection pool.
+        metrics (Metrics): Where the tagger records its requests.
+
+    Returns:
+        alt_texter (Tagger): The tagger.
+    """
+    from helper import create_session
+    from ratelimit import RateLimiter
+
+    kwargs = dict(
+        scenex_api_key="stub",
+        scenex_url=f"{stub_url}/v1/describe",
+        session=create_session(pool_maxsize=max(10, workers)),
+        rate_limiter=RateLimiter(default_rate=10_000),
+        metrics=metrics,
+    )
+    if engine == "async":
+        kwargs["per_host_limit"] = max(10, workers)
+
+    if platform == "ghost":
+        if engine == "async":
+            from async_helper import AsyncGhostTagger as GhostTagger
+        else:
+            from helper import GhostTagger
+        return GhostTagger(url=stub_url, ghost_api_key="stub:" + "00" * 32, **kwargs)
+
+    if platform == "wordpress":
+        if engine == "async":
+            from async_helper import AsyncWordPressTagger as WordPressTagger
+        else:
+            from helper import WordPressTagger
+        return WordPressTagger(stub_url, "stub", "stub", **kwargs)
+
+    if platform == "woocommerce":
+        from helper import WooCommerceTagger
+
+        return WooCommerceTagger(stub_url, "stub", "stub", **kwargs)
+
+    shopify_kwargs = dict(
+        url=stub_url,
+        shopify_shop_name="stub",
+        shopify_access_token="stub",
+        shopify_api_url=f"{stub_url}/admin/api/{SHOPIFY_API_VERSION}/",
+    )
+    if platform == "shopify-graphql":
+        from helper import ShopifyGraphQLHandler
+
+        return ShopifyGraphQLHandler(poll_interval=0.05, **shopify_kwargs, **kwargs)
+
+    if engine == "async":
+        from async_helper import AsyncShopifyHandler as ShopifyHandler
+    else:
+        from helper import ShopifyHandler
+    return ShopifyHandler(**shopify_kwargs, **kwargs)
+
+
+def run_tagger(alt_texter, platform: str, engine: str, workers: int) -> None:
+    """
+    Process the whole corpus with a tagger, the way app.py would.
+    """
+    if engine == "async":
+        if platform == "ghost":
+            job = alt_texter.update_all(workers=workers)
+        elif platform == "wordpress":
+            job = alt_texter.update_all(limit=sys.maxsize, workers=workers)
+        else:
+            job = alt_texter.update_products(workers=workers)
+
+        async def main():
+            async with alt_texter:
+                await job
+
+        asyncio.run(main())
+    elif platform == "ghost":
+        alt_texter.update_all(workers=workers)
+    elif platform == "wordpress":
+        alt_texter.update_all(limit=sys.maxsize)
+    else:
+        alt_texter.update_products()
+
+
+def run_once(platform: str, engine: str, workers: int, stub_url: str) -> dict:
+    """
+    Benchmark one configuration. Runs in a fresh process, so peak RSS is this run's alone.
+
+    Returns:
+        result (dict): Wall time, request latency percentiles, request/retry/error counts and peak RSS.
+    """
+    logging.disable(logging.WARNING)  # per-item logging would dominate the run
+    metrics = Metrics(buckets=BENCHMARK_BUCKETS)
+    alt_texter = make_tagger(platform, engine, stub_url, workers, metrics)
+
+    start = time.perf_counter()
+    run_tagger(alt_texter, platform, engine, workers)
+    seconds = time.perf_counter() - start
+
+    latency = metrics.latency(stages=HTTP_STAGES)
+    return {
+        "seconds": seconds,
+        "p50": latency.quantile(0.5),
+        "p99": latency.quantile(0.99),
+        "requests": latency.count,
+        "retries": sum(
+            metrics.counter("retries_total", alt_texter.platform, stage)
+            for stage in STAGES
+        ),
+        "errors": sum(
+            metrics.counter("errors_total", alt_texter.platform, stage)
+            for stage in STAGES
+        ),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def peak_rss_mb():
+    """
+    Peak resident set size of this process in MB, or None where it can't be measured.
+    """
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def configurations(platforms: list, engines: list, sizes: list, workers: list):
+    """
+    List the runs to make, leaving out combinations a tagger doesn't support.
+
+    Yields:
+        (platform, engine, items, workers)
+    """
+    for platform, engine, items in itertools.product(platforms, engines, sizes):
+        if engine == "async" and platform not in ASYNC_PLATFORMS:
+            continue
+        concurrent = engine == "async" or platform in SYNC_WORKER_PLATFORMS
+        for worker_count in workers if concurrent else [1]:
+            yield platform, engine, items, worker_count
+
+
+def benchmark(args) -> list:
+    """
+    Run every configuration against a fresh stub, so each one starts from a corpus without alt texts.
+    Afterwards, the stub is asked how many items still miss alt texts, so a run that skips work can't look fast.
+
+    Returns:
+        results (list): One dict per run.
+    """
+    config = StubConfig(
+        latency=args.latency,
+        describe_latency=args.describe_latency,
+        image_latency=args.image_latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        retry_after=args.retry_after,
+    )
+    runs = list(
+        dict.fromkeys(
+            configurations(args.platforms, args.engines, args.sizes, args.workers)
+        )
+    )
+    context = multiprocessing.get_context("spawn")
+
+    results = []
+    for i, (platform, engine, items, workers) in enumerate(runs, 1):
+        console.print(
+            f"[{i}/{len(runs)}] {platform} {engine} items={items} workers={workers}"
+        )
+        with StubServer(
+            config,
+            items=items,
+            images_per_item=args.images_per_item,
+            shared_images=args.shared_images,
+        ) as stub:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                result = executor.submit(
+                    run_once, platform, engine, workers, stub.url
+                ).result()
+            result["missing_alts"] = stub.corpus.missing_alts(platform.split("-")[0])
+
+        result.update(
+            platform=platform,
+            engine=engine,
+            items=items,
+            workers=workers,
+            items_per_second=items / result["seconds"],
+        )
+        results.append(result)
+
+    return results
+
+
+def print_results(results: list) -> None:
+    table = Table(title="Benchmark")
+    for column in ["Platform", "Engine"]:
+        table.add_column(column)
+    for column in [
+        "Items",
+        "Workers",
+        "Items/s",
+        "Seconds",
+        "p50",
+        "p99",
+        "Requests",
+        "Retries",
+        "Errors",
+        "Missing",
+        "Peak RSS",
+    ]:
+        table.add_column(column, justify="right")
+
+    for result in results:
+        rss = result["peak_rss_mb"]
+        table.add_row(
+            result["platform"],
+            result["engine"],
+            str(result["items"]),
+            str(result["workers"]),
+            f"{result['items_per_second']:.1f}",
+            f"{result['seconds']:.2f}",
+            _format_ms(result["p50"]),
+            _format_ms(result["p99"]),
+            str(result["requests"]),
+            str(int(result["retries"])),
+            str(int(result["errors"])),
+            str(result["missing_alts"]),
+            f"{rss:.0f} MB" if rss is not None else "-",
+        )
+
+    console.print(table)
+
+
+def _format_ms(seconds) -> str:
+    return f"{seconds * 1000:.0f}ms" if seconds is not None else "-"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the taggers against a local stub of SceneXplain and the platform APIs"
+    )
+    parser.add_argument("--platforms", nargs="+", choices=PLATFORMS, default=PLATFORMS)
+    parser.add_argument(
+        "--engines", nargs="+", choices=["sync", "async"], default=["sync", "async"]
+    )
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        type=int,
+        default=[100, 1000],
+        help="corpus sizes in items",
+    )
+    parser.add_argument(
+        "--workers", nargs="+", type=int, default=[1, 8, 32], help="concurrency levels"
+    )
+    parser.add_argument("--images-per-item", type=int, default=2)
+    parser.add_argument(
+        "--shared-images",
+        type=float,
+        default=0.1,
+        help="share of images used by several items",
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.02, help="seconds per platform request"
+    )
+    parser.add_argument(
+        "--describe-latency",
+        type=float,
+        default=0.2,
+        help="seconds per describe request",
+    )
+    parser.add_argument(
+        "--image-latency", type=float, default=0.005, help="seconds per image download"
+    )
+    parser.add_argument(
+        "--jitter", type=float, default=0.2, help="relative spread of latencies"
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="share of requests failing with a 500",
+    )
+    parser.add_argument(
+        "--throttle-rate",
+        type=float,
+        default=0.0,
+        help="share of requests throttled with a 429",
+    )
+    parser.add_argument("--retry-after", type=float, default=0.1)
+    parser.add_argument(
+        "--output",
+        help="also write the results to this JSON file, e.g. to compare runs",
+    )
+    args = parser.parse_args()
+
+    results = benchmark(args)
+    print_results(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+import hashlib
+import sqlite3
+import threading
+import time
+
+CACHE_PATH = ".alt-texter-cache.sqlite"
+CACHE_TTL = 60 * 60 * 24 * 90  # 90 days
+CACHE_MAX_ENTRIES = 200_000
+
+
+class AltTextCache:
+    def __init__(
+        self,
+        path: str = CACHE_PATH,
+        ttl: int = CACHE_TTL,
+        max_entries: int = CACHE_MAX_ENTRIES,
+        hash_content: bool = False,
+    ):
+        """
+        Disk-backed cache of generated alt texts, shared between runs and platforms.
+
+        Entries are keyed by image URL and, if hash_content is set, also by a hash of the image bytes,
+        so the same image behind a different URL is only described once.
+
+        Args:
+            path (str): Path of the SQLite database file.
+            ttl (int): Seconds before an entry expires.
+            max_entries (int): Maximum number of entries to keep. Least recently used entries are evicted first.
+            hash_content (bool): Also key entries by the SHA-256 of the image bytes. Costs one image download per cache miss.
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hash_content = hash_content
+        self._lock = threading.Lock()
+        self._writes = 0
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS alt_texts (
+                    key TEXT PRIMARY KEY,
+                    alt_text TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS alt_texts_accessed_at ON alt_texts (accessed_at)"
+            )
+
+    @staticmethod
+    def content_hash(content: bytes) -> str:
+        """
+        Hash image bytes for use as a cache key.
+
+        Args:
+            content (bytes): Raw image data.
+
+        Returns:
+            digest (str): Hex SHA-256 digest of the content.
+        """
+        return hashlib.sha256(content).hexdigest()
+
+    def _keys(self, image_url, language, max_length, content_hash=None) -> list:
+        keys = [f"url:{image_url}|{language}|{max_length}"]
+        if content_hash:
+            keys.append(f"sha256:{content_hash}|{language}|{max_length}")
+
+        return keys
+
+    def get(
+        self, image_url: str, language: str, max_length: int, content_hash: str = None
+    ):
+        """
+        Look up a cached alt text.
+
+        Args:
+            image_url (str): URL of the image.
+            language (str): Language of the alt text.
+            max_length (int): Maximum length the alt text was generated with.
+            content_hash (str): Hash of the image bytes, if known.
+
+        Returns:
+            alt_text (str): The cached alt text, or None if there is no fresh entry.
+        """
+        now = time.time()
+        keys = self._keys(image_url, language, max_length, content_hash)
+        with self._lock:
+            for key in keys:
+                row = self._conn.execute(
+                    "SELECT alt_text, created_at FROM alt_texts WHERE key = ?", (key,)
+                ).fetchone()
+                if row and now - row[1] < self.ttl:
+                    with self._conn:
+                        self._conn.execute(
+                            "UPDATE alt_texts SET accessed_at = ? WHERE key = ?",
+                            (now, key),
+                        )
+                    return row[0]
+
+        return None
+
+    def set(
+        self,
+        image_url: str,
+        language: str,
+        max_length: int,
+        alt_text: str,
+        content_hash: str = None,
+    ) -> None:
+        """
+        Store a generated alt text.
+
+        Args:
+            image_url (str): URL of the image.
+            language (str): Language of the alt text.
+            max_length (int): Maximum length the alt text was generated with.
+            alt_text (str): The alt text to store.
+            content_hash (str): Hash of the image bytes, if known.
+        """
+        now = time.time()
+        rows = [
+            (key, alt_text, now, now)
+            for key in self._keys(image_url, language, max_length, content_hash)
+        ]
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO alt_texts VALUES (?, ?, ?, ?)", rows
+                )
+            self._writes += 1
+            if self._writes % 100 == 0:
+                self._evict()
+
+    def evict(self) -> None:
+        """
+        Remove expired entries, then least recently used entries above max_entries.
+        """
+        with self._lock:
+            self._evict()
+
+    def _evict(self) -> None:
+        with self._conn:
+            self._conn.execute(
+                "DELETE FROM alt_texts WHERE created_at < ?", (time.time() - self.ttl,)
+            )
+            self._conn.execute(
+                """
+                DELETE FROM alt_texts WHERE key IN (
+                    SELECT key FROM alt_texts ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM alt_texts").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._evict()
+            self._conn.close()
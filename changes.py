@@ -0,0 +1,121 @@
+import threading
+
+
+class ChangeTracker:
+    def __init__(self):
+        """
+        Records the alt texts that adding alts actually changed, per content item. Whether an item needs writing back
+        is then a lookup, instead of a comparison of whole documents. Diffs are only built when asked for.
+        """
+        self._changes = {}
+        self._failures = {}
+        self._lock = threading.Lock()
+
+    def start(self, key) -> None:
+        """
+        Start tracking an item, forgetting any changes recorded for it before.
+
+        Args:
+            key: ID of the item.
+        """
+        with self._lock:
+            self._changes[key] = []
+            self._failures.pop(key, None)
+
+    def record(self, key, target: str, old_alt: str, new_alt: str) -> None:
+        """
+        Record an alt text being set. Setting an empty or identical alt text is not a change.
+
+        Args:
+            key: ID of the item.
+            target (str): What the alt text belongs to, e.g. the image URL.
+            old_alt (str): The previous alt text.
+            new_alt (str): The new alt text.
+        """
+        if not new_alt or new_alt == old_alt:
+            return
+
+        with self._lock:
+            self._changes.setdefault(key, []).append((target, old_alt, new_alt))
+
+    def record_failure(self, key, target: str) -> None:
+        """
+        Record an alt text that couldn't be generated, but might be next time, e.g. because SceneXplain was down.
+
+        Args:
+            key: ID of the item.
+            target (str): What the alt text belongs to, e.g. the image URL.
+        """
+        with self._lock:
+            self._failures.setdefault(key, []).append(target)
+
+    def has_failures(self, key) -> bool:
+        """
+        Check whether any alt text of an item couldn't be generated. Such items aren't done, even if
+        other alt texts were changed.
+
+        Args:
+            key: ID of the item.
+
+        Returns:
+            True if at least one alt text failed.
+        """
+        return bool(self._failures.get(key))
+
+    def is_tracked(self, key) -> bool:
+        return key in self._changes
+
+    def is_changed(self, key) -> bool:
+        """
+        Check whether any alt text of an item was changed.
+
+        Args:
+            key: ID of the item.
+
+        Returns:
+            True if at least one alt text was changed.
+        """
+        return bool(self._changes.get(key))
+
+    def changes(self, key) -> list:
+        """
+        Get the recorded changes of an item.
+
+        Args:
+            key: ID of the item.
+
+        Returns:
+            changes (list): (target, old alt, new alt) tuples, in the order they were made.
+        """
+        return list(self._changes.get(key, []))
+
+    def diff(self, key) -> str:
+        """
+        Describe the changes of an item as a unified diff.
+
+        Args:
+            key: ID of the item.
+
+        Returns:
+            diff (str): One hunk per changed alt text, or an empty string if nothing changed.
+        """
+        changes = self.changes(key)
+        if not changes:
+            return ""
+
+        lines = ["--- original", "+++ new"]
+        for target, old_alt, new_alt in changes:
+            lines += [f"@@ {target} @@", f"-{old_alt or ''}", f"+{new_alt}"]
+
+        return "\n".join(lines)
+
+    def forget(self, key) -> None:
+        """
+        Drop an item's changes once it has been written, so a long run doesn't hold on to them.
+
+        Args:
+            key: ID of the item.
+        """
+        with self._lock:
+            self._changes.pop(key, None)
+            self._failures.pop(key, None)
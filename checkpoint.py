@@ -0,0 +1,219 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+CHECKPOINT_PATH = ".alt-texter-checkpoint.jsonl"
+STATE_PATH = ".alt-texter-state.json"
+DONE_STATUSES = ["updated", "unchanged", "skipped"]
+
+
+class Checkpoint:
+    def __init__(self, path: str = CHECKPOINT_PATH, resume: bool = False):
+        """
+        Append-only JSONL journal of a run, so a crashed run can pick up where it stopped.
+
+        Each line is either an item record ({"type": "item", "key", "status"}) or a generated alt text
+        ({"type": "alt", "image", "language", "alt"}). Later lines win over earlier ones.
+
+        Args:
+            path (str): Path of the journal file.
+            resume (bool): Load an existing journal and append to it. Otherwise start a fresh journal.
+        """
+        self.path = path
+        self.statuses = {}
+        self.alts = {}
+        self._lock = threading.Lock()
+
+        if resume and os.path.exists(path):
+            self._load()
+        elif os.path.exists(path):
+            os.remove(path)
+
+        self._file = open(path, "a", encoding="utf-8")
+
+    def _load(self) -> None:
+        with open(self.path, encoding="utf-8") as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # last line may be cut off by the crash
+
+                if entry.get("type") == "item":
+                    self.statuses[entry["key"]] = entry["status"]
+                elif entry.get("type") == "alt":
+                    self.alts[(entry.get("language"), entry["image"])] = entry["alt"]
+
+    def _write(self, entry: dict) -> None:
+        entry["at"] = time.time()
+        with self._lock:
+            self._file.write(json.dumps(entry) + "\n")
+            self._file.flush()
+
+    def is_done(self, key: str) -> bool:
+        """
+        Check whether an item was finished in this or a previous run.
+
+        Args:
+            key (str): Item key, e.g. 'ghost:https://blog.example.com:<post id>'.
+
+        Returns:
+            True if the item was updated, unchanged, or skipped.
+        """
+        return self.statuses.get(key) in DONE_STATUSES
+
+    def record_item(self, key: str, status: str) -> None:
+        """
+        Record the outcome of processing an item.
+
+        Args:
+            key (str): Item key.
+            status (str): 'updated', 'unchanged', 'skipped' or 'failed'.
+        """
+        self.statuses[key] = status
+        self._write({"type": "item", "key": key, "status": status})
+
+    def get_alt(self, image_url: str, language: str) -> str:
+        """
+        Look up an alt text generated in this or a previous run.
+
+        Args:
+            image_url (str): URL of the image.
+            language (str): Language the alt text is in.
+
+        Returns:
+            alt_text (str): The alt text, or None if there is none.
+        """
+        return self.alts.get((language, image_url))
+
+    def record_alt(self, image_url: str, language: str, alt_text: str) -> None:
+        """
+        Record a generated alt text, so a resumed run doesn't pay for it again.
+
+        Args:
+            image_url (str): URL of the image.
+            language (str): Language the alt text is in.
+            alt_text (str): The generated alt text.
+        """
+        self.alts[(language, image_url)] = alt_text
+        self._write(
+            {"type": "alt", "image": image_url, "language": language, "alt": alt_text}
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+def parse_timestamp(timestamp: str) -> datetime:
+    """
+    Parse a platform timestamp into an aware UTC datetime.
+
+    Args:
+        timestamp (str): ISO 8601 timestamp, e.g. Ghost '2024-01-01T10:00:00.000Z', Shopify
+            '2024-01-01T05:00:00-05:00' or WordPress GMT '2024-01-01T10:00:00'.
+
+    Returns:
+        datetime (datetime): The timestamp in UTC. Timestamps without offset are taken to be UTC.
+    """
+    parsed = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+
+    return parsed.astimezone(timezone.utc)
+
+
+class HighWaterMark:
+    def __init__(self):
+        """
+        Tracks how far a run got through content ordered by modification time: the newest modification time
+        of finished items, held back to just before the oldest failed item so the next run retries it.
+        """
+        self.newest_done = None
+        self.oldest_failed = None
+        self.cut_short = False
+        self._lock = threading.Lock()
+
+    def done(self, timestamp: str) -> None:
+        if not timestamp:
+            return
+
+        modified = parse_timestamp(timestamp)
+        with self._lock:
+            if self.newest_done is None or modified > self.newest_done:
+                self.newest_done = modified
+
+    def failed(self, timestamp: str) -> None:
+        if not timestamp:
+            return
+
+        modified = parse_timestamp(timestamp)
+        with self._lock:
+            if self.oldest_failed is None or modified < self.oldest_failed:
+                self.oldest_failed = modified
+
+    def stop_early(self) -> None:
+        """
+        Note that the run stopped before it got through all content, e.g. at a limit. Items it never saw can be
+        older than the ones it finished, so the mark isn't moved at all.
+        """
+        with self._lock:
+            self.cut_short = True
+
+    @property
+    def value(self):
+        """
+        The mark to resume the next incremental run from, or None if no item was finished or the run stopped early.
+        """
+        with self._lock:
+            if self.cut_short:
+                return None
+
+            if self.newest_done is None or self.oldest_failed is None:
+                return self.newest_done
+
+            return min(self.newest_done, self.oldest_failed - timedelta(seconds=1))
+
+
+class IncrementalState:
+    def __init__(self, path: str = STATE_PATH):
+        """
+        High-water marks of previous runs, per platform and site, stored as JSON.
+
+        Args:
+            path (str): Path of the state file.
+        """
+        self.path = path
+        self.marks = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as file:
+                self.marks = json.load(file)
+
+    def get(self, key: str):
+        """
+        Get the high-water mark of the previous run.
+
+        Args:
+            key (str): '<platform>:<site>'.
+
+        Returns:
+            mark (datetime): Modification time up to which all content was processed, or None.
+        """
+        mark = self.marks.get(key)
+        return parse_timestamp(mark) if mark else None
+
+    def set(self, key: str, mark: datetime) -> None:
+        """
+        Store a new high-water mark and write the state file.
+
+        Args:
+            key (str): '<platform>:<site>'.
+            mark (datetime): Modification time up to which all content was processed.
+        """
+        with self._lock:
+            self.marks[key] = mark.isoformat()
+            with open(self.path, "w", encoding="utf-8") as file:
+                json.dump(self.marks, file, indent=2)
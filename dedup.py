@@ -0,0 +1,151 @@
+import hashlib
+import re
+import threading
+from concurrent.futures import Future
+from urllib.parse import urlsplit, urlunsplit
+
+IMAGE_EXTENSIONS = ["avif", "gif", "jpeg", "jpg", "png", "webp"]
+# Ghost serves resized copies under /size/w600/ or /size/w600h400/, and converted ones under /format/webp/
+GHOST_SIZE_PATTERN = re.compile(r"/(size/w\d+(h\d+)?|format/\w+)(?=/)")
+# WordPress (image-300x200.jpg) and Shopify (image_300x.jpg) resized copies
+RESIZE_SUFFIX_PATTERN = re.compile(r"[-_](\d+x\d*|\d*x\d+)(?=\.\w+$)")
+
+
+def normalize_image_url(image_url: str) -> str:
+    """
+    Reduce an image URL to the original image, so resized copies on different pages share a key.
+
+    Query strings are only dropped from URLs that end in an image extension, since elsewhere they can pick the image.
+
+    Args:
+        image_url (str): URL of the image.
+
+    Returns:
+        url (str): The normalised URL.
+    """
+    scheme, netloc, path, query, _ = urlsplit(image_url)
+    path = GHOST_SIZE_PATTERN.sub("", path)
+    path = RESIZE_SUFFIX_PATTERN.sub("", path)
+    if path.rsplit(".", 1)[-1].lower() in IMAGE_EXTENSIONS:
+        query = ""
+
+    return urlunsplit((scheme, netloc.lower(), path, query, ""))
+
+
+class ImageDeduplicator:
+    def __init__(self, hash_content: bool = False):
+        """
+        Run-scoped registry that makes sure each unique image is described once, however many items use it.
+
+        Images are keyed by normalised URL, or optionally by a SHA-256 hash of their bytes. The first caller
+        to claim a key describes the image; everyone else, including concurrent callers, waits for its result.
+
+        Hashing the bytes finds the same file behind unrelated URLs, e.g. an image uploaded twice. Only exact
+        copies match: a re-encoded or differently sized copy is a different image, unless its URL normalises to
+        the same key.
+
+        Args:
+            hash_content (bool): Also match images by the hash of their bytes. Costs one download per unique URL.
+        """
+        self.hash_content = hash_content
+        self._results = {}
+        self._content_keys = {}
+        self._rejected = set()
+        self._lock = threading.Lock()
+
+    def url_key(self, image_url: str) -> str:
+        """
+        Key an image by its normalised URL.
+
+        Args:
+            image_url (str): URL of the image. Can be 'standard' URL or a datauri.
+
+        Returns:
+            key (str): The image's key.
+        """
+        if image_url.startswith("data"):
+            return "data:" + hashlib.sha1(image_url.encode()).hexdigest()
+
+        return normalize_image_url(image_url)
+
+    def known_content_key(self, url_key: str):
+        """
+        Get the content key already computed for a URL key, if any.
+        """
+        return self._content_keys.get(url_key)
+
+    def content_key(self, url_key: str, content: bytes) -> str:
+        """
+        Key an image by the hash of its bytes, remembering it for its URL key.
+
+        Args:
+            url_key (str): The image's URL key.
+            content (bytes): Raw image data, or None if it couldn't be downloaded.
+
+        Returns:
+            key (str): The content key, or the URL key if the image couldn't be downloaded.
+        """
+        key = f"sha256:{hashlib.sha256(content).hexdigest()}" if content else url_key
+        self._content_keys[url_key] = key
+        return key
+
+    def claim(self, key: str) -> tuple:
+        """
+        Claim an image for describing.
+
+        Args:
+            key (str): The image's key.
+
+        Returns:
+            (future, owner): Future for the image's alt text, and whether the caller must resolve it.
+        """
+        with self._lock:
+            if key in self._results:
+                return self._results[key], False
+
+            future = Future()
+            self._results[key] = future
+            return future, True
+
+    def resolve(self, key: str, alt_text: str) -> None:
+        """
+        Publish the alt text of a claimed image. Failed images are forgotten, so a later item can try again.
+
+        Args:
+            key (str): The image's key.
+            alt_text (str): The alt text, or None if it couldn't be generated.
+        """
+        with self._lock:
+            future = self._results[key]
+            if alt_text is None:
+                del self._results[key]
+
+        future.set_result(alt_text)
+
+    def abandon(self, key: str, error: Exception) -> None:
+        """
+        Give up on a claimed image without an outcome, e.g. because the budget ran out before it was described.
+        Callers waiting on it get the error instead of a failed alt text, and a later item can claim it again.
+
+        Args:
+            key (str): The image's key.
+            error (Exception): What callers waiting on the image raise.
+        """
+        with self._lock:
+            future = self._results.pop(key)
+
+        future.set_exception(error)
+
+    def reject(self, key: str) -> None:
+        """
+        Remember that an image can't be described at all, e.g. because it's an SVG or too small. Unlike failures,
+        rejections are final, so items using the image can still be done.
+
+        Args:
+            key (str): The image's key, from url_key or content_key.
+        """
+        with self._lock:
+            self._rejected.add(key)
+
+    def is_rejected(self, key: str) -> bool:
+        return key in self._rejected
@@ -1,21 +1,41 @@
 import base64
+import copy
+import heapq
 import json
 import logging
 # import tempfile
 # import os
+import threading
 import time
-from difflib import unified_diff
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+from datetime import datetime
+from itertools import islice
 
 import jwt
 import requests
 # import shopify
-from bs4 import BeautifulSoup
 # from lxml.html import diff, fromstring, tostring
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
 from rich.console import Console
 from rich.logging import RichHandler
+from urllib3.exceptions import NewConnectionError
 from woocommerce import API
 
+from cache import AltTextCache
+from changes import ChangeTracker
+from checkpoint import Checkpoint, HighWaterMark
+from dedup import ImageDeduplicator
+from htmlrewrite import find_images, set_alts
+from imageprobe import PROBE_BYTES, rejection_reason
+from metrics import Metrics, body_size
+from pipeline import FairScheduler, Pipeline, Stage, Task
+from priority import Budget, BudgetExhausted, Priority
+from ratelimit import RateLimiter
+
 console = Console(tab_size=2)
 
 # set up logging
@@ -26,16 +46,99 @@ logging.basicConfig(
 log = logging.getLogger("rich")
 
 SCENEX_URL = "https://api.scenex.jina.ai/v1/describe"
+SCENEX_BATCH_SIZE = 16  # images per describe request
+VALIDATE_WORKERS = 16  # images probed concurrently
+POOL_CONNECTIONS = 10  # number of hosts to keep connection pools for
+POOL_MAXSIZE = 10  # connections kept alive per host
+REQUEST_TIMEOUT = 60  # seconds
+GHOST_TOKEN_LIFETIME = 300  # seconds, the most Ghost accepts for Admin API tokens
+GHOST_TOKEN_REFRESH_MARGIN = 60  # seconds before expiry that a new token is signed
+# Ghost post fields listed for runs that sort all posts first. Bodies are fetched one by one later
+GHOST_SORT_FIELDS = "id,title,slug,url,published_at,updated_at"
+# Ghost lexical cards that hold a list of images, and the key of that list
+GHOST_IMAGE_LIST_CARDS = {"gallery": "images"}
+WP_ITEMS_PER_PAGE = 100  # WordPress REST API maximum
+WP_ITEM_FIELDS = "id,type,title,content,source_url,alt_text,modified_gmt,date_gmt,link"
+# WordPress item fields listed for runs that sort all items first. Bodies are fetched one by one later
+WP_SORT_FIELDS = "id,type,title,slug,link,modified_gmt,date_gmt"
+# WordPress listing orders, and the item field each one sorts by
+WP_ORDER_FIELDS = {"date": "date_gmt", "modified": "modified_gmt"}
+WC_BATCH_SIZE = 100  # WooCommerce batch endpoint maximum
+SHOPIFY_API_VERSION = "2024-01"
+SHOPIFY_PAGE_SIZE = 250  # Shopify REST API maximum
+SHOPIFY_BULK_POLL_INTERVAL = 2  # seconds between bulk operation status checks
+SHOPIFY_MUTATION_BATCH_SIZE = 10  # products per productUpdateMedia request
+SHOPIFY_MUTATION_COST = 10  # query cost points per productUpdateMedia
+# worker threads per pipeline stage. Describing is slowest, so it gets the most
+PIPELINE_WORKERS = {"fetch": 2, "describe": 8, "write": 2}
+
+
+def create_session(
+    pool_connections: int = POOL_CONNECTIONS,
+    pool_maxsize: int = POOL_MAXSIZE,
+    pool_sizes: dict = None,
+) -> requests.Session:
+    """
+    Create a requests session that keeps connections alive and reuses them across calls.
+
+    Args:
+        pool_connections (int): Number of hosts to keep connection pools for.
+        pool_maxsize (int): Default number of connections kept alive per host.
+        pool_sizes (dict): Per-host overrides of pool_maxsize, keyed by URL prefix, e.g. {"https://api.scenex.jina.ai": 20}.
+
+    Returns:
+        session (requests.Session): The pooled session.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+    for prefix, pool_size in (pool_sizes or {}).items():
+        session.mount(prefix, HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+
+    return session
 
 
 class AltTexter:
+    platform = None
+
     def __init__(
         self,
         url: str,
         scenex_api_key: str,
         scenex_url: str = SCENEX_URL,
         language: str = "en",
+        cache: AltTextCache = None,
+        session: requests.Session = None,
+        timeout: float = REQUEST_TIMEOUT,
+        pool_maxsize: int = POOL_MAXSIZE,
+        pool_sizes: dict = None,
+        rate_limiter: RateLimiter = None,
+        checkpoint: Checkpoint = None,
+        validate_images: bool = True,
+        dedup: ImageDeduplicator = None,
+        metrics: Metrics = None,
+        site_name: str = None,
     ):
+        """
+        Args:
+            url (str): URL of the site to process.
+            scenex_api_key (str): Your SceneXplain API key.
+            scenex_url (str): SceneXplain describe endpoint.
+            language (str): Language of the generated alt texts.
+            cache (AltTextCache): Optional cache of previously generated alt texts.
+            session (requests.Session): Session used for SceneXplain and platform calls. Create one with create_session() to share a connection pool between taggers.
+            timeout (float): Timeout in seconds for each HTTP request.
+            pool_maxsize (int): Connections kept alive per host, if no session is given.
+            pool_sizes (dict): Per-host overrides of pool_maxsize keyed by URL prefix, if no session is given.
+            rate_limiter (RateLimiter): Rate limiter for all HTTP calls. Pass the same one to several taggers to share it.
+            checkpoint (Checkpoint): Optional journal of finished items and generated alt texts, for resuming runs.
+            validate_images (bool): Probe images before describing them, and skip broken, unsupported and tiny ones.
+            dedup (ImageDeduplicator): Registry that makes sure each unique image is described once per run. Pass the same one to several taggers to share it.
+            metrics (Metrics): Where to record latencies, retries, cache hits and bytes transferred per stage. Pass the same one to several taggers to share it.
+            site_name (str): Name of the site in the metrics, when several sites share them.
+        """
         self.scenex_headers = {
             "x-api-key": f"token {scenex_api_key}",
             "content-type": "application/json",
@@ -43,6 +146,146 @@ class AltTexter:
         self.url = url
         self.scenex_url = scenex_url
         self.language = language
+        self.cache = cache
+        self.session = session or self._create_session(pool_maxsize, pool_sizes)
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.checkpoint = checkpoint
+        self.high_water_mark = HighWaterMark()
+        self.validate_images = validate_images
+        self._validation_results = {}
+        self.dedup = dedup or ImageDeduplicator()
+        self.changes = ChangeTracker()
+        self.metrics = metrics or Metrics()
+        self.site_name = site_name
+        self.budget = None
+        self.scheduler = None
+
+    def _create_session(self, pool_maxsize: int, pool_sizes: dict):
+        """
+        Create the session for a tagger that wasn't given one.
+        """
+        return create_session(pool_maxsize=pool_maxsize, pool_sizes=pool_sizes)
+
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send an HTTP request through the pooled session.
+
+        Args:
+            method (str): HTTP method, e.g. 'GET'.
+            url (str): URL to send the request to.
+            **kwargs: Passed through to requests, e.g. headers, params, json.
+                'cost' is taken out and charged against the rate limit instead.
+                'stage' is taken out and labels the request's metrics. Defaults to 'fetch' for GETs and 'write' otherwise.
+                'idempotent' is taken out and says whether the request may be sent again after a timeout or
+                server error. Defaults to True for everything but POSTs.
+
+        Returns:
+            response (requests.Response): The response.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        cost = kwargs.pop("cost", 1)
+        stage = kwargs.pop("stage", "fetch" if method == "GET" else "write")
+        idempotent = kwargs.pop("idempotent", method != "POST")
+        return self._send(
+            url,
+            lambda: self.session.request(method, url, **kwargs),
+            cost=cost,
+            stage=stage,
+            stream=kwargs.get("stream", False),
+            idempotent=idempotent,
+        )
+
+    def _send(
+        self,
+        url: str,
+        send,
+        cost: float = 1,
+        stage: str = "fetch",
+        stream: bool = False,
+        idempotent: bool = True,
+    ) -> requests.Response:
+        """
+        Send a request under the rate limiter, retrying throttled and failed requests with backoff.
+
+        Args:
+            url (str): URL the request goes to. Used to pick the rate limit bucket.
+            send (callable): Sends the request and returns the response.
+            cost (float): What the request costs against the rate limit, e.g. a GraphQL query cost.
+            stage (str): Stage the request belongs to in the run's metrics, e.g. 'describe'.
+            stream (bool): Whether the response body is left unread, so its size can only come from its headers.
+            idempotent (bool): Whether the request may be sent again after a timeout or server error. If not,
+                it's only retried when throttled or when it never reached the server.
+
+        Returns:
+            response (requests.Response): The final response.
+        """
+        attempt = 0
+        while True:
+            time.sleep(self.rate_limiter.reserve(url, cost))
+            start = time.perf_counter()
+            try:
+                response = send()
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self._record_request(stage, time.perf_counter() - start)
+                delay = None
+                if idempotent or _is_unsent_error(e):
+                    delay = self.rate_limiter.retry_delay(attempt)
+                if delay is None:
+                    raise
+                log.warn(f"Request to {url} failed ({e}). Retrying in {delay:.1f}s")
+            else:
+                received = _content_length(response.headers)
+                if received is None:
+                    received = 0 if stream else len(response.content)
+                self._record_request(
+                    stage,
+                    time.perf_counter() - start,
+                    response.status_code,
+                    body_size(response.request.body),
+                    received,
+                )
+                self.rate_limiter.record(url, response.status_code, response.headers)
+                delay = self.rate_limiter.retry_delay(
+                    attempt, response.status_code, response.headers, idempotent
+                )
+                if delay is None:
+                    return response
+                log.warn(
+                    f"Request to {url} returned {response.status_code}. Retrying in {delay:.1f}s"
+                )
+
+            self.metrics.inc("retries_total", self.platform, stage, site=self.site_name)
+            time.sleep(delay)
+            attempt += 1
+
+    def _record_request(
+        self,
+        stage: str,
+        seconds: float,
+        status_code: int = None,
+        sent: int = 0,
+        received: int = 0,
+    ) -> None:
+        """
+        Record one request attempt in the run's metrics.
+
+        Args:
+            stage (str): Stage the request belongs to, e.g. 'describe'.
+            seconds (float): How long the attempt took.
+            status_code (int): Status code of the response, or None if no response came back.
+            sent (int): Request body bytes.
+            received (int): Response body bytes.
+        """
+        self.metrics.observe(self.platform, stage, seconds, site=self.site_name)
+        if status_code is None or status_code >= 400:
+            self.metrics.inc("errors_total", self.platform, stage, site=self.site_name)
+        self.metrics.inc(
+            "bytes_sent_total", self.platform, stage, sent, site=self.site_name
+        )
+        self.metrics.inc(
+            "bytes_received_total", self.platform, stage, received, site=self.site_name
+        )
 
     def generate_alt_text(
         self,
@@ -62,67 +305,860 @@ class AltTexter:
         Returns:
             alt_text (str): The alt text of the input image URL.
         """
-        # if self._validate_image(image_url):
+        return self.generate_alt_texts(
+            [image_url], max_length=max_length, max_tries=max_tries
+        )[0]
 
-        filename = image_url.split("/")[-1]
-        data = {
+    def generate_alt_texts(
+        self,
+        image_urls: list,
+        max_length: int = 125,
+        max_tries: int = 3,
+        batch_size: int = SCENEX_BATCH_SIZE,
+    ) -> list:
+        """
+        Generate alt texts for several images, packing them into as few SceneXplain requests as possible.
+
+        Each unique image is only described once per run: duplicates, resized copies and images another thread
+        is already describing reuse that result.
+
+        Args:
+            image_urls (list): URLs of the images. Each can be 'standard' URL or a datauri.
+            max_length (int): Maximum length of each alt text. Defaults to 125, which is a recommended standard.
+            max_tries (int): Maximum attempts per image before giving up.
+            batch_size (int): Maximum number of images to send in a single request.
+
+        Returns:
+            alt_texts (list): Alt texts in the same order as image_urls. Images that failed are None.
+        """
+        keys = [
+            f"{self._dedup_key(url)}|{self.language}|{max_length}" for url in image_urls
+        ]
+        futures, owned = self._claim_images(image_urls, keys)
+
+        alt_texts = [None] * len(owned)
+        out_of_budget = None
+        try:
+            alt_texts = self._generate_alt_texts(
+                list(owned.values()), max_length, max_tries, batch_size
+            )
+        except BudgetExhausted as e:
+            out_of_budget = e
+            raise
+        finally:
+            self._settle_images(owned, alt_texts, out_of_budget)
+
+        return [futures[key].result() for key in keys]
+
+    def _claim_images(self, image_urls: list, keys: list) -> tuple:
+        """
+        Claim each unique image for describing, unless another caller already has.
+
+        Args:
+            image_urls (list): URLs of the images.
+            keys (list): Deduplication key of each image.
+
+        Returns:
+            (futures, owned): Future alt text per key, and the image URL per key this caller has to describe.
+        """
+        futures, owned = {}, {}
+        for image_url, key in zip(image_urls, keys):
+            if key not in futures:
+                futures[key], owner = self.dedup.claim(key)
+                if owner:
+                    owned[key] = image_url
+        self.metrics.inc(
+            "cache_hits_total",
+            self.platform,
+            "describe",
+            len(image_urls) - len(owned),
+            site=self.site_name,
+            source="dedup",
+        )
+
+        return futures, owned
+
+    def _settle_images(
+        self, owned: dict, alt_texts: list, out_of_budget: BudgetExhausted = None
+    ) -> None:
+        """
+        Hand the alt texts of claimed images to the callers waiting on them. Call this before waiting on other
+        callers' images, so nobody waits on us forever.
+
+        Args:
+            owned (dict): Image URL per key this caller claimed, from _claim_images.
+            alt_texts (list): Alt text of each claimed image, in order. None for images that failed.
+            out_of_budget (BudgetExhausted): Set if the budget ran out. The images weren't described rather than
+                failed then, so callers waiting on them are deferred as well.
+        """
+        for key, alt_text in zip(owned, alt_texts):
+            if out_of_budget is not None:
+                self.dedup.abandon(key, out_of_budget)
+            else:
+                self.dedup.resolve(key, alt_text)
+
+    def _dedup_key(self, image_url: str) -> str:
+        """
+        Key an image for deduplication: its normalised URL or, if enabled, the hash of its bytes.
+        """
+        url_key = self.dedup.url_key(image_url)
+        if not self.dedup.hash_content:
+            return url_key
+
+        return self.dedup.known_content_key(url_key) or self.dedup.content_key(
+            url_key, self._get_image_bytes(image_url)
+        )
+
+    def _known_dedup_key(self, image_url: str) -> str:
+        """
+        Key of an image for deduplication, as far as it's known without downloading the image.
+        """
+        url_key = self.dedup.url_key(image_url)
+        return self.dedup.known_content_key(url_key) or url_key
+
+    def _generate_alt_texts(
+        self, image_urls: list, max_length: int, max_tries: int, batch_size: int
+    ) -> list:
+        alt_texts = [None] * len(image_urls)
+        content_hashes = [None] * len(image_urls)
+        pending = []
+        for i, image_url in enumerate(image_urls):
+            alt_texts[i] = self._get_checkpointed_alt_text(image_url, max_length)
+            if not alt_texts[i] and self.cache is not None:
+                alt_texts[i], content_hashes[i] = self._get_cached_alt_text(
+                    image_url, max_length
+                )
+                if alt_texts[i]:
+                    self._record_cache_hit("cache")
+            if not alt_texts[i]:
+                pending.append(i)
+
+        if self.validate_images and pending:
+            valid = self._validate_images([image_urls[i] for i in pending])
+            pending = self._keep_valid(image_urls, pending, valid)
+
+        # implement max tries since sometimes SX has issues. Only images SceneXplain answered without text are
+        # retried: a failed request was already retried as far as it's safe, and sending it again could pay twice
+        tries = 0
+        given_up = []
+        while pending and tries < max_tries:
+            failed = []
+            for start in range(0, len(pending), batch_size):
+                chunk = pending[start : start + batch_size]
+                texts = self._describe([image_urls[i] for i in chunk])
+                if texts is None:
+                    given_up += chunk
+                else:
+                    failed += self._apply_descriptions(
+                        image_urls, chunk, texts, alt_texts, content_hashes, max_length
+                    )
+            pending = failed
+            tries += 1
+            if pending and tries < max_tries:
+                time.sleep(self.rate_limiter.backoff(tries))
+
+        for i in pending + given_up:
+            log.warn(f"Could not generate alt text for {image_urls[i].split('/')[-1]}")
+
+        return alt_texts
+
+    def _get_checkpointed_alt_text(self, image_url: str, max_length: int):
+        """
+        Alt text the checkpoint journal has for an image from an earlier, interrupted run, or None.
+        """
+        if self.checkpoint is None:
+            return None
+
+        alt_text = self.checkpoint.get_alt(image_url, self.language)
+        if not alt_text:
+            return None
+
+        self._record_cache_hit("checkpoint")
+        return alt_text[:max_length]
+
+    def _keep_valid(self, image_urls: list, pending: list, valid: list) -> list:
+        """
+        Drop the images validation turned down, and remember them as impossible to describe.
+
+        Args:
+            image_urls (list): URLs of all images.
+            pending (list): Indexes of the images that were validated.
+            valid (list): Validation result of each pending image, see _validate_images.
+
+        Returns:
+            pending (list): Indexes of the images worth describing.
+        """
+        for i, is_valid in zip(pending, valid):
+            if is_valid is False:
+                self.dedup.reject(self._known_dedup_key(image_urls[i]))
+
+        # images that couldn't be checked right now are left without alt text, so their items are retried
+        return [i for i, is_valid in zip(pending, valid) if is_valid]
+
+    def _apply_descriptions(
+        self,
+        image_urls: list,
+        chunk: list,
+        texts: list,
+        alt_texts: list,
+        content_hashes: list,
+        max_length: int,
+    ) -> list:
+        """
+        Take in the answer to a describe request: store each text in alt_texts, and remember it for later runs.
+
+        Args:
+            image_urls (list): URLs of all images.
+            chunk (list): Indexes of the images in the request.
+            texts (list): Description of each image in the request, from _describe.
+            alt_texts (list): Alt text of each image, updated in place.
+            content_hashes (list): Content hash of each image, if known, for the cache.
+            max_length (int): Maximum length of each alt text.
+
+        Returns:
+            failed (list): Indexes of the images SceneXplain answered without text.
+        """
+        failed = []
+        for i, text in zip(chunk, texts):
+            if text:
+                alt_texts[i] = text[:max_length]
+                self._remember_alt_text(
+                    image_urls[i], max_length, alt_texts[i], content_hashes[i]
+                )
+            else:
+                failed.append(i)
+
+        return failed
+
+    def _record_alt(self, key, image_url: str, old_alt: str, new_alt: str) -> None:
+        """
+        Record the outcome of adding an alt text to an item in the change tracker. A missing alt text is a
+        failure, unless the image was rejected as impossible to describe.
+
+        Args:
+            key: ID of the item.
+            image_url (str): URL of the image.
+            old_alt (str): The previous alt text.
+            new_alt (str): The generated alt text, or None if there is none.
+        """
+        self.changes.record(key, image_url, old_alt, new_alt)
+        if not new_alt and not self.dedup.is_rejected(self._known_dedup_key(image_url)):
+            self.changes.record_failure(key, image_url)
+
+    def _item_status(self, key, written: bool = None) -> str:
+        """
+        Status of an item once alt texts were added to it, and it was written back if anything changed.
+
+        Args:
+            key: ID of the item in the change tracker.
+            written (bool): Whether writing the item succeeded, or None if there was nothing to write.
+
+        Returns:
+            status (str): 'updated' or 'unchanged', or 'failed' if writing or any of its alt texts failed.
+        """
+        if written is False or self.changes.has_failures(key):
+            return "failed"
+
+        return "unchanged" if written is None else "updated"
+
+    def _record_cache_hit(self, source: str) -> None:
+        """
+        Count an image whose alt text didn't need describing.
+
+        Args:
+            source (str): Where the alt text came from: 'checkpoint', 'cache' or 'dedup'.
+        """
+        self.metrics.inc(
+            "cache_hits_total",
+            self.platform,
+            "describe",
+            site=self.site_name,
+            source=source,
+        )
+
+    def _remember_alt_text(
+        self, image_url: str, max_length: int, alt_text: str, content_hash: str = None
+    ) -> None:
+        """
+        Store a freshly generated alt text in the cache and checkpoint journal, if they're enabled.
+
+        Args:
+            image_url (str): URL of the image.
+            max_length (int): Maximum length the alt text was generated with.
+            alt_text (str): The generated alt text.
+            content_hash (str): Hash of the image bytes, if known.
+        """
+        if self.cache is not None:
+            self.cache.set(
+                image_url,
+                self.language,
+                max_length,
+                alt_text,
+                content_hash=content_hash,
+            )
+
+        # datauris are too big to be worth journaling
+        if self.checkpoint is not None and not image_url.startswith("data"):
+            self.checkpoint.record_alt(image_url, self.language, alt_text)
+
+    def _site_key(self) -> str:
+        """
+        Key that identifies the site being processed, e.g. for incremental run state.
+
+        Returns:
+            key (str): '<platform>:<site>'.
+        """
+        return f"{self.platform}:{self._site_url()}"
+
+    def _site_url(self) -> str:
+        """
+        Base URL of the site's API, which its rate limit applies to.
+        """
+        return self.url
+
+    def _checkpoint_key(self, item_id) -> str:
+        """
+        Key that identifies a content item in the checkpoint journal.
+
+        Args:
+            item_id: ID of the item on its platform.
+
+        Returns:
+            key (str): '<platform>:<site>:<item id>'.
+        """
+        return f"{self._site_key()}:{item_id}"
+
+    def _is_done(self, item_id) -> bool:
+        """
+        Check whether an item was already finished, according to the checkpoint journal.
+
+        Args:
+            item_id: ID of the item on its platform.
+
+        Returns:
+            True if a checkpoint journal is in use and records the item as done.
+        """
+        if self.checkpoint is None:
+            return False
+
+        if self.checkpoint.is_done(self._checkpoint_key(item_id)):
+            log.info(f"Skipping {item_id}. Already done in a previous run")
+            return True
+
+        return False
+
+    def _record_item(self, item_id, status: str, modified: str = None) -> None:
+        """
+        Record the outcome of processing an item in the checkpoint journal, if one is in use,
+        and move the run's high-water mark along.
+
+        Args:
+            item_id: ID of the item on its platform.
+            status (str): 'updated', 'unchanged', 'skipped' or 'failed'.
+            modified (str): When the item was last modified on its platform, if known.
+        """
+        if self.checkpoint is not None:
+            self.checkpoint.record_item(self._checkpoint_key(item_id), status)
+
+        if status == "failed":
+            self.high_water_mark.failed(modified)
+        else:
+            self.high_water_mark.done(modified)
+
+    def _get_cached_alt_text(self, image_url: str, max_length: int) -> tuple:
+        """
+        Look up an image in the alt text cache, first by URL and then (if enabled) by content hash.
+
+        Args:
+            image_url (str): URL of the image.
+            max_length (int): Maximum length of the alt text.
+
+        Returns:
+            (alt_text, content_hash): Cached alt text or None, and the image's content hash if it was computed.
+        """
+        alt_text = self.cache.get(image_url, self.language, max_length)
+        if alt_text or not self.cache.hash_content:
+            return alt_text, None
+
+        content = self._get_image_bytes(image_url)
+        if content is None:
+            return None, None
+
+        content_hash = self.cache.content_hash(content)
+        alt_text = self.cache.get(
+            image_url, self.language, max_length, content_hash=content_hash
+        )
+        if alt_text:
+            # remember this URL too, so next time we don't need to download it
+            self.cache.set(image_url, self.language, max_length, alt_text)
+
+        return alt_text, content_hash
+
+    def _get_image_bytes(self, image_url: str):
+        """
+        Get the raw bytes of an image.
+
+        Args:
+            image_url (str): URL of the image. Can be 'standard' URL or a datauri
+
+        Returns:
+            content (bytes): The image data, or None if it couldn't be retrieved.
+        """
+        try:
+            if image_url.startswith("data"):
+                return base64.b64decode(image_url.split(",", 1)[1])
+
+            response = self._request("GET", image_url)
+            response.raise_for_status()
+            return response.content
+        except Exception as e:
+            log.warn(f"Could not download {image_url.split('/')[-1]}: {e}")
+            return None
+
+    def _describe(self, image_urls: list) -> list:
+        """
+        Send a single describe request to SceneXplain.
+
+        Args:
+            image_urls (list): URLs of the images to describe.
+
+        Returns:
+            texts (list): Description for each image, in order. None for images that failed, or None instead of
+                the list if the request failed.
+        """
+        if self.budget is not None and not self.budget.spend():
+            raise BudgetExhausted()
+
+        data = self._describe_data(image_urls)
+
+        # in a pipeline, the scheduler shares SceneXplain requests fairly between the sites
+        with self.scheduler.slot(self._site_key()) if self.scheduler else nullcontext():
+            try:
+                response = self._request(
+                    "POST",
+                    self.scenex_url,
+                    headers=self.scenex_headers,
+                    json=data,
+                    stage="describe",
+                )
+                response.raise_for_status()
+                results = response.json()["result"]
+            except Exception as e:
+                log.error(f"SceneXplain request failed: {e}")
+                return None
+
+        return self._describe_texts(results, len(image_urls))
+
+    def _describe_data(self, image_urls: list) -> dict:
+        """
+        Build the payload of a describe request.
+
+        Args:
+            image_urls (list): URLs of the images to describe.
+
+        Returns:
+            data (dict): JSON payload for SceneXplain.
+        """
+        if len(image_urls) == 1:
+            log.info(f"Sending {image_urls[0].split('/')[-1]} to SceneXplain")
+        else:
+            log.info(f"Sending {len(image_urls)} images to SceneXplain")
+
+        return {
             "data": [
                 {
                     "task_id": "alt_text",
                     "image": image_url,
                     "languages": [self.language],
                 }
+                for image_url in image_urls
             ]
         }
 
-        # implement max tries since sometimes SX has issues
-        alt_text = None
-        alt_text_tries = 0
+    def _describe_texts(self, results: list, count: int) -> list:
+        """
+        Spread the results of a describe request back out, one per image.
 
-        while (not alt_text) and (alt_text_tries < max_tries):
-            log.info(f"Sending {filename} to SceneXplain")
-            response = requests.post(
-                url=self.scenex_url, headers=self.scenex_headers, json=data
-            )
-            alt_text = response.json()["result"][0]["text"][:max_length]
-            alt_text_tries += 1
-        # except Exception as e:
-        # # console.print(e)
-        # log.error(e)
+        Args:
+            results (list): 'result' list from the SceneXplain response.
+            count (int): Number of images in the request.
 
-        return alt_text
-        # else:
-        # return
+        Returns:
+            texts (list): Description for each image, in order. None for images that failed.
+        """
+        texts = [None] * count
+        for i, result in enumerate(results[:count]):
+            if isinstance(result, dict):
+                texts[i] = result.get("text")
+
+        return texts
+
+    def _validate_images(self, image_urls: list) -> list:
+        """
+        Validate several images concurrently. Definite results are kept for the rest of the run.
+
+        Args:
+            image_urls (list): URLs of the images. Each can be 'standard' URL or a datauri.
 
-    def _validate_image(self, image_url: str):
+        Returns:
+            valid (list): Whether each image is worth describing, in the same order as image_urls. None for
+                images that couldn't be checked right now.
         """
-        Validate image URL:
-            - Check file extension is supported.
+        unchecked = list(
+            {url for url in image_urls if url not in self._validation_results}
+        )
+        if len(unchecked) > 1:
+            workers = min(VALIDATE_WORKERS, len(unchecked))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = dict(
+                    zip(unchecked, executor.map(self._validate_image, unchecked))
+                )
+        else:
+            results = {url: self._validate_image(url) for url in unchecked}
+
+        return [
+            self._validation_results.get(url, results.get(url)) for url in image_urls
+        ]
+
+    def _validate_image(self, image_url: str) -> bool:
+        """
+        Validate an image without downloading all of it:
             - Check that URL resolves.
+            - Check the format from the Content-Type and magic bytes.
+            - Check the file size and the dimensions in the image header.
+
+        Only definite answers are kept. Network errors and server errors may go away, so those images are
+        checked again the next time they come up.
 
         Args:
-            image_url (str): The URL of the image.
+            image_url (str): The URL of the image. Can be 'standard' URL or a datauri.
+
+        Returns:
+            valid (bool): Whether the image is worth describing, or None if it couldn't be checked right now.
         """
-        supported_formats = ["gif", "jpeg", "jpg", "png", "webp"]
-        if not image_url.startswith("data"):
-            filename = image_url.split("/")[-1]
-            file_ext = filename.split(".")[-1].lower()
-            if file_ext not in supported_formats:
-                log.warn(f"{filename} is not in supported format.")
-                return False
+        if image_url in self._validation_results:
+            return self._validation_results[image_url]
 
-            response = requests.get(image_url)
-            status_code = response.status_code
-            if status_code != 200:
-                log.warn(
-                    f"{filename} could not be downloaded. Status code {status_code}"
-                )
-                return False
+        filename = (
+            "datauri" if image_url.startswith("data") else image_url.split("/")[-1]
+        )
+        try:
+            reason = self._probe_image(image_url)
+        except Exception as e:
+            log.warn(f"Could not check {filename}, will try again later: {e}")
+            return None
+
+        if reason:
+            log.warn(f"Skipping {filename}: {reason}")
+
+        self._validation_results[image_url] = reason is None
+        return reason is None
+
+    def _probe_image(self, image_url: str):
+        """
+        Fetch the start of an image with a ranged GET and check it.
+
+        Args:
+            image_url (str): The URL of the image. Can be 'standard' URL or a datauri.
+
+        Returns:
+            reason (str): Why the image should be skipped, or None if it looks fine.
 
-        return True
+        Raises:
+            requests.HTTPError: If the server is throttling or failing, so the image can't be checked right now.
+        """
+        if image_url.startswith("data"):
+            return _probe_data_uri(image_url)
+
+        response = self._request(
+            "GET",
+            image_url,
+            headers={"Range": f"bytes=0-{PROBE_BYTES - 1}"},
+            stream=True,
+            stage="validate",
+        )
+        with response:
+            if _is_temporary_error(response.status_code):
+                response.raise_for_status()
+            if response.status_code not in [200, 206]:
+                return f"status code {response.status_code}"
+
+            # servers that ignore the range send the whole file, so stop reading after the probe
+            head = b""
+            for chunk in response.iter_content(PROBE_BYTES):
+                head += chunk
+                if len(head) >= PROBE_BYTES:
+                    break
+
+            return rejection_reason(
+                head,
+                response.headers.get("Content-Type"),
+                size=_response_size(response.status_code, response.headers),
+            )
+
+
+def _probe_data_uri(image_url: str):
+    """
+    Check the image in a datauri, decoding only its start.
+    """
+    header, data = image_url.split(",", 1)
+    # base64 encodes 3 bytes in 4 characters, and whole quanta decode on their own
+    head = base64.b64decode(data[: PROBE_BYTES // 3 * 4])
+    content_type = header[len("data:") :].split(";")[0]
+    return rejection_reason(head, content_type, size=len(data) * 3 // 4)
+
+
+def _is_temporary_error(status_code: int) -> bool:
+    """
+    Whether a status code says the request may work later: throttled or a server error.
+    """
+    return status_code == 429 or status_code >= 500
+
+
+def _is_unsent_error(error: requests.RequestException) -> bool:
+    """
+    Whether a failed request never reached the server, because no connection could be made.
+    """
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(error, requests.ConnectTimeout) or isinstance(
+        reason, NewConnectionError
+    )
+
+
+def _response_size(status_code: int, headers) -> int:
+    """
+    Full size of a response body, from Content-Range for partial responses or Content-Length otherwise.
+    """
+    if status_code == 206:
+        total = headers.get("Content-Range", "").split("/")[-1]
+    else:
+        total = headers.get("Content-Length", "")
+
+    return int(total) if total.isdigit() else None
+
+
+def _content_length(headers):
+    """
+    Size of a response body from its Content-Length header, or None if it isn't given.
+    """
+    length = headers.get("Content-Length", "")
+    return int(length) if length.isdigit() else None
+
+
+# A platform's content tagger: lists its items, and finds, describes and writes their missing alt texts
+class Tagger(AltTexter, ABC):
+    write_batch_size = 1  # items written per platform request
+    # listing arguments for runs that sort all items before processing them
+    sort_list_kwargs = {}
+    # listing arguments per priority key the platform can list items by itself, newest first
+    recency_list_kwargs = {}
+
+    @abstractmethod
+    def iter_missing_alts(self, modified_since: datetime = None):
+        """
+        List the images each content item would need alt texts for, without generating or writing anything.
+        Items finished according to the checkpoint journal are left out.
+
+        Args:
+            modified_since (datetime): Only list items modified after this time.
+
+        Yields:
+            (item_id, image_urls): ID of the item, and URLs of its images without alt text.
+        """
+
+    def run_pipeline(
+        self,
+        modified_since: datetime = None,
+        workers: dict = None,
+        queue_size: int = None,
+        scheduler: FairScheduler = None,
+        priority: Priority = None,
+        budget: Budget = None,
+        **list_kwargs,
+    ):
+        """
+        Create alt texts for all content and write them to the platform, as a pipeline: listing, fetching,
+        describing and writing each run on their own worker threads, connected by bounded queues. A slow
+        platform write doesn't hold up describing, nor the other way round, and only a few items per worker are
+        in memory at any time. Only for the synchronous taggers.
+
+        Args:
+            modified_since (datetime): Only process items modified after this time.
+            workers (dict): Worker threads per stage ('fetch', 'describe', 'write'), overriding PIPELINE_WORKERS.
+            queue_size (int): Capacity of the queue in front of each stage. By default a couple of items per worker.
+            scheduler (FairScheduler): Limits how many SceneXplain requests run at once, shared fairly with the
+                other sites using the same scheduler.
+            priority (Priority): Process the most valuable items first. If the platform can list items by the
+                first priority key, e.g. 'published', it does the ordering. Otherwise the whole listing is sorted
+                before processing starts.
+            budget (Budget): Stop describing once this many SceneXplain calls or seconds are used up. Items that
+                still need a describe call then finish as 'deferred', and are left for the next run. Items that
+                don't, e.g. because their alt texts are cached, still finish.
+            **list_kwargs: Passed on to listing, e.g. content_types for WordPress.
+
+        Yields:
+            task (Task): Each item once it's finished, on the calling thread, e.g. to show progress.
+        """
+        workers = {**PIPELINE_WORKERS, **(workers or {})}
+
+        def describe(task: Task) -> None:
+            # raised by the first describe call over budget, so items that don't need one aren't held back
+            try:
+                self._describe_task(task)
+            except BudgetExhausted:
+                task.status = "deferred"
+
+        pipeline = Pipeline(
+            [
+                Stage("fetch", self._fetch_task, workers["fetch"]),
+                Stage("describe", describe, workers["describe"]),
+                Stage(
+                    "write",
+                    self._write_tasks,
+                    workers["write"],
+                    batch_size=self.write_batch_size,
+                ),
+            ],
+            queue_size=queue_size,
+        )
+
+        order = priority.listing_order(self.recency_list_kwargs) if priority else None
+        if order is not None:
+            list_kwargs = {**self.recency_list_kwargs[order], **list_kwargs}
+        elif priority is not None:
+            list_kwargs = {**self.sort_list_kwargs, **list_kwargs}
+        tasks = self._list_tasks(modified_since=modified_since, **list_kwargs)
+        if priority is not None and order is None:
+            tasks = priority.sort(tasks)
+
+        self.budget = budget
+        self.scheduler = scheduler
+        finished = False
+        try:
+            for task in pipeline.run(tasks):
+                self.changes.forget(task.key)
+                if task.status == "deferred":
+                    # not done, so the next incremental run has to pick it up again
+                    self.high_water_mark.failed(task.modified)
+                else:
+                    self._record_item(task.key, task.status or "failed", task.modified)
+                yield task
+            finished = True
+        finally:
+            self.budget = None
+            self.scheduler = None
+            # listing failed or the caller stopped early, so items never listed may be older than finished ones
+            if not finished:
+                self.high_water_mark.stop_early()
+        log.info("All done!")
+
+    @abstractmethod
+    def _list_tasks(self, modified_since: datetime = None):
+        """
+        Pipeline stage that lists the content to process. Items finished according to the checkpoint journal
+        are left out.
+
+        Args:
+            modified_since (datetime): Only list items modified after this time.
+
+        Yields:
+            task (Task): One per content item.
+        """
+
+    def _fetch_task(self, task: Task) -> None:
+        """
+        Pipeline stage that gets the full item, if listing didn't return it already.
+        """
+        pass
+
+    @abstractmethod
+    def _describe_task(self, task: Task) -> None:
+        """
+        Pipeline stage that generates alt texts for an item. Sets task.update to what needs writing,
+        or finishes the task as 'unchanged' or 'failed'.
+        """
+
+    @abstractmethod
+    def _write_tasks(self, tasks: list) -> None:
+        """
+        Pipeline stage that writes up to write_batch_size updated items, and sets their status.
+        """
 
 
-class GhostTagger(AltTexter):
+class GhostTokenManager:
+    def __init__(
+        self,
+        ghost_api_key: str,
+        lifetime: int = GHOST_TOKEN_LIFETIME,
+        refresh_margin: int = GHOST_TOKEN_REFRESH_MARGIN,
+    ):
+        """
+        Signs Ghost Admin API tokens and hands out the same one until shortly before it expires, instead of
+        signing a new one for every request. Safe to share between threads and async tasks: the lock is only
+        held while signing, which takes microseconds.
+
+        Args:
+            ghost_api_key (str): Your Ghost Admin API key, '<id>:<hex secret>'.
+            lifetime (int): Seconds a token is valid for.
+            refresh_margin (int): Sign a new token this many seconds before the current one expires.
+        """
+        self.api_id, api_secret = ghost_api_key.split(":")
+        self._secret = bytes.fromhex(api_secret)
+        self.lifetime = lifetime
+        self.refresh_margin = refresh_margin
+        # (token, headers, refresh at) are swapped in one go, so readers never see a mix of two tokens
+        self._current = (None, None, 0.0)
+        self._lock = threading.Lock()
+
+    def token(self) -> str:
+        return self._get()[0]
+
+    def headers(self) -> dict:
+        """
+        Get request headers with a valid token.
+
+        Returns:
+            headers (dict): Authorization and Content-Type headers. Shared between callers, so don't modify them.
+        """
+        return self._get()[1]
+
+    def _get(self) -> tuple:
+        current = self._current
+        if time.time() < current[2]:
+            return current
+
+        with self._lock:
+            # another thread may have signed a new token while we waited
+            if time.time() >= self._current[2]:
+                self._current = self._sign()
+            return self._current
+
+    def _sign(self) -> tuple:
+        issued_at = int(time.time())
+        payload = {
+            "iat": issued_at,
+            "exp": issued_at + self.lifetime,
+            "aud": "/admin/",
+        }
+        token = jwt.encode(
+            payload, self._secret, algorithm="HS256", headers={"kid": self.api_id}
+        )
+        headers = {
+            "Authorization": f"Ghost {token}",
+            "Content-Type": "application/json",
+        }
+
+        return token, headers, issued_at + self.lifetime - self.refresh_margin
+
+
+class GhostTagger(Tagger):
+    platform = "ghost"
+    sort_list_kwargs = {"fields": GHOST_SORT_FIELDS}
+    recency_list_kwargs = {
+        "published": {"order": "published_at desc"},
+        "modified": {"order": "updated_at desc"},
+    }
+
     def __init__(
         self,
         url: str,
@@ -130,55 +1166,44 @@ class GhostTagger(AltTexter):
         scenex_api_key: str,
         scenex_url: str = SCENEX_URL,
         language: str = "en",
+        **kwargs,
     ):
-        super().__init__(url, scenex_api_key, scenex_url, language)
+        super().__init__(url, scenex_api_key, scenex_url, language, **kwargs)
         self.ghost_api_key = ghost_api_key
+        self.token_manager = GhostTokenManager(ghost_api_key)
         self.ghost_url = url
         self.scenex_url = scenex_url
 
-    def _get_ghost_token(self, ghost_api_key: str):
+    def _get_ghost_token(self, ghost_api_key: str = None) -> str:
         """
-        Get a Ghost token from API key
+        Get a Ghost token from API key. Tokens for the tagger's own key are cached until shortly before they expire.
 
         Args:
-            ghost_api_key (str): Your Ghost Admin API key.
+            ghost_api_key (str): Your Ghost Admin API key. Defaults to the tagger's.
 
         Returns:
             token: Resulting Ghost token.
         """
-        api_id, api_secret = ghost_api_key.split(":")
+        if ghost_api_key in [None, self.ghost_api_key]:
+            return self.token_manager.token()
 
-        payload = {
-            "iat": int(time.time()),
-            "exp": int(time.time()) + 300,
-            "aud": "/admin/",
-        }
+        return GhostTokenManager(ghost_api_key).token()
 
-        token = jwt.encode(
-            payload,
-            bytes.fromhex(api_secret),
-            algorithm="HS256",
-            headers={"kid": api_id},
-        )
-
-        return token
-
-    def _renew_headers(self, ghost_api_key: str) -> dict:
+    def _renew_headers(self, ghost_api_key: str = None) -> dict:
         """
-        Ghost tokens expire after a while. This function recreates the token and returns updated headers.
+        Ghost tokens expire after a while. This function returns headers with a token that is still valid,
+        only signing a new one when the cached one is about to expire.
 
         Args:
-            ghost_api_key (str): Your Ghost Admin API key.
+            ghost_api_key (str): Your Ghost Admin API key. Defaults to the tagger's.
 
         Returns:
-            ghost_headers (dict): Updated Ghost headers.
+            ghost_headers (dict): Ghost headers. Shared between callers, so copy them before making changes.
         """
-        ghost_headers = {
-            "Authorization": f"Ghost {self._get_ghost_token(ghost_api_key)}",
-            "Content-Type": "application/json",
-        }
+        if ghost_api_key in [None, self.ghost_api_key]:
+            return self.token_manager.headers()
 
-        return ghost_headers
+        return GhostTokenManager(ghost_api_key).headers()
 
     def _get_post_ids(
         self,
@@ -197,29 +1222,99 @@ class GhostTagger(AltTexter):
         Returns:
             post_ids (list): a list of strings, where each string is a separate post.id.
         """
-        ghost_headers = self._renew_headers(self.ghost_api_key)
+        log.info("Getting Ghost post IDs")
+        post_ids = []
+        for post in self._iter_posts(status=status, order=order, fields="id"):
+            post_ids.append(post["id"])
+            if len(post_ids) >= limit:
+                break
+
+        return post_ids
+
+    def _iter_posts(
+        self,
+        status: str = "published",
+        order: str = "published_at desc",
+        page_size: int = 100,
+        fields: str = None,
+        formats: str = None,
+        modified_since: datetime = None,
+    ):
+        """
+        Page through posts in Ghost blog, yielding each post as soon as its page arrives.
+
+        Args:
+            status (str): published/scheduled/draft.
+            order (str): ordering method to use, followed by 'asc' (ascending) or 'desc' (descending).
+            page_size (int): number of posts to request per page.
+            fields (str): comma-separated post fields to return, e.g. 'id'. If unset, return all fields.
+            formats (str): body formats to include, e.g. 'lexical'.
+
+        Yields:
+            post (dict): a post, in the requested order.
+        """
+        params = self._posts_params(
+            status, order, page_size, fields, formats, modified_since
+        )
 
+        page = 1
+        while page:
+            response = self._request(
+                "GET",
+                f"{self.ghost_url}/ghost/api/admin/posts/",
+                headers=self._renew_headers(self.ghost_api_key),
+                params={**params, "page": page},
+                stage="list",
+            )
+            posts, page = self._posts_page(response)
+            yield from posts
+
+    def _posts_params(
+        self,
+        status: str,
+        order: str,
+        page_size: int,
+        fields: str,
+        formats: str,
+        modified_since: datetime,
+    ) -> dict:
+        """
+        Query parameters of a post listing, without the page number. See _iter_posts.
+        """
         params = {
             "filter": f"status:{status}",
-            "limit": limit,
+            "limit": page_size,
             "order": order,
-            "fields": "id",
         }
+        if modified_since:
+            params["filter"] += f"+updated_at:>'{modified_since:%Y-%m-%d %H:%M:%S}'"
+        if fields:
+            params["fields"] = fields
+        if formats:
+            params["formats"] = formats
 
-        response = requests.get(
-            f"{self.ghost_url}/ghost/api/admin/posts/",
-            headers=ghost_headers,
-            params=params,
-        )
+        return params
 
-        log.info("Getting Ghost post IDs")
-        if response.status_code == 200:
-            posts_data = response.json()
-            post_ids = [post["id"] for post in posts_data["posts"]]
-        else:
+    def _posts_page(self, response) -> tuple:
+        """
+        Read one page of a post listing.
+
+        Args:
+            response: The listing response, from either HTTP client.
+
+        Returns:
+            (posts, next_page): The page's posts, and the number of the next page, or None if this was the last
+                one or the request failed.
+        """
+        if response.status_code != 200:
             log.error(f"Failed to retrieve posts: {response.text}")
+            return [], None
 
-        return post_ids
+        posts_data = response.json()
+        return (
+            posts_data["posts"],
+            posts_data.get("meta", {}).get("pagination", {}).get("next"),
+        )
 
     def _get_post(self, post_id: str) -> dict:
         """
@@ -234,10 +1329,16 @@ class GhostTagger(AltTexter):
         url = f"{self.ghost_url}/ghost/api/admin/posts/{post_id}"
 
         ghost_headers = self._renew_headers(self.ghost_api_key)
-        response = requests.get(
-            url, headers=ghost_headers, params={"formats": "lexical"}
+        response = self._request(
+            "GET", url, headers=ghost_headers, params={"formats": "lexical"}
         )
 
+        return self._post_from_response(response, post_id)
+
+    def _post_from_response(self, response, post_id: str) -> dict:
+        """
+        Read a post from Ghost's response, from either HTTP client. On failure, Ghost's error body is returned.
+        """
         if response.status_code == 200:
             post_data = response.json()
             post = post_data["posts"][0]
@@ -267,7 +1368,8 @@ class GhostTagger(AltTexter):
             post_ids (list): a list of strings, where each string is a separate post.id.
         """
         if not post_ids:
-            post_ids = self._get_post_ids(status, limit, order)
+            posts = self._iter_posts(status=status, order=order, formats="lexical")
+            return list(islice(posts, limit))
 
         posts = [self._get_post(post_id) for post_id in post_ids]
 
@@ -284,63 +1386,164 @@ class GhostTagger(AltTexter):
         Returns:
             response.json(): The updated post
         """
-        url = f"{self.ghost_url}ghost/api/admin/posts/{post_id}/"
+        url = f"{self.ghost_url}/ghost/api/admin/posts/{post_id}/"
         data = {"posts": [post_data]}
 
         ghost_headers = self._renew_headers(self.ghost_api_key)
         log.info("Sending updated post to Ghost")
-        response = requests.put(url, headers=ghost_headers, json=data)
+        response = self._request("PUT", url, headers=ghost_headers, json=data)
 
         return response.json()
 
-    def add_alts(self, post_id, max_tries=3) -> dict:
+    def add_alts(self, post_id=None, max_tries=3, post: dict = None) -> dict:
         """
         Add alt texts for all images in an individual Ghost post.
 
         Args:
-            post_id (str): Post ID of the post you wish to add alts for.
+            post_id (str): Post ID of the post you wish to add alts for. Ignored if post is given.
             max_tries (int): How many times to try generating an alt text before giving up.
+            post (dict): An already-fetched post. It is left untouched and a copy is updated instead.
 
         Returns:
-            post (dict): post (based on post_id arg) updated with alt texts.
+            post (dict): post (based on post_id or post arg) updated with alt texts.
         """
-        post = self._get_post(post_id)
+        if post is None:
+            post = self._get_post(post_id)
+        else:
+            post = copy.deepcopy(post)
         log.info(f"Processing {post['title']}")
 
-        # Process featured image
-        if not post["feature_image_alt"]:
-            alt_text = self.generate_alt_text(post["feature_image"])
-            if alt_text:
-                post["feature_image_alt"] = alt_text[:125]  # Ghost has hard limit here
+        lexical, image_nodes, process_feature_image = self._collect_post_images(post)
+        image_urls = [node["src"] for node in image_nodes]
+        if process_feature_image:
+            image_urls.append(post["feature_image"])
 
-        # Process post body
-        if post["lexical"]:
-            post["lexical"] = json.loads(post["lexical"])
-            self.add_alt_text_recursive(post["lexical"]["root"]["children"])
-            post["lexical"] = json.dumps(post["lexical"])
+        alt_texts = self.generate_alt_texts(image_urls, max_tries=max_tries)
+        self._apply_post_alts(post, lexical, image_nodes, alt_texts)
 
         return post
 
+    def _collect_post_images(self, post: dict) -> tuple:
+        """
+        Gather featured image and body images without alt texts, so they can go out in one batch.
+
+        Args:
+            post (dict): Ghost blog post.
+
+        Returns:
+            (lexical, image_nodes, process_feature_image): Parsed lexical body (or None), image nodes that need alt texts,
+                and whether the featured image needs one too. If so, its URL goes last in the batch.
+        """
+        # posts without images are common, and parsing them for nothing isn't free
+        has_images = post["lexical"] and '"src"' in post["lexical"]
+        lexical = json.loads(post["lexical"]) if has_images else None
+        image_nodes = (
+            self._collect_image_nodes(lexical["root"]["children"]) if lexical else []
+        )
+        process_feature_image = bool(
+            not post["feature_image_alt"] and post.get("feature_image")
+        )
+
+        return lexical, image_nodes, process_feature_image
+
+    def _apply_post_alts(
+        self, post: dict, lexical, image_nodes: list, alt_texts: list
+    ) -> None:
+        """
+        Write generated alt texts back into a post gathered with _collect_post_images.
+
+        Args:
+            post (dict): Ghost blog post to update.
+            lexical (dict): Parsed lexical body of the post, or None.
+            image_nodes (list): Image nodes that alt texts were generated for.
+            alt_texts (list): Generated alt texts. If there is one more than image_nodes, the last is for the featured image.
+        """
+        with self.metrics.timer(self.platform, "diff", site=self.site_name):
+            self.changes.start(post.get("id"))
+
+            # Process featured image
+            if len(alt_texts) > len(image_nodes):
+                alt_text = alt_texts[-1]
+                if alt_text:
+                    alt_text = alt_text[:125]  # Ghost has hard limit here
+                self._record_alt(
+                    post.get("id"),
+                    post["feature_image"],
+                    post["feature_image_alt"],
+                    alt_text,
+                )
+                if alt_text:
+                    post["feature_image_alt"] = alt_text
+
+            # Process post body. The lexical is only serialised again if an alt text was added
+            for node, alt_text in zip(image_nodes, alt_texts):
+                self._record_alt(post.get("id"), node["src"], node["alt"], alt_text)
+                node["alt"] = alt_text
+
+            if lexical and any(alt_texts[: len(image_nodes)]):
+                post["lexical"] = json.dumps(lexical)
+
     def add_alt_text_recursive(self, rows) -> None:
         """
-        Recurse through all nested structures in an individual Ghost blog post and add alt texts.
+        Add alt texts to all images in nested structures of an individual Ghost blog post, in one batch.
+        """
+        image_nodes = self._collect_image_nodes(rows)
+        alt_texts = self.generate_alt_texts([node["src"] for node in image_nodes])
+
+        for node, alt_text in zip(image_nodes, alt_texts):
+            node["alt"] = alt_text
+
+    def _collect_image_nodes(self, rows, image_nodes=None) -> list:
+        """
+        Walk all nested structures in an individual Ghost blog post in one pass and gather image nodes without alt
+        text, in document order. Covers image cards and the images of cards that hold several, like galleries.
+        The walk is iterative, so deeply nested posts can't hit the recursion limit.
+
+        Args:
+            rows (list): Lexical nodes to search.
+            image_nodes (list): Image nodes found so far.
+
+        Returns:
+            image_nodes (list): Image nodes that need an alt text. Alt texts can be set on them in place.
         """
-        for row in rows:
-            if row.get("type") == "image":
-                if "alt" not in row:  # older posts don't even have the alt field
-                    row["alt"] = None
-                if not row["alt"]:
-                    alt_text = self.generate_alt_text(row["src"])
-                    row["alt"] = alt_text
+        if image_nodes is None:
+            image_nodes = []
+
+        stack = list(reversed(rows))
+        while stack:
+            row = stack.pop()
+            if not isinstance(row, dict):
+                continue
+
+            row_type = row.get("type")
+            if row_type == "image":
+                images = [row]
+            elif row_type in GHOST_IMAGE_LIST_CARDS:
+                images = row.get(GHOST_IMAGE_LIST_CARDS[row_type]) or []
+            else:
+                images = []
+
+            for image in images:
+                if not isinstance(image, dict) or not image.get("src"):
+                    continue
+                if "alt" not in image:  # older posts don't even have the alt field
+                    image["alt"] = None
+                if not image["alt"]:
+                    image_nodes.append(image)
+
+            # Visit nested rows next, first child first
+            if isinstance(row.get("children"), list):
+                stack.extend(reversed(row["children"]))
 
-            # Recursively process nested rows
-            if "children" in row and isinstance(row["children"], list):
-                self.add_alt_text_recursive(row["children"])
+        return image_nodes
 
     def _is_post_changed(self, original_post, new_post) -> bool:
         """
         Check if post content has been updated. Checks post content and featured image.
 
+        Posts that went through add_alts are looked up in the change tracker. Others are compared field by field,
+        without parsing.
+
         Args:
             original_post (dict): Original Ghost blog post.
             new_post (dict): Updated version of Ghost blog post, relative to original.
@@ -349,9 +1552,11 @@ class GhostTagger(AltTexter):
             True if original_post and new_post are different.
             False if original_post and new_post are the same.
         """
-        if new_post["lexical"]:
-            if json.loads(original_post["lexical"]) != json.loads(new_post["lexical"]):
-                return True
+        if self.changes.is_tracked(new_post.get("id")):
+            return self.changes.is_changed(new_post.get("id"))
+
+        if new_post["lexical"] and original_post["lexical"] != new_post["lexical"]:
+            return True
 
         if new_post["feature_image_alt"]:
             if original_post["feature_image_alt"] != new_post["feature_image_alt"]:
@@ -359,22 +1564,147 @@ class GhostTagger(AltTexter):
 
         return False
 
-    def update_all(self, post_ids: list = []) -> None:
+    def update_all(
+        self, post_ids: list = [], workers: int = 1, modified_since: datetime = None
+    ) -> None:
         """
         Create alt texts for all blog posts and write to Ghost.
+
+        Args:
+            post_ids (list): IDs of posts to process. If unset, process all published posts.
+            workers (int): How many posts to process concurrently. Each post is still fetched, tagged and written in order.
+            modified_since (datetime): Only process posts updated after this time.
         """
-        if not post_ids:
-            post_ids = self._get_post_ids()
+        if post_ids:
+            tasks = ((post_id, None) for post_id in post_ids)
+        else:
+            # list full posts page by page, so there's no separate fetch per post
+            posts = self._iter_posts(formats="lexical", modified_since=modified_since)
+            tasks = ((post["id"], post) for post in posts)
+
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                in_flight = set()
+                for post_id, post in tasks:
+                    # keep memory flat by only queueing a couple of posts per worker
+                    if len(in_flight) >= workers * 2:
+                        done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                        self._log_failures(done)
+                    in_flight.add(
+                        executor.submit(self._update_post_alts, post_id, post)
+                    )
+                self._log_failures(wait(in_flight).done)
+        else:
+            for post_id, post in tasks:
+                self._update_post_alts(post_id, post)
+        log.info("All done!")
+
+    def _list_tasks(
+        self,
+        modified_since: datetime = None,
+        post_ids: list = [],
+        fields: str = None,
+        order: str = "published_at desc",
+    ):
+        if post_ids:
+            # only IDs are known, so the fetch stage gets the posts
+            for post_id in post_ids:
+                if not self._is_done(post_id):
+                    yield Task(post_id)
+            return
+
+        # with fields, only a summary of each post is listed, and the fetch stage gets the body
+        formats = None if fields else "lexical"
+        posts = self._iter_posts(
+            order=order, fields=fields, formats=formats, modified_since=modified_since
+        )
+        for post in posts:
+            if not self._is_done(post["id"]):
+                yield Task(post["id"], post, post["title"], post.get("updated_at"))
+
+    def _fetch_task(self, task: Task) -> None:
+        if task.item is None or "lexical" not in task.item:
+            task.item = self._get_post(task.key)
+            task.title = task.item["title"]
+            task.modified = task.item.get("updated_at")
+
+    def _describe_task(self, task: Task) -> None:
+        post = self.add_alts(post=task.item)
+        if self._is_post_changed(task.item, post):
+            task.update = post
+        else:
+            task.status = self._item_status(task.key)
+
+    def _write_tasks(self, tasks: list) -> None:
+        for task in tasks:
+            response = self.update_post(post_id=task.key, post_data=task.update)
+            task.status = self._item_status(task.key, "posts" in response)
+
+    def iter_missing_alts(self, modified_since: datetime = None):
+        posts = self._iter_posts(formats="lexical", modified_since=modified_since)
+        for post in posts:
+            if self._is_done(post["id"]):
+                continue
+
+            _, image_nodes, process_feature_image = self._collect_post_images(post)
+            image_urls = [node["src"] for node in image_nodes]
+            if process_feature_image:
+                image_urls.append(post["feature_image"])
+
+            yield post["id"], image_urls
+
+    def _update_post_alts(self, post_id: str, post: dict = None) -> None:
+        """
+        Fetch, add alt texts to, and write back an individual Ghost blog post.
 
-        for post_id in post_ids:
-            original_post = self._get_post(post_id)
-            updated_post = self.add_alts(post_id)
+        Args:
+            post_id (str): Post ID of the post you wish to process.
+            post (dict): The already-fetched post, if available.
+        """
+        if self._is_done(post_id):
+            return
+
+        original_post = post
+        try:
+            original_post = original_post or self._get_post(post_id)
+            modified = original_post.get("updated_at")
+            updated_post = self.add_alts(post=original_post)
             if self._is_post_changed(original_post, updated_post):
-                self.update_post(post_id=post_id, post_data=updated_post)
-        log.info("All done!")
+                response = self.update_post(post_id=post_id, post_data=updated_post)
+                status = self._item_status(post_id, "posts" in response)
+            else:
+                status = self._item_status(post_id)
+            self._record_item(post_id, status, modified)
+        except Exception:
+            self._record_item(
+                post_id, "failed", (original_post or {}).get("updated_at")
+            )
+            raise
+        finally:
+            self.changes.forget(post_id)
 
+    def _log_failures(self, futures) -> None:
+        """
+        Log any exceptions raised by finished post updates.
+
+        Args:
+            futures: Finished futures from the thread pool.
+        """
+        for future in futures:
+            try:
+                future.result()
+            except Exception as e:
+                log.error(f"Failed to process post: {e}")
+
+
+class WordPressTagger(Tagger):
+    platform = "wordpress"
+    sort_list_kwargs = {"fields": WP_SORT_FIELDS}
+    recency_list_kwargs = {
+        "published": {"orderby": "date"},
+        "modified": {"orderby": "modified"},
+    }
 
-class WordPressTagger(AltTexter):
     def __init__(
         self,
         wordpress_url: str,
@@ -383,8 +1713,9 @@ class WordPressTagger(AltTexter):
         scenex_api_key: str,
         scenex_url: str = SCENEX_URL,
         language: str = "en",
+        **kwargs,
     ):
-        super().__init__(wordpress_url, scenex_api_key, scenex_url, language)
+        super().__init__(wordpress_url, scenex_api_key, scenex_url, language, **kwargs)
         self.full_url = f"{self.url}/wp-json/wp/v2/"
         self.scenex_url = scenex_url
         self.wordpress_username = wordpress_username
@@ -392,43 +1723,158 @@ class WordPressTagger(AltTexter):
         self.basic_types = ["post", "page"]  # basic content types, e.g. page, product
 
     def _get_items(
-        self, content_types: str = ["posts"], limit: int = 100, status: str = "publish"
+        self,
+        content_types: str = ["posts"],
+        limit: int = 100,
+        status: str = "publish",
+        modified_since: datetime = None,
     ) -> list:
         """
         Get posts or pages
+
+        Args:
+            content_types (list): WordPress content types to get, e.g. 'posts', 'pages', 'media'.
+            limit (int): maximum number of items to get.
+            status (str): publish/future/draft/pending/private. Not used for media.
+            modified_since (datetime): Only get items modified after this time.
         """
-        items_per_page = 100
-        all_items = []
+        items = self._iter_items(
+            content_types=content_types, status=status, modified_since=modified_since
+        )
+
+        return list(islice(items, limit))
+
+    def _iter_items(
+        self,
+        content_types: list = ["posts"],
+        status: str = "publish",
+        modified_since: datetime = None,
+        fields: str = WP_ITEM_FIELDS,
+        workers: int = 4,
+        orderby: str = None,
+    ):
+        """
+        Stream posts, pages or media. The first page tells us how many pages there are,
+        then the rest are fetched concurrently and yielded in order as they arrive.
+
+        Args:
+            content_types (list): WordPress content types to get, e.g. 'posts', 'pages', 'media'.
+            status (str): publish/future/draft/pending/private. Not used for media.
+            modified_since (datetime): Only get items modified after this time.
+            fields (str): comma-separated fields to return. If unset, return all fields.
+            workers (int): How many pages to fetch at once, per content type.
+            orderby (str): 'date' or 'modified' to get items newest first, across all content types.
+                If unset, content types are listed one after the other.
+
+        Yields:
+            item (dict): a content item.
+        """
+        listings = []
         for content_type in content_types:
-            url = f"{self.url}/wp-json/wp/v2/{content_type}"
-
-            page = 1
-            log.info(f"Getting WordPress {content_type}")
-            while len(all_items) < limit:
-                params = {
-                    "per_page": items_per_page,
-                    "page": page,
-                }
+            params = self._list_params(
+                content_type, status, modified_since, fields, orderby
+            )
+            listings.append(self._iter_content_type(content_type, params, workers))
 
-                if content_type != "media":
-                    params["status"] = status
-
-                response = requests.get(url, params=params)
-                if response.status_code == 200:
-                    items = response.json()
-                    if not items:
-                        break  # No more posts available
-                    all_items.extend(items)
-                    if len(items) < items_per_page:
-                        break  # This is the last page of items
-                    page += 1
-                else:
-                    log.error(
-                        f"Failed to retrieve WordPress {content_type}, Status Code: {response.status_code}"
+        if orderby:
+            field = WP_ORDER_FIELDS[orderby]
+            yield from heapq.merge(
+                *listings, key=lambda item: item.get(field) or "", reverse=True
+            )
+        else:
+            for listing in listings:
+                yield from listing
+
+    def _list_params(
+        self,
+        content_type: str,
+        status: str,
+        modified_since: datetime,
+        fields: str,
+        orderby: str = None,
+    ) -> dict:
+        """
+        Query parameters of a content type's listing, without the page number. See _iter_items.
+        """
+        params = {"per_page": WP_ITEMS_PER_PAGE}
+
+        if content_type != "media":
+            params["status"] = status
+        if modified_since:
+            params["modified_after"] = modified_since.isoformat()
+        if fields:
+            params["_fields"] = fields
+        if orderby:
+            params["orderby"] = orderby
+            params["order"] = "desc"
+
+        return params
+
+    def _iter_content_type(self, content_type: str, params: dict, workers: int):
+        """
+        Stream one WordPress content type, see _iter_items.
+
+        Args:
+            content_type (str): WordPress content type, e.g. 'posts'.
+            params (dict): Listing query parameters, without the page number.
+            workers (int): How many pages to fetch at once.
+
+        Yields:
+            item (dict): a content item.
+        """
+        url = f"{self.url}/wp-json/wp/v2/{content_type}"
+        log.info(f"Getting WordPress {content_type}")
+        response = self._get_items_page(url, params, 1)
+        if response is None:
+            return
+
+        yield from response.json()
+        total_pages = int(response.headers.get("X-WP-TotalPages", 1))
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pages = iter(range(2, total_pages + 1))
+            in_flight = deque(
+                executor.submit(self._get_items_page, url, params, page)
+                for page in islice(pages, workers)
+            )
+            while in_flight:
+                response = in_flight.popleft().result()
+                page = next(pages, None)
+                if page is not None:
+                    in_flight.append(
+                        executor.submit(self._get_items_page, url, params, page)
                     )
-                    break
+                if response is not None:
+                    yield from response.json()
 
-        return all_items[:limit]
+    def _get_items_page(self, url: str, params: dict, page: int):
+        """
+        Get one page of a WordPress listing.
+
+        Args:
+            url (str): Listing endpoint, e.g. '<site>/wp-json/wp/v2/posts'.
+            params (dict): Listing query parameters, without the page number.
+            page (int): Page number, starting at 1.
+
+        Returns:
+            response (requests.Response): The response, or None if the page couldn't be retrieved.
+        """
+        response = self._request(
+            "GET", url, params={**params, "page": page}, stage="list"
+        )
+        return self._checked_page(response, url, page)
+
+    def _checked_page(self, response, url: str, page: int):
+        """
+        The response for a listing page, from either HTTP client, or None if it failed.
+        """
+        if response.status_code != 200:
+            log.error(
+                f"Failed to retrieve WordPress page {page} of {url}, Status Code: {response.status_code}"
+            )
+            return None
+
+        return response
 
     def get_item(self, item_type: str, item_id: str):
         """
@@ -439,40 +1885,95 @@ class WordPressTagger(AltTexter):
             item_id (str): object id.
         """
         item_url = f"{self.full_url}{item_type}/{item_id}"
-        response = requests.get(
+        response = self._request(
+            "GET",
             item_url,
             auth=HTTPBasicAuth(self.wordpress_username, self.wordpress_password),
         )
+        return self._item_from_response(response, item_type, item_id)
+
+    def _item_from_response(self, response, item_type: str, item_id: str):
+        """
+        Read a content object from WordPress's response, from either HTTP client, or None if it failed.
+        """
         if response.status_code == 200:
             item = response.json()
             return item
         else:
-            logging.warn(
+            log.warn(
                 f"Failed to retrieve {item_type} with ID {item_id}, Status Code: {response.status_code}"
             )
 
-    def add_alts(self, content_object):
+    def add_alts(self, content_object):
+        """
+        Add alt texts for content item.
+
+        Args:
+            content_object: WordPress object, like post, page, media
+        """
+        log.info(f"Processing {content_object['title']['rendered']}")
+        item_key = self._item_key(content_object)
+        self.changes.start(item_key)
+
+        missing_alts = self._missing_alt_images(content_object)
+        alt_texts = self.generate_alt_texts([img["src"] for img in missing_alts])
+        # updated_object = self.add_media_alt(content_object)
+
+        return self._set_item_alts(content_object, missing_alts, alt_texts)
+
+    def _missing_alt_images(self, content_object: dict) -> list:
+        """
+        Find the images of a content item that need alt text. Both planning and processing a run go by this.
+
+        Args:
+            content_object: WordPress object, like post, page, media
+
+        Returns:
+            missing_alts (list): For posts and pages, img tags from HTMLHelper._find_images_without_alt. For media,
+                the attachment's own image as {"src", "alt"}, unless it already has alt text.
         """
-        Add alt texts for content item.
+        if content_object["type"] in self.basic_types:
+            html = content_object["content"]["rendered"]
+            return HTMLHelper._find_images_without_alt(self, html)
+
+        if content_object["type"] == "attachment" and not content_object.get(
+            "alt_text"
+        ):
+            return [
+                {"src": content_object["source_url"], "alt": content_object["alt_text"]}
+            ]
+
+        return []
+
+    def _set_item_alts(
+        self, content_object: dict, missing_alts: list, alt_texts: list
+    ) -> dict:
+        """
+        Build the update of a content item from the alt texts generated for its images.
 
         Args:
             content_object: WordPress object, like post, page, media
+            missing_alts (list): Images from _missing_alt_images.
+            alt_texts (list): Generated alt text for each image.
+
+        Returns:
+            updated_object (dict): The item's id and type, and its new content or alt text.
         """
-        log.info(f"Processing {content_object['title']['rendered']}")
         updated_object = {"id": content_object["id"], "type": content_object["type"]}
+        item_key = self._item_key(content_object)
 
         if content_object["type"] in self.basic_types:
             html = content_object["content"]["rendered"]
-
-            new_html = HTMLHelper._process_html(self, html=html)
-            # content_object["content"]["rendered"] = new_html
+            new_html = HTMLHelper._set_alts(
+                self, html, missing_alts, alt_texts, changes_key=item_key
+            )
             updated_object["content"] = new_html.strip()
 
-        elif content_object["type"] == "attachment":
-            media_url = content_object["source_url"]
-            # media_url = "https://cdn.vox-cdn.com/thumbor/xYSUaNbrtoz-HUrW5CIStGurgWk=/0x0:4987x3740/1200x800/filters:focal(0x0:4987x3740)/cdn.vox-cdn.com/uploads/chorus_image/image/45503430/453801468.0.0.jpg"
-            updated_object["alt_text"] = self.generate_alt_text(media_url)
-            # updated_object = self.add_media_alt(content_object)
+        # attachments that already have alt text have no missing image, so they aren't described or written again
+        elif missing_alts:
+            img, alt_text = missing_alts[0], alt_texts[0]
+            updated_object["alt_text"] = alt_text
+            self._record_alt(item_key, img["src"], img["alt"], alt_text)
 
         return updated_object
 
@@ -504,6 +2005,32 @@ class WordPressTagger(AltTexter):
         """
         # console.print(content_object)
 
+        url, new_content = self._update_request(content_object)
+
+        # content_json = json.dumps(new_content)
+        # content_json = {"content": content_object["content"]}
+
+        log.info(f"Updating content item {content_object['id']}")
+
+        update_response = self._request(
+            "POST",
+            url,
+            auth=HTTPBasicAuth(self.wordpress_username, self.wordpress_password),
+            json=new_content,
+        )
+
+        return update_response
+
+    def _update_request(self, content_object: dict) -> tuple:
+        """
+        Where and what to send to write a content object's alt texts back.
+
+        Args:
+            content_object (dict): The updated post, page or media item.
+
+        Returns:
+            (url, new_content): Endpoint of the item, and the JSON body that updates it.
+        """
         content_id = content_object["id"]
         content_type = content_object["type"]
 
@@ -511,26 +2038,122 @@ class WordPressTagger(AltTexter):
             content_string = content_type + "s"
             new_content = {"content": content_object["content"]}
         elif content_type == "attachment":
-            pass
             new_content = {"alt_text": content_object["alt_text"]}
             content_string = "media"
 
-        url = f"{self.full_url}{content_string}/{content_id}"
+        return f"{self.full_url}{content_string}/{content_id}", new_content
 
-        # content_json = json.dumps(new_content)
-        # content_json = {"content": content_object["content"]}
+    def update_all(
+        self,
+        content_types: list = ["posts", "media", "pages"],
+        limit: int = 10_000,
+        modified_since: datetime = None,
+    ) -> None:
+        """
+        Create alt texts for all content items and write to WordPress.
+
+        Args:
+            content_types (list): WordPress content types to process, e.g. 'posts', 'pages', 'media'.
+            limit (int): maximum number of items to process. If there are more, the high-water mark isn't moved.
+            modified_since (datetime): Only process items modified after this time.
+        """
+        items = self._iter_items(
+            content_types=content_types, modified_since=modified_since
+        )
 
-        log.info(f"Updating content item {content_id}")
+        for item in islice(items, limit):
+            item_id = self._item_key(item)
+            if self._is_done(item_id):
+                continue
 
-        update_response = requests.post(
-            url,
-            auth=HTTPBasicAuth(self.wordpress_username, self.wordpress_password),
-            json=new_content,
+            updated_object = self.add_alts(content_object=item)
+            if self.changes.is_changed(item_id):
+                response = self.update_item(updated_object)
+                status = self._item_status(item_id, response.ok)
+            else:
+                log.info("Skipping item. Nothing to update")
+                status = self._item_status(item_id)
+            self.changes.forget(item_id)
+            self._record_item(item_id, status, item.get("modified_gmt"))
+
+        if next(items, None) is not None:
+            log.warn(f"Stopped after {limit} items")
+            self.high_water_mark.stop_early()
+        log.info("All done!")
+
+    def _list_tasks(
+        self,
+        modified_since: datetime = None,
+        content_types: list = ["posts", "media", "pages"],
+        fields: str = WP_ITEM_FIELDS,
+        orderby: str = None,
+    ):
+        items = self._iter_items(
+            content_types, modified_since=modified_since, fields=fields, orderby=orderby
         )
+        for item in items:
+            item_id = self._item_key(item)
+            if not self._is_done(item_id):
+                title = item["title"]["rendered"]
+                yield Task(item_id, item, title, item.get("modified_gmt"))
+
+    def _fetch_task(self, task: Task) -> None:
+        # with summary fields, neither a body nor an image URL was listed
+        if "content" in task.item or "source_url" in task.item:
+            return
+
+        item_type = task.item["type"]
+        endpoint = "media" if item_type == "attachment" else f"{item_type}s"
+        item = self.get_item(endpoint, task.item["id"])
+        if item is None:
+            task.status = "failed"
+        else:
+            task.item = item
 
-        return update_response
+    def _describe_task(self, task: Task) -> None:
+        updated_object = self.add_alts(content_object=task.item)
+        if self.changes.is_changed(task.key):
+            task.update = updated_object
+        else:
+            task.status = self._item_status(task.key)
+
+    def _write_tasks(self, tasks: list) -> None:
+        for task in tasks:
+            response = self.update_item(task.update)
+            task.status = self._item_status(task.key, response.ok)
+
+    def iter_missing_alts(
+        self,
+        modified_since: datetime = None,
+        content_types: list = ["posts", "media", "pages"],
+    ):
+        items = self._iter_items(content_types, modified_since=modified_since)
+        for item in items:
+            item_id = self._item_key(item)
+            if self._is_done(item_id):
+                continue
+
+            if item["type"] in self.basic_types + ["attachment"]:
+                missing_alts = self._missing_alt_images(item)
+                yield item_id, [img["src"] for img in missing_alts]
+
+    def _item_key(self, item: dict) -> str:
+        """
+        Key that identifies a content item across content types, whose IDs can overlap.
+
+        Args:
+            item (dict): WordPress object, like post, page, media.
+
+        Returns:
+            key (str): '<type>:<id>'.
+        """
+        return f"{item['type']}:{item['id']}"
 
     def _is_item_changed(self, original_item, new_item):
+        item_key = self._item_key(new_item)
+        if self.changes.is_tracked(item_key):
+            return self.changes.is_changed(item_key)
+
         original_html = str(original_item["content"]["rendered"])
         new_html = str(new_item["content"]["rendered"])
 
@@ -541,48 +2164,68 @@ class WordPressTagger(AltTexter):
         return html_changed
 
 
-class HTMLHelper(AltTexter):
-    from difflib import unified_diff
-
-    def __init__(self):
-        super().__init__()
-
-    def _process_html(self, html: str):
+# HTML handling shared by the taggers whose content is HTML. Its methods are called with the tagger as self
+class HTMLHelper:
+    def _process_html(self, html: str, changes_key=None):
         """
         Find all images in HTML string, and add alt text if it doesn't exist.
 
         Args:
             html (str): HTML string
+            changes_key: ID of the item the HTML belongs to, to record changed alts under in the change tracker.
+        """
+        missing_alts = HTMLHelper._find_images_without_alt(self, html)
+
+        alt_texts = self.generate_alt_texts([img["src"] for img in missing_alts])
+
+        return HTMLHelper._set_alts(self, html, missing_alts, alt_texts, changes_key)
+
+    def _find_images_without_alt(self, html: str) -> list:
         """
-        soup = BeautifulSoup(html, "html.parser")
+        Tokenize an HTML string and find all images that don't have alt text.
 
-        img_tags = soup.find_all("img")
+        Args:
+            html (str): HTML string
 
-        for img in img_tags:
+        Returns:
+            missing_alts (list): img tags without alt text, with their position in html. See htmlrewrite.find_images.
+        """
+        missing_alts = []
+        for img in find_images(html):
+            if not img["src"]:
+                continue
             if not img["alt"]:
-                img["alt"] = self.generate_alt_text(img["src"])
+                missing_alts.append(img)
             else:
                 log.info(f"{img['src']} already has alt text. Skipping")
 
-        return str(soup)
+        return missing_alts
 
-    def _get_html_with_alt(self, doc):
+    def _set_alts(
+        self, html: str, missing_alts: list, alt_texts: list, changes_key=None
+    ) -> str:
         """
-        Extract HTML and keep alt texts and overall structure (i.e. parameter ordering, etc). Helps run a meaningful diff on multiple HTML strings
+        Splice generated alt texts into an HTML string, leaving the rest of the markup untouched.
+
+        Args:
+            html (str): HTML string
+            missing_alts (list): img tags from _find_images_without_alt.
+            alt_texts (list): Generated alt text for each img tag.
+            changes_key: ID of the item the HTML belongs to, to record changed alts under in the change tracker.
+
+        Returns:
+            html (str): The updated HTML string.
         """
-        html = tostring(doc, pretty_print=True).decode()
-        for element in doc.iter():
-            if "alt" in element.attrib:
-                alt_text = f" [alt: {element.attrib['alt']}]"
-                html = html.replace(
-                    tostring(element, with_tail=False).decode(),
-                    tostring(element, with_tail=False).decode() + alt_text,
-                )
-        return html
+        with self.metrics.timer(self.platform, "diff", site=self.site_name):
+            for img, alt_text in zip(missing_alts, alt_texts):
+                self._record_alt(changes_key, img["src"], img["alt"], alt_text)
+
+            return set_alts(html, missing_alts, alt_texts)
 
     def _is_html_changed(self, original_html, new_html) -> bool:
         """
-        Check if HTML has been changed.
+        Check if HTML has been changed. Adding alts leaves everything but alt attributes byte-identical, so a string
+        comparison is enough. For what changed, ask the change tracker for a diff.
 
         Args:
             original_item (str): Original HTML.
@@ -592,28 +2235,14 @@ class HTMLHelper(AltTexter):
             True if original_item and new_item are different.
             False if original_item and new_item are the same.
         """
-        original_doc = fromstring(original_html)
-        new_doc = fromstring(new_html)
-
-        original_html_with_alt = HTMLHelper._get_html_with_alt(self, original_doc)
-        new_html_with_alt = HTMLHelper._get_html_with_alt(self, new_doc)
+        return original_html.strip() != new_html.strip()
 
-        console.print(original_html_with_alt)
-        console.print(new_html_with_alt)
 
-        diff_lines = list(
-            unified_diff(
-                original_html_with_alt.splitlines(),
-                new_html_with_alt.splitlines(),
-                lineterm="",
-                fromfile="original",
-                tofile="new",
-            )
-        )
-        return len(diff_lines) > 0
+class WooCommerceTagger(Tagger):
+    platform = "woocommerce"
+    write_batch_size = WC_BATCH_SIZE
+    recency_list_kwargs = {"published": {"orderby": "date"}}
 
-
-class WooCommerceTagger(AltTexter):
     def __init__(
         self,
         url: str,
@@ -621,23 +2250,66 @@ class WooCommerceTagger(AltTexter):
         woocommerce_consumer_secret: str,
         scenex_api_key: str,
         scenex_url: str = SCENEX_URL,
+        **kwargs,
     ):
+        super().__init__(
+            url, scenex_url=scenex_url, scenex_api_key=scenex_api_key, **kwargs
+        )
+        # the WooCommerce client manages its own connections, so only the timeout applies
         self.wcapi = API(
             url=url,
             consumer_key=woocommerce_consumer_key,
             consumer_secret=woocommerce_consumer_secret,
             version="wc/v3",
+            timeout=self.timeout,
         )
-        super().__init__(self, scenex_url=scenex_url, scenex_api_key=scenex_api_key)
 
-    def get_products(self):
+    def get_products(self, modified_since: datetime = None):
         """
         Get list of all WooCommerce products.
+
+        Args:
+            modified_since (datetime): Only get products modified after this time.
+        """
+        return list(self._iter_products(modified_since=modified_since))
+
+    def _iter_products(self, modified_since: datetime = None, orderby: str = None):
+        """
+        Stream all WooCommerce products, page by page.
+
+        Args:
+            modified_since (datetime): Only get products modified after this time.
+            orderby (str): Product field to list by, newest or highest first, e.g. 'date'.
+
+        Yields:
+            product (dict): A product.
         """
         log.info("Getting WooCommerce products")
-        products = self.wcapi.get("products").json()
+        params = {"per_page": WP_ITEMS_PER_PAGE}
+        if modified_since:
+            params["modified_after"] = modified_since.isoformat()
+            params["dates_are_gmt"] = True
+        if orderby:
+            params["orderby"] = orderby
+            params["order"] = "desc"
+
+        page, total_pages = 1, 1
+        while page <= total_pages:
+            page_params = {**params, "page": page}
+            response = self._send(
+                self.wcapi.url,
+                lambda: self.wcapi.get("products", params=page_params),
+                stage="list",
+            )
+            if not response.ok:
+                log.error(
+                    f"Failed to fetch products page {page}. Status code: {response.status_code}"
+                )
+                return
 
-        return products
+            total_pages = int(response.headers.get("X-WP-TotalPages", 1))
+            yield from response.json()
+            page += 1
 
     def add_alts(self, product):
         """
@@ -652,28 +2324,28 @@ class WooCommerceTagger(AltTexter):
         output = {}
         if product.get("name"):
             log.info(f"Processing {product['name']}")
+        self.changes.start(product.get("id"))
 
         # product gallery images
         if product.get("images"):
-            image_list = []
-            counter = 0  # count how many images we've processed. If above zero, put data in output
-            # output['images'] = []
-
-            for i, image in enumerate(product["images"], start=1):
-                src = image["src"]
+            missing_alts = [image for image in product["images"] if not image["alt"]]
 
-                if not image["alt"]:
-                    log.info(
-                        f"Sending image {i}/{len(product['images'])} to SceneXplain"
+            if missing_alts:
+                log.info(
+                    f"Sending {len(missing_alts)}/{len(product['images'])} images to SceneXplain"
+                )
+                alt_texts = self.generate_alt_texts(
+                    [image["src"] for image in missing_alts]
+                )
+                for image, alt_text in zip(missing_alts, alt_texts):
+                    self._record_alt(
+                        product.get("id"), image["src"], image["alt"], alt_text
                     )
-                    image["alt"] = self.generate_alt_text(src)
-                    counter += 1
-                    # processed_image_list.append(image)
-
-                image_list.append(image)
+                    if alt_text:
+                        image["alt"] = alt_text
 
-            if counter > 0:
-                output["images"] = image_list
+                if self.changes.is_changed(product.get("id")):
+                    output["images"] = product["images"]
 
         output["id"] = product.get("id")
 
@@ -695,20 +2367,111 @@ class WooCommerceTagger(AltTexter):
             updated_product (dict): Product dict with all populated fields
         """
         url_string = f"products/{product['id']}"
-        updated_product = self.wcapi.put(url_string, product)
+        updated_product = self._send(
+            self.wcapi.url, lambda: self.wcapi.put(url_string, product), stage="write"
+        )
 
         return updated_product
 
-    def update_products(self, products: list = []):
+    def update_products_batch(self, products: list) -> dict:
+        """
+        Update up to WC_BATCH_SIZE WooCommerce products in one request.
+
+        Args:
+            products (list): dicts where keys are names of fields to update and values are data.
+
+        Returns:
+            results (dict): Whether the update succeeded, per product ID.
+        """
+        log.info(f"Updating {len(products)} products")
+        response = self._send(
+            self.wcapi.url,
+            lambda: self.wcapi.post("products/batch", {"update": products}),
+            stage="write",
+            idempotent=False,
+        )
+        if not response.ok:
+            log.error(
+                f"Failed to update products. Status code: {response.status_code}, Response: {response.text}"
+            )
+            return {product["id"]: False for product in products}
+
+        results = {}
+        for result in response.json().get("update", []):
+            if "error" in result:
+                log.error(
+                    f"Failed to update product {result['id']}: {result['error'].get('message')}"
+                )
+            results[result["id"]] = "error" not in result
+
+        return {
+            product["id"]: results.get(product["id"], False) for product in products
+        }
+
+    def _update_batch(self, batch: list, modified: dict) -> None:
+        results = self.update_products_batch(batch)
+        for product_id, ok in results.items():
+            status = self._item_status(product_id, ok)
+            self._record_item(product_id, status, modified.pop(product_id))
+            self.changes.forget(product_id)
+
+    def update_products(self, products: list = [], modified_since: datetime = None):
         if not products:
-            products = self.get_products()
+            products = self._iter_products(modified_since=modified_since)
 
+        batch, modified = [], {}
         for product in products:
+            if self._is_done(product["id"]):
+                continue
+
             updated_product = self.add_alts(product)
-            self.update_product(updated_product)
+            if "images" not in updated_product:
+                log.info("Skipping product. Nothing to update")
+                status = self._item_status(product["id"])
+                self._record_item(
+                    product["id"], status, product.get("date_modified_gmt")
+                )
+                self.changes.forget(product["id"])
+                continue
+
+            batch.append(updated_product)
+            modified[product["id"]] = product.get("date_modified_gmt")
+            if len(batch) >= WC_BATCH_SIZE:
+                self._update_batch(batch, modified)
+                batch = []
+
+        if batch:
+            self._update_batch(batch, modified)
 
         log.info("All done")
 
+    def _list_tasks(self, modified_since: datetime = None, orderby: str = None):
+        products = self._iter_products(modified_since=modified_since, orderby=orderby)
+        for product in products:
+            if not self._is_done(product["id"]):
+                modified = product.get("date_modified_gmt")
+                yield Task(product["id"], product, product.get("name"), modified)
+
+    def _describe_task(self, task: Task) -> None:
+        updated_product = self.add_alts(task.item)
+        if "images" in updated_product:
+            task.update = updated_product
+        else:
+            task.status = self._item_status(task.key)
+
+    def _write_tasks(self, tasks: list) -> None:
+        results = self.update_products_batch([task.update for task in tasks])
+        for task in tasks:
+            task.status = self._item_status(task.key, results[task.key])
+
+    def iter_missing_alts(self, modified_since: datetime = None):
+        for product in self._iter_products(modified_since=modified_since):
+            if self._is_done(product["id"]):
+                continue
+
+            images = product.get("images") or []
+            yield product["id"], [image["src"] for image in images if not image["alt"]]
+
 
 class Debug:
     def url_to_datauri(image_url, file_path="./temp"):
@@ -740,7 +2503,9 @@ class Debug:
         return file_path
 
 
-class ShopifyHandler(AltTexter):
+class ShopifyHandler(Tagger):
+    platform = "shopify"
+
     def __init__(
         self,
         url: str,
@@ -748,47 +2513,96 @@ class ShopifyHandler(AltTexter):
         shopify_access_token: str,
         scenex_api_key: str,
         scenex_url: str = SCENEX_URL,
+        shopify_api_url: str = None,
+        **kwargs,
     ):
-        super().__init__(self, scenex_url=scenex_url, scenex_api_key=scenex_api_key)
+        super().__init__(
+            url, scenex_url=scenex_url, scenex_api_key=scenex_api_key, **kwargs
+        )
         self.shopify_access_token = shopify_access_token
         self.shopify_url = (
-            f"https://{shopify_shop_name}.myshopify.com/admin/api/2024-01/"
+            shopify_api_url
+            or f"https://{shopify_shop_name}.myshopify.com/admin/api/{SHOPIFY_API_VERSION}/"
         )
         self.shopify_headers = {
             "Content-Type": "application/json",
             "X-Shopify-Access-Token": self.shopify_access_token,
         }
 
-    def get_products(self):
+    def _site_url(self) -> str:
+        return self.shopify_url
+
+    def get_products(self, modified_since: datetime = None):
         url = self.shopify_url + "products.json"
+        params = self._products_params(modified_since)
 
-        response = requests.get(url, headers=self.shopify_headers)
-        if response.status_code == 200:
-            products = response.json()["products"]
+        products = []
+        while url:
+            response = self._request(
+                "GET", url, headers=self.shopify_headers, params=params, stage="list"
+            )
+            if response.status_code != 200:
+                log.error(
+                    f"Failed to fetch products. Status code: {response.status_code}"
+                )
+                break
+
+            products += response.json()["products"]
+            # The next page is given by a page_info cursor in the Link header. Its URL carries all parameters.
+            url = response.links.get("next", {}).get("url")
+            params = None
 
         return products
 
+    def _products_params(self, modified_since: datetime = None) -> dict:
+        """
+        Query parameters of the first page of the product listing. Later pages come with their own.
+        """
+        params = {"limit": SHOPIFY_PAGE_SIZE}
+        if modified_since:
+            params["updated_at_min"] = modified_since.isoformat()
+
+        return params
+
     def get_product(self, product_id):
         url = self.shopify_url + f"products/{product_id}.json"
-        response = requests.get(url, headers=self.shopify_headers)
+        response = self._request("GET", url, headers=self.shopify_headers)
         product = None
         if response.status_code == 200:
             product = response.json()["product"]
         return product
 
     def add_alts(self, product):
-        updated_data = {"id": product["id"]}
         log.info(f"Processing {product['title']}")
-        counter = 0
+        self.changes.start(product["id"])
+        missing_alts = [image for image in product["images"] if not image["alt"]]
+        alt_texts = self.generate_alt_texts([image["src"] for image in missing_alts])
+
+        return self._set_product_alts(product, missing_alts, alt_texts)
+
+    def _set_product_alts(
+        self, product: dict, missing_alts: list, alt_texts: list
+    ) -> dict:
+        """
+        Set generated alt texts on a product's images, and record them in the change tracker.
+
+        Args:
+            product (dict): The product.
+            missing_alts (list): The product's images without alt text.
+            alt_texts (list): Generated alt text for each of them, or None where there is none.
+
+        Returns:
+            updated_data (dict): The product's ID, and its 'images' if any of them got an alt text.
+        """
+        updated_data = {"id": product["id"]}
         updated_images = []
-        for image in product["images"]:
-            if not image["alt"]:
-                alt_text = self.generate_alt_text(image["src"])
+        for image, alt_text in zip(missing_alts, alt_texts):
+            self._record_alt(product["id"], image["src"], image["alt"], alt_text)
+            if alt_text:
                 image["alt"] = alt_text
                 updated_images.append(image)
-                counter += 1
 
-        if counter:
+        if updated_images:
             updated_data["images"] = updated_images
 
         return updated_data
@@ -797,28 +2611,466 @@ class ShopifyHandler(AltTexter):
         url = self.shopify_url + f"products/{updated_data['id']}.json"
         payload = {"product": updated_data}
         log.info("Updating product")
-        response = requests.put(
-            url, headers=self.shopify_headers, data=json.dumps(payload)
+        response = self._request(
+            "PUT", url, headers=self.shopify_headers, data=json.dumps(payload)
         )
+        return self._updated_product(response)
+
+    def _updated_product(self, response):
+        """
+        Read the product back from an update's response, from either HTTP client, or None if the update failed.
+        """
         if response.status_code == 200:
-            print("Product updated successfully.")
+            log.info("Product updated successfully.")
             return response.json()["product"]
         else:
-            print(
+            log.error(
                 f"Failed to update product. Status code: {response.status_code}, Response: {response.text}"
             )
             return None
 
-    def update_products(self, products: list = []):
+    def update_products(self, products: list = [], modified_since: datetime = None):
         if not products:
-            products = self.get_products()
+            products = self.get_products(modified_since=modified_since)
 
         for product in products:
+            if self._is_done(product["id"]):
+                continue
+
+            modified = product.get("updated_at")
             updated_data = self.add_alts(product)
 
             if "images" in updated_data:
                 response = self.update_product(updated_data)
+                status = self._item_status(product["id"], bool(response))
             else:
                 log.info("Skipping product. Nothing to update")
+                status = self._item_status(product["id"])
+            self._record_item(product["id"], status, modified)
+            self.changes.forget(product["id"])
+
+        log.info("All done!")
+
+    def _list_tasks(self, modified_since: datetime = None):
+        for product in self.get_products(modified_since=modified_since):
+            if not self._is_done(product["id"]):
+                modified = product.get("updated_at")
+                yield Task(product["id"], product, product["title"], modified)
+
+    def _describe_task(self, task: Task) -> None:
+        updated_data = self.add_alts(task.item)
+        if "images" in updated_data:
+            task.update = updated_data
+        else:
+            task.status = self._item_status(task.key)
+
+    def _write_tasks(self, tasks: list) -> None:
+        for task in tasks:
+            response = self.update_product(task.update)
+            task.status = self._item_status(task.key, bool(response))
+
+    def iter_missing_alts(self, modified_since: datetime = None):
+        for product in self.get_products(modified_since=modified_since):
+            if self._is_done(product["id"]):
+                continue
+
+            images = product["images"]
+            yield product["id"], [image["src"] for image in images if not image["alt"]]
+
+
+SHOPIFY_BULK_PRODUCTS_QUERY = """
+{
+  products%s {
+    edges {
+      node {
+        id
+        title
+        updatedAt
+        media {
+          edges {
+            node {
+              ... on MediaImage {
+                id
+                alt
+                image {
+                  url
+                }
+              }
+            }
+          }
+        }
+      }
+    }
+  }
+}
+"""
+
+SHOPIFY_BULK_RUN_MUTATION = """
+mutation ($query: String!) {
+  bulkOperationRunQuery(query: $query) {
+    bulkOperation {
+      id
+      status
+    }
+    userErrors {
+      field
+      message
+    }
+  }
+}
+"""
+
+SHOPIFY_BULK_STATUS_QUERY = """
+query ($id: ID!) {
+  node(id: $id) {
+    ... on BulkOperation {
+      id
+      status
+      errorCode
+      objectCount
+      url
+    }
+  }
+}
+"""
+
+
+class ShopifyGraphQLHandler(ShopifyHandler):
+    def __init__(
+        self,
+        *args,
+        poll_interval: float = SHOPIFY_BULK_POLL_INTERVAL,
+        batch_size: int = SHOPIFY_MUTATION_BATCH_SIZE,
+        **kwargs,
+    ):
+        """
+        Shopify handler on the GraphQL Admin API, for stores too large to page through over REST. Products and
+        their images are exported with a bulk operation and streamed as JSONL, and alt texts are written with
+        batched productUpdateMedia mutations. Queries are throttled by cost points, synced with the throttle
+        status Shopify returns with every response.
+
+        Takes the same arguments as ShopifyHandler, plus:
+
+        Args:
+            poll_interval (float): Seconds between bulk operation status checks.
+            batch_size (int): Products per mutation request.
+        """
+        super().__init__(*args, **kwargs)
+        self.graphql_url = self.shopify_url + "graphql.json"
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.write_batch_size = batch_size
+
+    def _graphql(
+        self,
+        query: str,
+        variables: dict = None,
+        cost: float = 1,
+        stage: str = "write",
+        idempotent: bool = False,
+    ) -> dict:
+        """
+        Run a GraphQL query, waiting for enough cost points first. Throttled queries are retried.
+
+        Args:
+            query (str): The GraphQL query or mutation.
+            variables (dict): Query variables.
+            cost (float): Expected cost of the query in points.
+            stage (str): Stage the query belongs to in the run's metrics.
+            idempotent (bool): Whether the query may be sent again after a timeout or server error, e.g. because
+                it only reads.
+
+        Returns:
+            data (dict): The query's data.
+        """
+        attempt = 0
+        while True:
+            response = self._request(
+                "POST",
+                self.graphql_url,
+                headers=self.shopify_headers,
+                json={"query": query, "variables": variables or {}},
+                cost=cost,
+                stage=stage,
+                idempotent=idempotent,
+            )
+            response.raise_for_status()
+            result = response.json()
+
+            throttle_status = (
+                result.get("extensions", {}).get("cost", {}).get("throttleStatus")
+            )
+            if throttle_status:
+                self.rate_limiter.record_cost(self.graphql_url, throttle_status)
+
+            errors = result.get("errors") or []
+            throttled = any(
+                error.get("extensions", {}).get("code") == "THROTTLED"
+                for error in errors
+            )
+            if not throttled:
+                break
+
+            # the synced bucket makes the next reservation wait until the points are back
+            if attempt >= self.rate_limiter.max_retries:
+                raise RuntimeError("Shopify GraphQL query throttled too many times")
+            attempt += 1
+            self.metrics.inc("retries_total", self.platform, stage, site=self.site_name)
+            log.warn("Shopify GraphQL query throttled. Retrying")
+
+        if errors and not result.get("data"):
+            raise RuntimeError(f"Shopify GraphQL query failed: {errors}")
+        if errors:
+            log.error(f"Shopify GraphQL query returned errors: {errors}")
+
+        return result["data"]
+
+    def _run_bulk_query(self, query: str):
+        """
+        Run a bulk operation and wait for it to finish.
+
+        Args:
+            query (str): The bulk query.
+
+        Returns:
+            url (str): URL of the JSONL results, or None if there are no results.
+        """
+        result = self._graphql(
+            SHOPIFY_BULK_RUN_MUTATION, {"query": query}, cost=10, stage="list"
+        )["bulkOperationRunQuery"]
+        if result["userErrors"]:
+            raise RuntimeError(
+                f"Failed to start bulk operation: {result['userErrors']}"
+            )
+
+        operation_id = result["bulkOperation"]["id"]
+        log.info(f"Started bulk operation {operation_id}")
+        while True:
+            operation = self._graphql(
+                SHOPIFY_BULK_STATUS_QUERY,
+                {"id": operation_id},
+                stage="list",
+                idempotent=True,
+            )["node"]
+            if operation["status"] == "COMPLETED":
+                log.info(f"Bulk operation exported {operation['objectCount']} objects")
+                return operation["url"]
+            if operation["status"] in ["FAILED", "CANCELED", "EXPIRED"]:
+                raise RuntimeError(
+                    f"Bulk operation {operation['status'].lower()}: {operation['errorCode']}"
+                )
+
+            time.sleep(self.poll_interval)
+
+    def _iter_bulk_results(self, url: str):
+        """
+        Stream the lines of a bulk operation's JSONL results.
+
+        Args:
+            url (str): URL of the results.
+
+        Yields:
+            obj (dict): One exported object per line.
+        """
+        response = self._request("GET", url, stream=True, stage="list")
+        with response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if line:
+                    yield json.loads(line)
+
+    def iter_products(self, modified_since: datetime = None):
+        """
+        Export all products with their images, and stream them.
+
+        The bulk export is flat: each product is followed by its media, which refer back to it by __parentId.
+
+        Args:
+            modified_since (datetime): Only export products updated after this time.
+
+        Yields:
+            product (dict): {"id", "title", "updatedAt", "media": [{"id", "alt", "image": {"url"}}]}.
+        """
+        search = ""
+        if modified_since:
+            search = f"(query: \"updated_at:>'{modified_since.isoformat()}'\")"
+
+        url = self._run_bulk_query(SHOPIFY_BULK_PRODUCTS_QUERY % search)
+        if not url:
+            return
+
+        product = None
+        for obj in self._iter_bulk_results(url):
+            if "__parentId" not in obj:
+                if product:
+                    yield product
+                product = {**obj, "media": []}
+            # other media types export as empty objects, and images Shopify is still processing with a null image
+            elif obj.get("image"):
+                if product and obj["__parentId"] == product["id"]:
+                    product["media"].append(obj)
+                else:
+                    log.warn(f"Skipping media {obj['id']} exported out of order")
+
+        if product:
+            yield product
+
+    def get_products(self, modified_since: datetime = None):
+        return list(self.iter_products(modified_since=modified_since))
+
+    def _missing_alt_media(self, products: list) -> dict:
+        """
+        Generate alt texts for the images without one, in a single batch across products.
+
+        Args:
+            products (list): Products from iter_products.
+
+        Returns:
+            media (dict): UpdateMediaInputs ({"id", "alt"}) per product ID, for products with generated alts.
+        """
+        pending = [
+            (product["id"], media)
+            for product in products
+            for media in product["media"]
+            if not media["alt"]
+        ]
+        alt_texts = self.generate_alt_texts(
+            [media["image"]["url"] for _, media in pending]
+        )
+
+        for product in products:
+            self.changes.start(product["id"])
+        updates = {}
+        for (product_id, media), alt_text in zip(pending, alt_texts):
+            self._record_alt(product_id, media["image"]["url"], media["alt"], alt_text)
+            if alt_text:
+                updates.setdefault(product_id, []).append(
+                    {"id": media["id"], "alt": alt_text}
+                )
+
+        return updates
+
+    def _media_updates(self, product: dict) -> list:
+        """
+        Generate alt texts for the images of a product from iter_products that have none.
+
+        Args:
+            product (dict): The product.
+
+        Returns:
+            media (list): UpdateMediaInputs ({"id", "alt"}) for productUpdateMedia, empty if no alt was generated.
+        """
+        log.info(f"Processing {product['title']}")
+        return self._missing_alt_media([product]).get(product["id"], [])
+
+    def update_products_media(self, updates: dict) -> dict:
+        """
+        Write alt texts for several products in one request, as aliased productUpdateMedia mutations.
+
+        Args:
+            updates (dict): UpdateMediaInputs per product ID.
+
+        Returns:
+            results (dict): Whether the update succeeded, per product ID.
+        """
+        product_ids = list(updates)
+        declarations = ", ".join(
+            f"$product{i}: ID!, $media{i}: [UpdateMediaInput!]!"
+            for i in range(len(product_ids))
+        )
+        mutations = "\n".join(
+            f"  update{i}: productUpdateMedia(productId: $product{i}, media: $media{i}) "
+            "{ media { id } mediaUserErrors { field message } }"
+            for i in range(len(product_ids))
+        )
+        variables = {}
+        for i, product_id in enumerate(product_ids):
+            variables[f"product{i}"] = product_id
+            variables[f"media{i}"] = updates[product_id]
+
+        log.info(f"Updating {len(product_ids)} products")
+        data = self._graphql(
+            f"mutation ({declarations}) {{\n{mutations}\n}}",
+            variables,
+            cost=SHOPIFY_MUTATION_COST * len(product_ids),
+        )
+
+        results = {}
+        for i, product_id in enumerate(product_ids):
+            result = data.get(f"update{i}")
+            if not result or result["mediaUserErrors"]:
+                log.error(
+                    f"Failed to update product {product_id}: {result and result['mediaUserErrors']}"
+                )
+            results[product_id] = bool(result) and not result["mediaUserErrors"]
+
+        return results
+
+    def _update_batch(self, products: list) -> None:
+        modified = {product["id"]: product.get("updatedAt") for product in products}
+        try:
+            updates = self._missing_alt_media(products)
+            results = self.update_products_media(updates) if updates else {}
+        except Exception as e:
+            log.error(f"Failed to update {len(products)} products: {e}")
+            for product_id in modified:
+                self._record_item(product_id, "failed", modified[product_id])
+                self.changes.forget(product_id)
+            return
+
+        # products without results had no alt generated, either because they failed or all images were rejected
+        for product_id in modified:
+            status = self._item_status(product_id, results.get(product_id))
+            self._record_item(product_id, status, modified[product_id])
+            self.changes.forget(product_id)
+
+    def update_products(self, products: list = [], modified_since: datetime = None):
+        if not products:
+            products = self.iter_products(modified_since=modified_since)
+
+        batch = []
+        for product in products:
+            if self._is_done(product["id"]):
+                continue
+
+            if all(media["alt"] for media in product["media"]):
+                self._record_item(product["id"], "unchanged", product.get("updatedAt"))
+                continue
+
+            batch.append(product)
+            if len(batch) >= self.batch_size:
+                self._update_batch(batch)
+                batch = []
+
+        if batch:
+            self._update_batch(batch)
 
         log.info("All done!")
+
+    def _list_tasks(self, modified_since: datetime = None):
+        for product in self.iter_products(modified_since=modified_since):
+            if not self._is_done(product["id"]):
+                modified = product.get("updatedAt")
+                yield Task(product["id"], product, product["title"], modified)
+
+    def _describe_task(self, task: Task) -> None:
+        if all(media["alt"] for media in task.item["media"]):
+            task.status = "unchanged"
+            return
+
+        task.update = self._media_updates(task.item)
+        if not task.update:
+            task.status = self._item_status(task.key)
+
+    def _write_tasks(self, tasks: list) -> None:
+        results = self.update_products_media({task.key: task.update for task in tasks})
+        for task in tasks:
+            task.status = self._item_status(task.key, results.get(task.key, False))
+
+    def iter_missing_alts(self, modified_since: datetime = None):
+        for product in self.iter_products(modified_since=modified_since):
+            if self._is_done(product["id"]):
+                continue
+
+            media = product["media"]
+            yield product["id"], [m["image"]["url"] for m in media if not m["alt"]]
@@ -0,0 +1,105 @@
+import re
+from html import escape
+from html.parser import HTMLParser
+
+# one attribute of a start tag, with or without a value
+ATTRIBUTE_PATTERN = re.compile(
+    r"""([^\s/>"'=][^\s/>=]*)(\s*=\s*("[^"]*"|'[^']*'|[^\s>]*))?"""
+)
+
+
+class ImageTagScanner(HTMLParser):
+    def __init__(self, html: str):
+        """
+        Tokenizes an HTML string and records where each img tag starts and ends, without building a tree.
+
+        Args:
+            html (str): HTML string.
+        """
+        super().__init__(convert_charrefs=True)
+        self.images = []
+        # the tokenizer reports (line, column), so keep where each line starts
+        self._line_starts = [0] + [m.end() for m in re.finditer("\n", html)]
+        self.feed(html)
+        self.close()
+
+    def handle_starttag(self, tag: str, attrs: list) -> None:
+        if tag != "img":
+            return
+
+        line, column = self.getpos()
+        start = self._line_starts[line - 1] + column
+        attributes = dict(attrs)
+        self.images.append(
+            {
+                "start": start,
+                "end": start + len(self.get_starttag_text()),
+                "src": attributes.get("src"),
+                "alt": attributes.get("alt"),
+            }
+        )
+
+
+def find_images(html: str) -> list:
+    """
+    Find all img tags in an HTML string.
+
+    Args:
+        html (str): HTML string.
+
+    Returns:
+        images (list): One dict per img tag, in document order, with its 'start' and 'end' offsets in html, its 'src'
+            and 'alt' (None if unset).
+    """
+    return ImageTagScanner(html).images
+
+
+def set_alts(html: str, images: list, alt_texts: list) -> str:
+    """
+    Splice alt texts into img tags found with find_images. Everything outside the changed alt attributes is left
+    exactly as it was.
+
+    Args:
+        html (str): The HTML string the images were found in.
+        images (list): Images to set alt texts on.
+        alt_texts (list): Alt text for each image. Images with an empty alt text are left alone.
+
+    Returns:
+        html (str): The updated HTML string.
+    """
+    pieces = []
+    position = 0
+    for image, alt_text in sorted(
+        zip(images, alt_texts), key=lambda pair: pair[0]["start"]
+    ):
+        if not alt_text:
+            continue
+
+        tag = html[image["start"] : image["end"]]
+        pieces += [html[position : image["start"]], _set_alt(tag, alt_text)]
+        position = image["end"]
+
+    pieces.append(html[position:])
+    return "".join(pieces)
+
+
+def _set_alt(tag: str, alt_text: str) -> str:
+    """
+    Set the alt attribute of an img start tag, replacing an existing one in place or adding one after '<img'.
+    """
+    attribute = f'alt="{escape(alt_text, quote=True)}"'
+
+    # walk the attributes one by one, so text inside other attributes' values is never mistaken for one
+    position = len("<img")
+    while position < len(tag):
+        while position < len(tag) and tag[position] in " \t\n\r\f/":
+            position += 1
+        match = ATTRIBUTE_PATTERN.match(tag, position)
+        if not match:
+            break
+        if match.group(1).lower() == "alt":
+            end = match.end(2) if match.group(2) else match.end(1)
+            return tag[: match.start()] + attribute + tag[end:]
+        position = match.end()
+
+    return f"{tag[:4]} {attribute}{tag[4:]}"
@@ -0,0 +1,135 @@
+import struct
+
+PROBE_BYTES = 64 * 1024  # enough for JPEG headers behind EXIF data
+SUPPORTED_FORMATS = ["gif", "jpeg", "png", "webp"]
+MIN_DIMENSION = 16  # pixels. Anything smaller is a spacer or tracking pixel
+MAX_IMAGE_BYTES = 20 * 1024 * 1024
+# start of frame markers. C4, C8 and CC are DHT, JPG and DAC, which aren't frames
+JPEG_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def sniff_format(head: bytes):
+    """
+    Detect an image format from its magic bytes.
+
+    Args:
+        head (bytes): The first bytes of the file.
+
+    Returns:
+        format (str): 'gif', 'jpeg', 'png' or 'webp', or None if the data isn't one of those.
+    """
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpeg"
+    if head[:6] in [b"GIF87a", b"GIF89a"]:
+        return "gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+
+    return None
+
+
+def image_dimensions(head: bytes, image_format: str):
+    """
+    Read an image's width and height from its header, without decoding it.
+
+    Args:
+        head (bytes): The first bytes of the file.
+        image_format (str): Format as returned by sniff_format.
+
+    Returns:
+        dimensions (tuple): (width, height), or None if the header is cut off or malformed.
+    """
+    try:
+        if image_format == "png":
+            return struct.unpack(">II", head[16:24])
+        if image_format == "gif":
+            return struct.unpack("<HH", head[6:10])
+        if image_format == "webp":
+            return _webp_dimensions(head)
+        if image_format == "jpeg":
+            return _jpeg_dimensions(head)
+    except (struct.error, IndexError):
+        return None
+
+    return None
+
+
+def _webp_dimensions(head: bytes):
+    chunk = head[12:16]
+    if chunk == b"VP8 ":  # lossy
+        width, height = struct.unpack("<HH", head[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L":  # lossless
+        b = head[21:25]
+        width = 1 + (((b[1] & 0x3F) << 8) | b[0])
+        height = 1 + (((b[3] & 0x0F) << 10) | (b[2] << 2) | ((b[1] & 0xC0) >> 6))
+        return width, height
+    if chunk == b"VP8X":  # extended
+        width = 1 + int.from_bytes(head[24:27], "little")
+        height = 1 + int.from_bytes(head[27:30], "little")
+        return width, height
+
+    return None
+
+
+def _jpeg_dimensions(head: bytes):
+    # walk the segments up to the start of frame, which holds the dimensions
+    i = 2
+    while i + 9 <= len(head):
+        if head[i] != 0xFF:
+            return None
+        marker = head[i + 1]
+        if marker == 0xFF:  # fill byte
+            i += 1
+            continue
+        if marker in JPEG_SOF_MARKERS:
+            height, width = struct.unpack(">HH", head[i + 5 : i + 9])
+            return width, height
+        if marker == 0x01 or 0xD0 <= marker <= 0xD9:  # markers without a length
+            i += 2
+            continue
+
+        (length,) = struct.unpack(">H", head[i + 2 : i + 4])
+        i += 2 + length
+
+    return None
+
+
+def rejection_reason(
+    head: bytes,
+    content_type: str = None,
+    size: int = None,
+    min_dimension: int = MIN_DIMENSION,
+    max_bytes: int = MAX_IMAGE_BYTES,
+):
+    """
+    Decide whether an image is worth describing, from the start of its data and its response headers.
+
+    Args:
+        head (bytes): The first bytes of the file.
+        content_type (str): Content-Type the server sent, if any.
+        size (int): Full size of the file in bytes, if known.
+        min_dimension (int): Minimum width and height in pixels.
+        max_bytes (int): Maximum file size.
+
+    Returns:
+        reason (str): Why the image should be skipped, or None if it looks fine.
+    """
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if content_type.startswith("text/") or content_type == "application/json":
+        return f"not an image ({content_type})"
+
+    image_format = sniff_format(head)
+    if image_format not in SUPPORTED_FORMATS:
+        return f"unsupported format ({content_type or 'unknown'})"
+
+    if size and size > max_bytes:
+        return f"too large ({size // 1024} KB)"
+
+    dimensions = image_dimensions(head, image_format)
+    if dimensions and min(dimensions) < min_dimension:
+        return f"too small ({dimensions[0]}x{dimensions[1]})"
+
+    return None
@@ -0,0 +1,375 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from rich.table import Table
+
+STAGES = ["list", "fetch", "validate", "describe", "diff", "write"]
+# upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60]
+METRIC_PREFIX = "alt_texter"
+COUNTERS = {
+    "errors_total": "Failed requests or steps, including ones that were retried.",
+    "retries_total": "Requests retried after a throttle, server error or connection failure.",
+    "cache_hits_total": "Images that didn't need describing, by where their alt text came from.",
+    "bytes_sent_total": "Request body bytes sent.",
+    "bytes_received_total": "Response body bytes received.",
+}
+
+
+class Histogram:
+    def __init__(self, buckets: list = LATENCY_BUCKETS):
+        """
+        Cumulative latency histogram with fixed buckets, like a Prometheus histogram.
+
+        Args:
+            buckets (list): Upper bounds of the buckets, in ascending order.
+        """
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last bucket is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float):
+        """
+        Estimate a quantile by interpolating within its bucket, like Prometheus' histogram_quantile.
+
+        Args:
+            q (float): The quantile, e.g. 0.99.
+
+        Returns:
+            value (float): Estimated value, or None if nothing was observed.
+        """
+        if not self.count:
+            return None
+
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - seen) / count
+            seen += count
+
+        return self.buckets[-1]
+
+
+class Metrics:
+    def __init__(self, buckets: list = LATENCY_BUCKETS):
+        """
+        Run-scoped metrics for every tagger and stage: latency histograms, request counts, errors, retries,
+        cache hits and bytes transferred. Pass the same instance to several taggers to collect them in one place.
+
+        Stages are 'list', 'fetch', 'validate', 'describe', 'diff' and 'write'. HTTP stages are timed per request
+        attempt, so retries show up as extra samples. Taggers that process one of several sites label their
+        metrics with the site, so two sites on the same platform don't share a row.
+
+        Args:
+            buckets (list): Upper bounds of the latency histogram buckets, in seconds.
+        """
+        self.buckets = buckets
+        self._histograms = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def observe(
+        self, tagger: str, stage: str, seconds: float, site: str = None
+    ) -> None:
+        """
+        Record how long one request or step took.
+
+        Args:
+            tagger (str): Platform of the tagger, e.g. 'ghost'.
+            stage (str): One of STAGES.
+            seconds (float): The latency.
+            site (str): Name of the site, when processing several.
+        """
+        key = (tagger, site, stage)
+        with self._lock:
+            if key not in self._histograms:
+                self._histograms[key] = Histogram(self.buckets)
+            self._histograms[key].observe(seconds)
+
+    def inc(
+        self,
+        name: str,
+        tagger: str,
+        stage: str,
+        amount: float = 1,
+        site: str = None,
+        **labels,
+    ):
+        """
+        Increase a counter.
+
+        Args:
+            name (str): One of COUNTERS, e.g. 'retries_total'.
+            tagger (str): Platform of the tagger, e.g. 'ghost'.
+            stage (str): One of STAGES.
+            amount (float): How much to add.
+            site (str): Name of the site, when processing several.
+            **labels: Extra labels, e.g. source='cache'.
+        """
+        if not amount:
+            return
+
+        key = (name, tagger, site, stage, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    @contextmanager
+    def timer(self, tagger: str, stage: str, site: str = None):
+        """
+        Time a block of work that isn't an HTTP request, e.g. rewriting HTML. Exceptions count as errors.
+
+        Args:
+            tagger (str): Platform of the tagger, e.g. 'ghost'.
+            stage (str): One of STAGES.
+            site (str): Name of the site, when processing several.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.inc("errors_total", tagger, stage, site=site)
+            raise
+        finally:
+            self.observe(tagger, stage, time.perf_counter() - start, site=site)
+
+    def counter(self, name: str, tagger: str, stage: str, site: str = None) -> float:
+        """
+        Get the total of a counter over all its extra labels, and over all sites unless one is given.
+        """
+        with self._lock:
+            return sum(
+                value
+                for (n, t, s, stage_, _), value in self._counters.items()
+                if (n, t, stage_) == (name, tagger, stage) and site in [None, s]
+            )
+
+    def latency(
+        self, tagger: str = None, stages: list = None, site: str = None
+    ) -> Histogram:
+        """
+        Merge latency histograms, e.g. to get the latency of all HTTP requests in a run.
+
+        Args:
+            tagger (str): Only include this tagger. All taggers if unset.
+            stages (list): Only include these stages. All stages if unset.
+            site (str): Only include this site. All sites if unset.
+
+        Returns:
+            histogram (Histogram): The merged histogram.
+        """
+        merged = Histogram(self.buckets)
+        with self._lock:
+            for (t, s, stage), histogram in self._histograms.items():
+                if (
+                    tagger not in [None, t]
+                    or site not in [None, s]
+                    or (stages and stage not in stages)
+                ):
+                    continue
+                merged.counts = [a + b for a, b in zip(merged.counts, histogram.counts)]
+                merged.count += histogram.count
+                merged.sum += histogram.sum
+
+        return merged
+
+    def prometheus_text(self) -> str:
+        """
+        Render all metrics in the Prometheus text exposition format.
+
+        Returns:
+            text (str): The metrics, ending with a newline.
+        """
+        with self._lock:
+            histograms = sorted(self._histograms.items(), key=_sort_key)
+            counters = sorted(self._counters.items(), key=_sort_key)
+
+        name = f"{METRIC_PREFIX}_stage_seconds"
+        lines = [
+            f"# HELP {name} Latency of requests and steps, by tagger, site and stage.",
+            f"# TYPE {name} histogram",
+        ]
+        for (tagger, site, stage), histogram in histograms:
+            labels = ",".join(_labels(tagger, site, stage))
+            cumulative = 0
+            for bound, count in zip(self.buckets + ["+Inf"], histogram.counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+            lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+        for counter_name, help_text in COUNTERS.items():
+            name = f"{METRIC_PREFIX}_{counter_name}"
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+            for (n, tagger, site, stage, extra), value in counters:
+                if n != counter_name:
+                    continue
+                labels = _labels(tagger, site, stage)
+                labels += [f'{key}="{label}"' for key, label in extra]
+                lines.append(f"{name}{{{','.join(labels)}}} {value}")
+
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str) -> None:
+        """
+        Write all metrics to a file in the Prometheus text format, e.g. for node_exporter's textfile collector.
+        The file is replaced in one go, so scrapers never see half of it.
+
+        Args:
+            path (str): Where to write the metrics.
+        """
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w") as f:
+            f.write(self.prometheus_text())
+        os.replace(temp_path, path)
+
+    def serve(self, port: int, host: str = "") -> ThreadingHTTPServer:
+        """
+        Serve the metrics at /metrics on a background thread, for Prometheus to scrape during the run.
+
+        Args:
+            port (int): Port to listen on.
+            host (str): Address to listen on. All interfaces by default.
+
+        Returns:
+            server (ThreadingHTTPServer): The server. Call shutdown() on it to stop serving.
+        """
+        metrics = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+
+                body = metrics.prometheus_text().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+    def summary_table(self) -> Table:
+        """
+        Summarise the run per tagger, site and stage, for printing at the end of it.
+
+        Returns:
+            table (rich.table.Table): One row per tagger, site and stage that saw any work. The site column is
+                only there if metrics were labelled with sites.
+        """
+        with self._lock:
+            histograms = dict(self._histograms)
+            counters = {}
+            for (name, tagger, site, stage, _), value in self._counters.items():
+                key = (name, tagger, site, stage)
+                counters[key] = counters.get(key, 0) + value
+
+        keys = {key[1:] for key in counters} | set(histograms)
+        with_sites = any(site is not None for _, site, _ in keys)
+
+        labels = ["Tagger", "Site", "Stage"] if with_sites else ["Tagger", "Stage"]
+        table = Table(title="Run metrics")
+        for column in labels + ["Count", "Errors", "Retries"]:
+            table.add_column(column, justify="left" if column in labels else "right")
+        for column in ["Total", "p50", "p99", "Cache hits", "Sent", "Received"]:
+            table.add_column(column, justify="right")
+
+        for tagger, site, stage in sorted(
+            keys,
+            key=lambda key: (
+                key[0],
+                key[1] or "",
+                STAGES.index(key[2]) if key[2] in STAGES else len(STAGES),
+            ),
+        ):
+            histogram = histograms.get((tagger, site, stage)) or Histogram(self.buckets)
+            totals = {
+                name: counters.get((name, tagger, site, stage), 0) for name in COUNTERS
+            }
+            row = [tagger, site or "-", stage] if with_sites else [tagger, stage]
+            table.add_row(
+                *row,
+                str(histogram.count),
+                _format_count(totals["errors_total"]),
+                _format_count(totals["retries_total"]),
+                _format_seconds(histogram.sum if histogram.count else None),
+                _format_seconds(histogram.quantile(0.5)),
+                _format_seconds(histogram.quantile(0.99)),
+                _format_count(totals["cache_hits_total"]),
+                _format_bytes(totals["bytes_sent_total"]),
+                _format_bytes(totals["bytes_received_total"]),
+            )
+
+        return table
+
+
+def body_size(body) -> int:
+    """
+    Size of a request body as sent, whatever form the HTTP client keeps it in.
+    """
+    if body is None:
+        return 0
+    if isinstance(body, str):
+        return len(body.encode())
+    if isinstance(body, (bytes, bytearray)):
+        return len(body)
+
+    return 0  # streamed bodies aren't counted
+
+
+def _sort_key(entry: tuple) -> tuple:
+    # metrics without a site sort first, instead of failing to compare None with a site name
+    key, _ = entry
+    return tuple("" if part is None else part for part in key)
+
+
+def _labels(tagger: str, site: str, stage: str) -> list:
+    labels = [f'tagger="{tagger}"']
+    if site is not None:
+        labels.append(f'site="{site}"')
+    labels.append(f'stage="{stage}"')
+    return labels
+
+
+def _format_count(value: float) -> str:
+    return str(int(value)) if value else "-"
+
+
+def _format_seconds(value) -> str:
+    if value is None:
+        return "-"
+    if value < 1:
+        return f"{value * 1000:.0f}ms"
+
+    return f"{value:.2f}s"
+
+
+def _format_bytes(value: float) -> str:
+    if not value:
+        return "-"
+    for unit in ["B", "KB", "MB"]:
+        if value < 1024:
+            return f"{value:.0f}{unit}"
+        value /= 1024
+
+    return f"{value:.1f}GB"
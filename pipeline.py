@@ -0,0 +1,293 @@
+import logging
+import queue
+import threading
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+log = logging.getLogger("rich")
+
+QUEUE_SIZE_PER_WORKER = 2  # tasks queued ahead of each worker of a stage
+# seconds between checks whether a stopped pipeline should give up waiting
+POLL_INTERVAL = 0.1
+
+_DONE = object()  # marks the end of a stage's input
+
+
+class Task:
+    def __init__(self, key, item: dict = None, title: str = None, modified: str = None):
+        """
+        One content item on its way through a pipeline. Stages fill in the fields they're responsible for.
+
+        Args:
+            key: ID of the item on its platform, as used in the checkpoint journal.
+            item (dict): The item as listed, or None if it still has to be fetched.
+            title (str): Human-readable name of the item, for progress messages.
+            modified (str): When the item was last modified on its platform, if known.
+        """
+        self.key = key
+        self.item = item
+        self.title = title
+        self.modified = modified
+        self.update = None  # what the write stage sends to the platform
+        self.status = None  # 'updated', 'unchanged' or 'failed' once finished
+        self.error = None
+
+
+class Stage:
+    def __init__(self, name: str, func, workers: int = 1, batch_size: int = None):
+        """
+        A step of a pipeline, run by its own pool of worker threads.
+
+        The function works on tasks in place. Setting task.status finishes a task early, so later stages skip it.
+        Exceptions fail the task (or the whole batch) without stopping the pipeline.
+
+        Args:
+            name (str): Name of the stage, e.g. 'describe'.
+            func (callable): Called with one task, or with a list of tasks if batch_size is set.
+            workers (int): Number of threads running the stage.
+            batch_size (int): Hand the function up to this many tasks at once. Batches only wait for tasks that
+                are already queued, so they fill up when this stage is the bottleneck and stay small otherwise.
+        """
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.batch_size = batch_size
+
+
+class Pipeline:
+    def __init__(self, stages: list, queue_size: int = None):
+        """
+        Runs tasks through stages connected by bounded queues, with a separate pool of worker threads per stage.
+        A slow stage only holds up the stages before it once the queue in front of it is full, which keeps
+        memory bounded no matter how many items there are.
+
+        Args:
+            stages (list): Stages in the order tasks go through them.
+            queue_size (int): Capacity of each queue. By default QUEUE_SIZE_PER_WORKER tasks (or batches) per
+                worker of the stage the queue feeds.
+        """
+        self.stages = stages
+        self.queue_size = queue_size
+        self._stop = threading.Event()
+        self._errors = []
+
+    def run(self, tasks):
+        """
+        Feed tasks into the pipeline and yield them as they finish, on the calling thread. Finished tasks may
+        come out in a different order than they went in.
+
+        Closing the generator early stops the pipeline. An exception raised while producing tasks is raised
+        again once the tasks already in the pipeline have finished.
+
+        Args:
+            tasks (iterable): Tasks to process. Iterated on a thread of its own, so listing overlaps processing.
+
+        Yields:
+            task (Task): A finished task. task.status tells how it went.
+        """
+        self._stop.clear()
+        self._errors = []
+        queues = [
+            queue.Queue(maxsize=self.queue_size or self._default_queue_size(stage))
+            for stage in self.stages
+        ]
+        results = queue.Queue(maxsize=self.queue_size or QUEUE_SIZE_PER_WORKER)
+        outputs = queues[1:] + [results]
+
+        threads = [
+            threading.Thread(target=self._feed, args=(tasks, queues[0]), daemon=True)
+        ]
+        for i, (stage, inbox, outbox) in enumerate(zip(self.stages, queues, outputs)):
+            # the last worker of a stage to run out of input tells the next stage
+            remaining = [stage.workers]
+            lock = threading.Lock()
+            next_workers = self.stages[i + 1].workers if outbox is not results else 1
+            for _ in range(stage.workers):
+                threads.append(
+                    threading.Thread(
+                        target=self._work,
+                        args=(
+                            stage,
+                            inbox,
+                            outbox,
+                            results,
+                            remaining,
+                            lock,
+                            next_workers,
+                        ),
+                        daemon=True,
+                    )
+                )
+
+        for thread in threads:
+            thread.start()
+
+        try:
+            while True:
+                task = self._get(results)
+                if task is _DONE or task is None:
+                    break
+                yield task
+        finally:
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+
+        if self._errors:
+            raise self._errors[0]
+
+    def _default_queue_size(self, stage: Stage) -> int:
+        # batched stages need room for a full batch per worker to fill up
+        return stage.workers * QUEUE_SIZE_PER_WORKER * (stage.batch_size or 1)
+
+    def stop(self) -> None:
+        """
+        Stop the pipeline. Tasks already being worked on are finished, queued ones are dropped.
+        """
+        self._stop.set()
+
+    def _feed(self, tasks, inbox: queue.Queue) -> None:
+        try:
+            for task in tasks:
+                if not self._put(inbox, task):
+                    return
+        except Exception as e:
+            log.error(f"Failed to list items: {e}")
+            self._errors.append(e)
+
+        for _ in range(self.stages[0].workers):
+            self._put(inbox, _DONE)
+
+    def _work(
+        self,
+        stage: Stage,
+        inbox: queue.Queue,
+        outbox: queue.Queue,
+        results: queue.Queue,
+        remaining: list,
+        lock: threading.Lock,
+        next_workers: int,
+    ) -> None:
+        while True:
+            task = self._get(inbox)
+            if task is _DONE or task is None:
+                break
+
+            batch = [task]
+            while stage.batch_size and len(batch) < stage.batch_size:
+                try:
+                    task = inbox.get_nowait()
+                except queue.Empty:
+                    break
+                if task is _DONE:
+                    self._put(inbox, _DONE)  # leave it for this worker's next round
+                    break
+                batch.append(task)
+
+            self._process(stage, batch)
+            for task in batch:
+                # finished tasks skip the remaining stages
+                if not self._put(results if task.status else outbox, task):
+                    return
+
+        with lock:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+        if last:
+            for _ in range(next_workers):
+                self._put(outbox, _DONE)
+
+    def _process(self, stage: Stage, batch: list) -> None:
+        try:
+            if stage.batch_size:
+                stage.func(batch)
+            else:
+                stage.func(batch[0])
+        except Exception as e:
+            for task in batch:
+                log.error(f"Failed to {stage.name} {task.title or task.key}: {e}")
+                task.status = "failed"
+                task.error = e
+
+    def _put(self, target: queue.Queue, item) -> bool:
+        """
+        Put an item on a queue, waiting while it's full. Gives up if the pipeline is stopped.
+
+        Returns:
+            True if the item was queued.
+        """
+        while not self._stop.is_set():
+            try:
+                target.put(item, timeout=POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+
+        return False
+
+    def _get(self, source: queue.Queue):
+        """
+        Take an item off a queue, waiting while it's empty. Returns None if the pipeline is stopped.
+        """
+        while not self._stop.is_set():
+            try:
+                return source.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                continue
+
+        return None
+
+
+class FairScheduler:
+    def __init__(self, slots: int):
+        """
+        Shares a fixed number of slots, e.g. concurrent describe calls, between several sites. When slots are
+        scarce, a freed slot goes to the site that has waited longest for its turn, round robin, so a big site
+        can't starve a small one.
+
+        Args:
+            slots (int): How many slots there are in total.
+        """
+        self.slots = slots
+        self._free = slots
+        self._waiting = OrderedDict()  # waiting threads per site, in turn order
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def slot(self, key):
+        """
+        Hold a slot for the duration of a block, waiting for one if none is free.
+
+        Args:
+            key: Whose turn it is, e.g. the site key.
+        """
+        self.acquire(key)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def acquire(self, key) -> None:
+        with self._lock:
+            if self._free and not self._waiting:
+                self._free -= 1
+                return
+
+            turn = threading.Event()
+            self._waiting.setdefault(key, deque()).append(turn)
+
+        turn.wait()
+
+    def release(self) -> None:
+        with self._lock:
+            if not self._waiting:
+                self._free += 1
+                return
+
+            # hand the slot straight to the next site, which then goes to the back of the line
+            key, turns = self._waiting.popitem(last=False)
+            turn = turns.popleft()
+            if turns:
+                self._waiting[key] = turns
+
+        turn.set()
@@ -0,0 +1,168 @@
+import math
+from datetime import datetime
+
+from rich.table import Table
+
+from helper import SCENEX_BATCH_SIZE, console
+
+DESCRIBE_SECONDS = 15.0  # typical SceneXplain latency for one describe request
+WRITE_SECONDS = 1.0  # typical latency of one platform write
+
+
+class RunPlan:
+    def __init__(self, alt_texter, max_length: int = 125):
+        """
+        Dry run of a tagger: counts the images, SceneXplain calls and platform writes a real run would need,
+        without describing or writing anything. Images are deduplicated and checked against the alt text cache
+        and checkpoint journal the same way a real run does it, except that images aren't downloaded to hash
+        their bytes.
+
+        Args:
+            alt_texter (Tagger): The tagger to plan a run for.
+            max_length (int): Maximum length of alt texts, which cache entries are keyed by.
+        """
+        self.alt_texter = alt_texter
+        self.max_length = max_length
+        self.items = 0
+        self.items_to_write = 0
+        self.images = 0
+        self.duplicates = 0
+        self.cached = 0
+        self.to_describe = 0
+        self.describe_calls = 0
+        self._seen = set()
+
+    def build(self, modified_since: datetime = None) -> "RunPlan":
+        """
+        Enumerate all content the tagger would process.
+
+        Args:
+            modified_since (datetime): Only count items modified after this time.
+
+        Returns:
+            plan (RunPlan): The plan itself, for chaining.
+        """
+        items = self.alt_texter.iter_missing_alts(modified_since=modified_since)
+        for _, image_urls in items:
+            self.add_item(image_urls)
+
+        return self
+
+    def add_item(self, image_urls: list) -> None:
+        """
+        Count one content item.
+
+        Args:
+            image_urls (list): URLs of the item's images without alt text.
+        """
+        self.items += 1
+        if image_urls:
+            self.items_to_write += 1
+
+        new_images = 0
+        for image_url in image_urls:
+            self.images += 1
+            key = self.alt_texter.dedup.url_key(image_url)
+            if key in self._seen:
+                self.duplicates += 1
+            elif self._is_cached(image_url):
+                self.cached += 1
+                self._seen.add(key)
+            else:
+                new_images += 1
+                self._seen.add(key)
+
+        # each item's images go out in batches of their own
+        self.to_describe += new_images
+        self.describe_calls += math.ceil(new_images / SCENEX_BATCH_SIZE)
+
+    def _is_cached(self, image_url: str) -> bool:
+        checkpoint = self.alt_texter.checkpoint
+        if checkpoint is not None and checkpoint.get_alt(
+            image_url, self.alt_texter.language
+        ):
+            return True
+
+        cache = self.alt_texter.cache
+        if cache is not None:
+            return bool(cache.get(image_url, self.alt_texter.language, self.max_length))
+
+        return False
+
+    def summary(
+        self,
+        workers: int = 1,
+        describe_seconds: float = DESCRIBE_SECONDS,
+        write_seconds: float = WRITE_SECONDS,
+    ) -> dict:
+        """
+        Estimate the cost and duration of the run.
+
+        The wall time assumes each worker spends the typical latency on every call, and is held back to the rate
+        limits of SceneXplain and the platform where those are the bottleneck.
+
+        Args:
+            workers (int): How many items are processed concurrently.
+            describe_seconds (float): Typical latency of a describe request.
+            write_seconds (float): Typical latency of a platform write.
+
+        Returns:
+            summary (dict): Counts, number of requests and estimated wall time in seconds.
+        """
+        write_requests = math.ceil(
+            self.items_to_write / self.alt_texter.write_batch_size
+        )
+        probes = self.to_describe if self.alt_texter.validate_images else 0
+
+        rate_limiter = self.alt_texter.rate_limiter
+        scenex_rate = rate_limiter.bucket(self.alt_texter.scenex_url).rate
+        platform_rate = rate_limiter.bucket(self.alt_texter._site_url()).rate
+        seconds = max(
+            (self.describe_calls * describe_seconds + write_requests * write_seconds)
+            / workers,
+            self.describe_calls / scenex_rate,
+            write_requests / platform_rate,
+        )
+
+        return {
+            "items": self.items,
+            "items_to_write": self.items_to_write,
+            "images_without_alt": self.images,
+            "duplicate_images": self.duplicates,
+            "cached_images": self.cached,
+            "images_to_describe": self.to_describe,
+            "image_probes": probes,
+            "describe_calls": self.describe_calls,
+            "write_requests": write_requests,
+            "workers": workers,
+            "estimated_seconds": round(seconds),
+        }
+
+    def print_table(self, workers: int = 1, **kwargs) -> dict:
+        """
+        Print the plan as a table.
+
+        Args:
+            workers (int): How many items are processed concurrently.
+            **kwargs: Latency assumptions passed on to summary().
+
+        Returns:
+            summary (dict): See summary().
+        """
+        summary = self.summary(workers=workers, **kwargs)
+
+        table = Table(title=f"Plan for {self.alt_texter._site_key()}")
+        table.add_column("")
+        table.add_column("", justify="right")
+        for key, value in summary.items():
+            label = key.replace("_", " ").capitalize()
+            if key == "estimated_seconds":
+                hours, rest = divmod(value, 3600)
+                label, value = (
+                    "Estimated wall time",
+                    f"{hours}h {rest // 60:02d}m {rest % 60:02d}s",
+                )
+            table.add_row(label, str(value))
+
+        console.print(table)
+        return summary
@@ -0,0 +1,210 @@
+import csv
+import math
+import threading
+import time
+from urllib.parse import urlsplit
+
+from checkpoint import parse_timestamp
+
+PRIORITY_KEYS = ["ids", "pageviews", "published", "modified"]
+# item fields holding the publication date, across platforms
+PUBLISHED_FIELDS = ["published_at", "date_gmt", "date_created_gmt", "createdAt"]
+# item fields holding the item's address on the site, which pageviews are usually keyed by
+URL_FIELDS = ["url", "link", "permalink"]
+# pageview CSV columns, first match wins
+ID_COLUMNS = ["id", "url", "path", "page", "slug"]
+VIEW_COLUMNS = ["pageviews", "views", "page_views", "count"]
+
+
+class BudgetExhausted(Exception):
+    pass
+
+
+class Budget:
+    def __init__(self, max_calls: int = None, max_seconds: float = None):
+        """
+        Caps how much a run may spend on SceneXplain, in describe calls, wall time or both. Once it's used up,
+        items that still need a describe call are deferred to the next run. Pass the same one to several taggers
+        to share it.
+
+        Args:
+            max_calls (int): Maximum describe requests. Unlimited if unset.
+            max_seconds (float): Maximum run time in seconds, counted from now. Unlimited if unset.
+        """
+        self.max_calls = max_calls
+        self.deadline = time.monotonic() + max_seconds if max_seconds else None
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def spend(self) -> bool:
+        """
+        Take one describe call from the budget.
+
+        Returns:
+            True if the call may be made, False if the budget is used up.
+        """
+        with self._lock:
+            if self._exhausted():
+                return False
+            self.calls += 1
+            return True
+
+    def exhausted(self) -> bool:
+        with self._lock:
+            return self._exhausted()
+
+    def _exhausted(self) -> bool:
+        if self.max_calls is not None and self.calls >= self.max_calls:
+            return True
+
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+
+class Priority:
+    def __init__(self, keys: list, ids: list = None, pageviews: dict = None):
+        """
+        Orders content so the most valuable items are processed first, e.g. before a budget runs out.
+        Keys are applied in order, each breaking the ties of the ones before it:
+
+        - 'ids': items in the ID list come first, in the list's order
+        - 'pageviews': most viewed first, from load_pageviews
+        - 'published': newest first
+        - 'modified': most recently modified first
+
+        Items a key knows nothing about go after the ones it does. When the platform can list items by the
+        first key itself, see listing_order, they aren't sorted in memory and ties keep the platform's order.
+
+        Args:
+            keys (list): Some of PRIORITY_KEYS.
+            ids (list): Item IDs, URLs or slugs for the 'ids' key.
+            pageviews (dict): Views per item ID, URL path or slug, for the 'pageviews' key.
+        """
+        unknown = [key for key in keys if key not in PRIORITY_KEYS]
+        if unknown:
+            raise ValueError(f"Unknown priority keys: {', '.join(unknown)}")
+
+        self.keys = keys
+        self.ids = {}
+        for i, item_id in enumerate(ids or []):
+            self.ids.setdefault(_normalize(item_id), i)
+        self.pageviews = pageviews or {}
+
+    def listing_order(self, orders: dict):
+        """
+        The priority key the platform can list items by itself, so the listing needn't be sorted in memory.
+
+        Args:
+            orders (dict): Listing arguments per key the platform can order by, e.g. {'published': {...}}.
+
+        Returns:
+            key (str): The first priority key if it's one of orders, otherwise None.
+        """
+        if self.keys and self.keys[0] in orders:
+            return self.keys[0]
+
+        return None
+
+    def sort(self, tasks):
+        """
+        Sort tasks by priority. Ties keep the order they were listed in. Lazy, so the listing happens wherever
+        the result is iterated, e.g. on a pipeline's own thread.
+
+        Args:
+            tasks (iterable): Tasks to sort. All of them are listed before the first one is yielded.
+
+        Yields:
+            task (Task): The tasks, most valuable first.
+        """
+        yield from sorted(tasks, key=self.score)
+
+    def score(self, task) -> tuple:
+        """
+        Sort key of a task. Lower sorts first.
+        """
+        item = task.item or {}
+        score = []
+        for key in self.keys:
+            if key == "ids":
+                ranks = [self.ids.get(i) for i in _identifiers(task)]
+                ranks = [rank for rank in ranks if rank is not None]
+                score.append(min(ranks) if ranks else math.inf)
+            elif key == "pageviews":
+                views = [self.pageviews.get(i) for i in _identifiers(task)]
+                views = [view for view in views if view is not None]
+                score.append(-max(views) if views else math.inf)
+            elif key == "published":
+                published = next(
+                    (item[f] for f in PUBLISHED_FIELDS if item.get(f)), None
+                )
+                score.append(_newest_first(published))
+            elif key == "modified":
+                score.append(_newest_first(task.modified))
+
+        return tuple(score)
+
+
+def load_pageviews(path: str) -> dict:
+    """
+    Read pageviews from a CSV export, e.g. from Google Analytics or Plausible. It needs a header row with an ID
+    column ('id', 'url', 'path', 'page' or 'slug') and a views column ('pageviews', 'views', 'page_views' or
+    'count'). Rows for the same page are added up, so exports split by date work too.
+
+    Args:
+        path (str): Path of the CSV file.
+
+    Returns:
+        pageviews (dict): Views per item ID, URL path or slug.
+    """
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        columns = {column.strip().lower(): column for column in reader.fieldnames or []}
+        id_column = next((columns[c] for c in ID_COLUMNS if c in columns), None)
+        view_column = next((columns[c] for c in VIEW_COLUMNS if c in columns), None)
+        if id_column is None or view_column is None:
+            raise ValueError(f"{path} needs an ID column and a pageviews column")
+
+        pageviews = {}
+        for row in reader:
+            try:
+                views = float(row[view_column].replace(",", ""))
+            except (AttributeError, ValueError):
+                continue
+            key = _normalize(row[id_column])
+            pageviews[key] = pageviews.get(key, 0) + views
+
+    return pageviews
+
+
+def _identifiers(task) -> list:
+    """
+    Everything an item may be known by in an ID list or pageview export: its ID, slug and URL path.
+    """
+    item = task.item or {}
+    identifiers = [task.key, item.get("id")]
+    for slug in [item.get("slug"), item.get("handle")]:
+        if slug:
+            identifiers += [slug, f"/{slug}"]
+    identifiers += [item.get(field) for field in URL_FIELDS]
+
+    return [_normalize(i) for i in identifiers if i not in [None, ""]]
+
+
+def _normalize(identifier) -> str:
+    """
+    Reduce URLs to their path, and drop trailing slashes from paths, so '/my-post/' and
+    'https://example.com/my-post' match.
+    """
+    identifier = str(identifier).strip()
+    if "://" in identifier:
+        identifier = urlsplit(identifier).path
+    if identifier.startswith("/"):
+        return identifier.rstrip("/") or "/"
+
+    return identifier
+
+
+def _newest_first(timestamp) -> float:
+    if not timestamp:
+        return math.inf
+
+    return -parse_timestamp(timestamp).timestamp()
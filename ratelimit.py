@@ -0,0 +1,276 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+DEFAULT_RATE = 10.0  # requests per second for hosts without a known limit
+MIN_RATE = 0.1
+RETRY_STATUS_CODES = [429, 500, 502, 503, 504]
+
+# Known service limits, keyed by host suffix: (requests per second, burst).
+# GraphQL endpoints get their own bucket, measured in query cost points rather than requests.
+KNOWN_RATES = {
+    "myshopify.com": (2.0, 40),  # Shopify REST Admin API leaky bucket
+    "myshopify.com/graphql": (50.0, 1000),  # Shopify GraphQL Admin API cost points
+}
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float = None):
+        """
+        Token bucket for one endpoint. Thread-safe, and usable from async code since it never sleeps itself.
+
+        Args:
+            rate (float): Tokens added per second, i.e. sustained requests per second.
+            capacity (float): Maximum burst size. Defaults to one second's worth of tokens.
+        """
+        self.rate = rate
+        self.max_rate = rate
+        self.capacity = capacity or max(rate, 1.0)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self, cost: float = 1) -> float:
+        """
+        Take tokens, going into debt if there aren't enough left.
+
+        Args:
+            cost (float): Number of tokens the request costs.
+
+        Returns:
+            delay (float): Seconds the caller should wait before sending its request.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.updated_at) * self.rate
+            )
+            self.updated_at = now
+            self.tokens -= cost
+
+            delay = 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+            return max(delay, self.paused_until - now)
+
+    def pause(self, seconds: float) -> None:
+        """
+        Hold back all requests to this endpoint, e.g. after a Retry-After header.
+
+        Args:
+            seconds (float): How long to pause for.
+        """
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def sync(self, available: float, capacity: float, rate: float) -> None:
+        """
+        Replace the bucket's state with the server's own view of it.
+
+        Args:
+            available (float): Tokens currently available.
+            capacity (float): Maximum tokens.
+            rate (float): Tokens restored per second.
+        """
+        with self._lock:
+            self.tokens = available
+            self.capacity = capacity
+            self.rate = self.max_rate = rate
+            self.updated_at = time.monotonic()
+
+    def slow_down(self, factor: float = 0.5) -> None:
+        with self._lock:
+            self.rate = max(MIN_RATE, self.rate * factor)
+
+    def speed_up(self, step: float = None) -> None:
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + (step or self.max_rate / 20))
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        default_rate: float = DEFAULT_RATE,
+        rates: dict = None,
+        max_retries: int = 5,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+    ):
+        """
+        Shared rate limiter with one adaptive token bucket per host.
+
+        Each bucket starts at the host's configured rate. It halves on 429/503 responses, eases off as Shopify's
+        call limit bucket fills up, and creeps back up while responses are healthy.
+
+        Args:
+            default_rate (float): Requests per second for hosts without a configured rate.
+            rates (dict): Per-host rates, keyed by host or host suffix, e.g. {"api.scenex.jina.ai": 5}.
+                Values are a rate or a (rate, burst) tuple.
+            max_retries (int): Maximum retries of a throttled or failed request.
+            backoff_base (float): Base delay in seconds for exponential backoff.
+            backoff_max (float): Maximum backoff delay in seconds.
+        """
+        self.default_rate = default_rate
+        self.rates = {**KNOWN_RATES, **(rates or {})}
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, url: str) -> TokenBucket:
+        """
+        Get the token bucket for a URL's host, creating it on first use.
+
+        Args:
+            url (str): Request URL.
+
+        Returns:
+            bucket (TokenBucket): The host's bucket.
+        """
+        parsed = urlparse(url)
+        host = parsed.netloc
+        if parsed.path.endswith("graphql.json"):
+            host += "/graphql"
+
+        with self._lock:
+            if host not in self._buckets:
+                rate = self.default_rate
+                for suffix, configured in self.rates.items():
+                    if host == suffix or host.endswith("." + suffix):
+                        rate = configured
+                        break
+                if isinstance(rate, tuple):
+                    self._buckets[host] = TokenBucket(*rate)
+                else:
+                    self._buckets[host] = TokenBucket(rate)
+
+            return self._buckets[host]
+
+    def reserve(self, url: str, cost: float = 1) -> float:
+        """
+        Reserve a request slot for a URL.
+
+        Args:
+            url (str): Request URL.
+            cost (float): What the request costs against the host's limit, e.g. a GraphQL query cost.
+
+        Returns:
+            delay (float): Seconds to wait before sending the request.
+        """
+        return self.bucket(url).reserve(cost)
+
+    def record_cost(self, url: str, throttle_status: dict) -> None:
+        """
+        Sync a GraphQL endpoint's bucket with the throttle status the server reported.
+
+        Args:
+            url (str): GraphQL endpoint URL.
+            throttle_status (dict): Shopify's extensions.cost.throttleStatus, with maximumAvailable,
+                currentlyAvailable and restoreRate.
+        """
+        self.bucket(url).sync(
+            available=throttle_status["currentlyAvailable"],
+            capacity=throttle_status["maximumAvailable"],
+            rate=throttle_status["restoreRate"],
+        )
+
+    def record(self, url: str, status_code: int, headers: dict) -> None:
+        """
+        Adjust the host's rate based on a response.
+
+        Args:
+            url (str): Request URL.
+            status_code (int): Response status code.
+            headers (dict): Response headers.
+        """
+        bucket = self.bucket(url)
+
+        retry_after = self._retry_after(headers)
+        if retry_after:
+            bucket.pause(retry_after)
+
+        if status_code in [429, 503]:
+            bucket.slow_down()
+            return
+
+        usage = self._call_limit_usage(headers)
+        if usage is not None and usage >= 0.8:
+            bucket.slow_down(0.8)
+            return
+
+        if status_code < 400:
+            bucket.speed_up()
+
+    def retry_delay(
+        self,
+        attempt: int,
+        status_code: int = None,
+        headers: dict = None,
+        idempotent: bool = True,
+    ):
+        """
+        Decide whether a request should be retried, and after how long.
+
+        Args:
+            attempt (int): How many times the request has been retried so far.
+            status_code (int): Response status code, or None if the request raised a connection error.
+            headers (dict): Response headers.
+            idempotent (bool): Whether sending the request twice is harmless. Other requests, like a POST that
+                gets billed, are only retried when throttled: a timeout or server error may come after the
+                server acted on them. Callers only ask about their connection errors if nothing was sent.
+
+        Returns:
+            delay (float): Seconds to wait before retrying, or None if the request shouldn't be retried.
+        """
+        if attempt >= self.max_retries:
+            return None
+        if status_code is not None and status_code not in RETRY_STATUS_CODES:
+            return None
+        if status_code is not None and not idempotent and status_code != 429:
+            return None
+
+        return max(self._retry_after(headers or {}) or 0.0, self.backoff(attempt))
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Exponential backoff with full jitter.
+
+        Args:
+            attempt (int): How many times the request has been retried so far.
+
+        Returns:
+            delay (float): Seconds to wait.
+        """
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+    def _retry_after(self, headers: dict):
+        value = headers.get("Retry-After")
+        if not value:
+            return None
+
+        try:
+            return float(value)
+        except ValueError:
+            pass
+
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    def _call_limit_usage(self, headers: dict):
+        """
+        Share of Shopify's leaky bucket in use, from 'X-Shopify-Shop-Api-Call-Limit: <used>/<limit>'.
+        None if the header is missing or malformed.
+        """
+        value = headers.get("X-Shopify-Shop-Api-Call-Limit")
+        if not value:
+            return None
+
+        try:
+            used, limit = [int(n) for n in value.split("/")]
+            return used / limit
+        except (ValueError, ZeroDivisionError):
+            return None
@@ -0,0 +1,242 @@
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from rich.table import Table
+
+from helper import (GhostTagger, ShopifyGraphQLHandler, ShopifyHandler,
+                    WooCommerceTagger, WordPressTagger, log)
+
+# settings every site of a platform needs, as named in the sites file
+REQUIRED_SETTINGS = {
+    "ghost": ["url", "api_key"],
+    "wordpress": ["url", "username", "password"],
+    "woocommerce": ["url", "key", "secret"],
+    "shopify": ["shop_name", "access_token"],
+}
+# an environment variable reference os.path.expandvars leaves alone when the variable isn't set
+UNSET_VARIABLE = re.compile(r"\$(\w+|\{[^}]*\})")
+
+
+def load_sites(path: str) -> list:
+    """
+    Read the sites to process from a JSON file: {"sites": [{"platform": "ghost", "url": ..., "api_key": ...}, ...]}.
+    Values can refer to environment variables, e.g. "$BLOG_API_KEY", so the file needn't hold secrets. Each of
+    them has to be set.
+
+    Args:
+        path (str): Path of the sites file.
+
+    Returns:
+        sites (list): One dict of settings per site, each with a unique 'name'.
+    """
+    with open(path) as f:
+        config = json.load(f)
+
+    sites = []
+    names = set()
+    for i, site in enumerate(config["sites"]):
+        site = {
+            key: os.path.expandvars(value) if isinstance(value, str) else value
+            for key, value in site.items()
+        }
+
+        for key, value in site.items():
+            unset = UNSET_VARIABLE.search(value) if isinstance(value, str) else None
+            if unset:
+                name = site.get("name") or site.get("url") or site.get("shop_name")
+                raise ValueError(
+                    f"Site {i + 1} ({name}) in {path} refers to {unset.group()} in {key}, which isn't set"
+                )
+
+        platform = site.get("platform")
+        if platform not in REQUIRED_SETTINGS:
+            raise ValueError(f"Site {i + 1} in {path} has unknown platform {platform}")
+        missing = [key for key in REQUIRED_SETTINGS[platform] if not site.get(key)]
+        if missing:
+            raise ValueError(
+                f"Site {i + 1} in {path} is missing {', '.join(missing)} for {platform}"
+            )
+
+        site.setdefault("name", site.get("url") or site["shop_name"])
+        if site["name"] in names:
+            raise ValueError(f"Site name {site['name']} appears twice in {path}")
+        names.add(site["name"])
+        sites.append(site)
+
+    return sites
+
+
+def make_tagger(site: dict, **shared):
+    """
+    Build the tagger for a site.
+
+    Args:
+        site (dict): Settings of the site, from load_sites.
+        **shared: Arguments every tagger gets, e.g. the SceneXplain API key, session, rate limiter and cache.
+
+    Returns:
+        alt_texter (Tagger): The tagger, labelling its metrics with the site's name.
+    """
+    shared = {**shared, "site_name": site["name"]}
+    if "language" in site:
+        shared["language"] = site["language"]
+
+    platform = site["platform"]
+    if platform == "ghost":
+        return GhostTagger(url=site["url"], ghost_api_key=site["api_key"], **shared)
+
+    if platform == "wordpress":
+        return WordPressTagger(
+            wordpress_url=site["url"],
+            wordpress_username=site["username"],
+            wordpress_password=site["password"],
+            **shared,
+        )
+
+    if platform == "woocommerce":
+        return WooCommerceTagger(
+            url=site["url"],
+            woocommerce_consumer_key=site["key"],
+            woocommerce_consumer_secret=site["secret"],
+            **shared,
+        )
+
+    handler = (
+        ShopifyGraphQLHandler if site.get("backend") == "graphql" else ShopifyHandler
+    )
+    return handler(
+        url=site.get("url"),
+        shopify_shop_name=site["shop_name"],
+        shopify_access_token=site["access_token"],
+        shopify_api_url=site.get("api_url"),
+        **shared,
+    )
+
+
+def run_site(
+    site: dict,
+    alt_texter,
+    workers: dict,
+    scheduler,
+    modified_since=None,
+    priority=None,
+    budget=None,
+) -> dict:
+    """
+    Process one site as a pipeline.
+
+    Args:
+        site (dict): Settings of the site, from load_sites.
+        alt_texter (Tagger): The site's tagger.
+        workers (dict): Worker threads per pipeline stage. The site's own 'workers' setting overrides them.
+        scheduler (FairScheduler): Shares describe slots with the other sites.
+        modified_since (datetime): Only process items modified after this time.
+        priority (Priority): Process the site's most valuable items first.
+        budget (Budget): Cap on SceneXplain calls or run time, usually shared by all sites.
+
+    Returns:
+        counts (dict): Number of items per status, and the 'seconds' the site took.
+    """
+    list_kwargs = {}
+    if "content_types" in site:
+        list_kwargs["content_types"] = site["content_types"]
+
+    start = time.perf_counter()
+    counts = {"updated": 0, "unchanged": 0, "failed": 0, "deferred": 0}
+    tasks = alt_texter.run_pipeline(
+        modified_since=modified_since,
+        workers={**workers, **site.get("workers", {})},
+        scheduler=scheduler,
+        priority=priority,
+        budget=budget,
+        **list_kwargs,
+    )
+    for task in tasks:
+        counts[task.status] = counts.get(task.status, 0) + 1
+
+    counts["seconds"] = time.perf_counter() - start
+    log.info(f"Finished {site['name']}: {counts}")
+    return counts
+
+
+def run_sites(
+    sites: list,
+    taggers: list,
+    workers: dict,
+    scheduler,
+    modified_since=None,
+    max_sites: int = None,
+    priority=None,
+    budget=None,
+) -> list:
+    """
+    Process several sites concurrently in one process. They share whatever their taggers were given, e.g. the
+    session, rate limiter and cache, and take turns at describing through the scheduler.
+
+    Args:
+        sites (list): Settings of each site, from load_sites.
+        taggers (list): The tagger of each site, in the same order.
+        workers (dict): Worker threads per pipeline stage, per site.
+        scheduler (FairScheduler): Shares describe slots between the sites.
+        modified_since (callable): Gets a tagger and returns the time to process changes since, or None.
+        max_sites (int): How many sites to process at once. All of them by default.
+        priority (Priority): Process each site's most valuable items first.
+        budget (Budget): Cap on SceneXplain calls or run time, shared by all sites.
+
+    Returns:
+        results (list): Counts per site, as returned by run_site, or None for sites that failed.
+    """
+    results = [None] * len(sites)
+    with ThreadPoolExecutor(max_workers=max_sites or len(sites) or 1) as executor:
+        futures = {
+            executor.submit(
+                run_site,
+                site,
+                alt_texter,
+                workers,
+                scheduler,
+                modified_since(alt_texter) if modified_since else None,
+                priority,
+                budget,
+            ): i
+            for i, (site, alt_texter) in enumerate(zip(sites, taggers))
+        }
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                results[i] = future.result()
+            except Exception as e:
+                log.error(f"Failed to process {sites[i]['name']}: {e}")
+
+    return results
+
+
+def summary_table(sites: list, results: list) -> Table:
+    """
+    Summarise a multi-site run, one row per site.
+    """
+    table = Table(title="Sites")
+    for column in ["Site", "Platform"]:
+        table.add_column(column)
+    for column in ["Updated", "Unchanged", "Failed", "Deferred", "Seconds"]:
+        table.add_column(column, justify="right")
+
+    for site, counts in zip(sites, results):
+        if counts is None:
+            table.add_row(site["name"], site["platform"], "-", "-", "error", "-", "-")
+            continue
+
+        table.add_row(
+            site["name"],
+            site["platform"],
+            str(counts["updated"]),
+            str(counts["unchanged"]),
+            str(counts["failed"]),
+            str(counts["deferred"]),
+            f"{counts['seconds']:.1f}",
+        )
+
+    return table
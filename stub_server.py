@@ -0,0 +1,804 @@
+import argparse
+import json
+import random
+import re
+import struct
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from helper import SHOPIFY_API_VERSION
+
+SHOPIFY_API_PREFIX = f"/admin/api/{SHOPIFY_API_VERSION}/"
+GRAPHQL_COST_LIMIT = 1000  # cost points the stub reports as always available
+IMAGE_SIZE = 64  # pixels. Big enough to pass image validation
+
+
+def make_png(width: int, height: int) -> bytes:
+    """
+    Encode a blank grayscale PNG.
+
+    Args:
+        width (int): Width in pixels.
+        height (int): Height in pixels.
+
+    Returns:
+        png (bytes): The PNG file.
+    """
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        body = kind + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body))
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0)
+    pixels = zlib.compress(b"".join(b"\x00" + b"\x80" * width for _ in range(height)))
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", header)
+        + chunk(b"IDAT", pixels)
+        + chunk(b"IEND", b"")
+    )
+
+
+class StubConfig:
+    def __init__(
+        self,
+        latency: float = 0.0,
+        describe_latency: float = 0.0,
+        image_latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        retry_after: float = 1.0,
+        seed: int = 0,
+    ):
+        """
+        How the stub misbehaves. Latencies are per request, and are spread by +/- jitter.
+
+        Args:
+            latency (float): Seconds each platform API request takes.
+            describe_latency (float): Seconds each SceneXplain describe request takes.
+            image_latency (float): Seconds each image download takes.
+            jitter (float): Relative spread of all latencies, e.g. 0.5 for +/- 50%.
+            error_rate (float): Share of API requests that fail with a 500.
+            throttle_rate (float): Share of API requests that are throttled with a 429, or a THROTTLED error for GraphQL.
+            retry_after (float): Retry-After in seconds sent with 429s.
+            seed (int): Seed for latencies and faults, so runs are repeatable.
+        """
+        self.latency = latency
+        self.describe_latency = describe_latency
+        self.image_latency = image_latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.seed = seed
+
+
+class Corpus:
+    def __init__(
+        self,
+        base_url: str,
+        items: int = 100,
+        images_per_item: int = 2,
+        shared_images: float = 0.0,
+        seed: int = 0,
+    ):
+        """
+        Synthetic content for every platform, with all images missing alt texts. Writes are applied to it,
+        so a second run against the same stub finds nothing left to do.
+
+        Args:
+            base_url (str): URL of the stub, which image URLs point back to.
+            items (int): Number of posts, products, etc. per platform.
+            images_per_item (int): Images in each item.
+            shared_images (float): Share of images drawn from a small pool used across items, to exercise deduplication.
+            seed (int): Seed for which images are shared.
+        """
+        self.base_url = base_url
+        self.items = items
+        self.lock = threading.Lock()
+
+        rng = random.Random(seed)
+        pool = max(1, items // 10)
+        self.item_images = []
+        for i in range(items):
+            images = []
+            for j in range(images_per_item):
+                if rng.random() < shared_images:
+                    images.append(f"{base_url}/images/shared-{rng.randrange(pool)}.png")
+                else:
+                    images.append(f"{base_url}/images/{i}-{j}.png")
+            self.item_images.append(images)
+
+        self.ghost_posts = [self._ghost_post(i) for i in range(items)]
+        self.ghost_index = {post["id"]: post for post in self.ghost_posts}
+        self.wordpress_items = {"posts": [], "pages": [], "media": []}
+        self.wordpress_index = {}
+        for i in range(items):
+            content_type, item = self._wordpress_item(i)
+            self.wordpress_items[content_type].append(item)
+            self.wordpress_index[content_type, item["id"]] = item
+        self.woocommerce_products = [self._woocommerce_product(i) for i in range(items)]
+        self.shopify_products = [self._shopify_product(i) for i in range(items)]
+
+    def _modified(self, i: int) -> str:
+        return f"2024-01-01T00:{i // 60 % 60:02d}:{i % 60:02d}"
+
+    def _ghost_post(self, i: int) -> dict:
+        images = self.item_images[i]
+        children = [{"type": "image", "src": src, "alt": ""} for src in images[1:]]
+        children.insert(0, {"type": "paragraph", "children": [{"text": f"Post {i}"}]})
+        return {
+            "id": f"{i:024x}",
+            "title": f"Post {i}",
+            "slug": f"post-{i}",
+            "url": f"{self.base_url}/post-{i}/",
+            "published_at": self._modified(i) + ".000Z",
+            "feature_image": images[0] if images else None,
+            "feature_image_alt": None,
+            "lexical": json.dumps({"root": {"children": children}}),
+            "updated_at": self._modified(i) + ".000Z",
+        }
+
+    def _wordpress_item(self, i: int) -> tuple:
+        images = self.item_images[i]
+        modified = self._modified(i)
+        if i % 10 in [1, 2] and images:
+            return "media", {
+                "id": i,
+                "type": "attachment",
+                "title": {"rendered": f"Media {i}"},
+                "source_url": images[0],
+                "alt_text": "",
+                "modified_gmt": modified,
+            }
+
+        content_type = "pages" if i % 10 == 0 else "posts"
+        html = f"<p>Item {i}</p>" + "".join(
+            f'<img src="{src}" alt="">' for src in images
+        )
+        return content_type, {
+            "id": i,
+            "type": content_type[:-1],
+            "title": {"rendered": f"Item {i}"},
+            "content": {"rendered": html},
+            "modified_gmt": modified,
+        }
+
+    def _woocommerce_product(self, i: int) -> dict:
+        return {
+            "id": i + 1,
+            "name": f"Product {i}",
+            "images": [
+                {"id": i * 100 + j, "src": src, "alt": ""}
+                for j, src in enumerate(self.item_images[i])
+            ],
+            "date_modified_gmt": self._modified(i),
+        }
+
+    def _shopify_product(self, i: int) -> dict:
+        return {
+            "id": i + 1,
+            "title": f"Product {i}",
+            "images": [
+                {"id": i * 100 + j, "src": src, "alt": None}
+                for j, src in enumerate(self.item_images[i])
+            ],
+            "updated_at": self._modified(i) + "Z",
+        }
+
+    def missing_alts(self, platform: str) -> int:
+        """
+        Count the items of a platform that still have images without alt text, to check a run did its job.
+
+        Args:
+            platform (str): 'ghost', 'wordpress', 'woocommerce' or 'shopify'.
+
+        Returns:
+            count (int): Number of items with at least one image still missing an alt text.
+        """
+        with self.lock:
+            if platform == "ghost":
+                return sum(
+                    bool(post["feature_image"] and not post["feature_image_alt"])
+                    or '"alt": ""' in post["lexical"]
+                    for post in self.ghost_posts
+                )
+            if platform == "wordpress":
+                return sum(
+                    (
+                        not item["alt_text"]
+                        if item["type"] == "attachment"
+                        else 'alt=""' in item["content"]["rendered"]
+                    )
+                    for item in self.wordpress_index.values()
+                )
+            if platform == "woocommerce":
+                products = self.woocommerce_products
+            else:
+                products = self.shopify_products
+
+            return sum(
+                any(not image["alt"] for image in product["images"])
+                for product in products
+            )
+
+    def shopify_bulk_lines(self) -> list:
+        """
+        Products and their media as a Shopify bulk operation exports them: flat JSONL, media after their product.
+        """
+        lines = []
+        for product in self.shopify_products:
+            product_id = f"gid://shopify/Product/{product['id']}"
+            lines.append(
+                {
+                    "id": product_id,
+                    "title": product["title"],
+                    "updatedAt": product["updated_at"],
+                }
+            )
+            for image in product["images"]:
+                lines.append(
+                    {
+                        "id": f"gid://shopify/MediaImage/{image['id']}",
+                        "alt": image["alt"] or "",
+                        "image": {"url": image["src"]},
+                        "__parentId": product_id,
+                    }
+                )
+
+        return lines
+
+
+class StubServer:
+    def __init__(
+        self,
+        config: StubConfig = None,
+        items: int = 100,
+        images_per_item: int = 2,
+        shared_images: float = 0.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        """
+        Local stand-in for SceneXplain and every platform API the taggers use, for benchmarks and trying things out
+        without touching live services. Serves:
+            - SceneXplain: POST /v1/describe
+            - Ghost Admin API: posts list, get and update
+            - WordPress REST API: posts, pages and media list, get and update
+            - WooCommerce REST API: products list, update and batch update
+            - Shopify Admin API: REST products list and update, GraphQL bulk export and productUpdateMedia
+            - Images: GET /images/<name>.png
+
+        Args:
+            config (StubConfig): Latency and fault injection settings.
+            items (int): Number of items per platform.
+            images_per_item (int): Images in each item.
+            shared_images (float): Share of images shared across items.
+            host (str): Address to listen on.
+            port (int): Port to listen on. 0 picks a free one.
+        """
+        self.config = config or StubConfig()
+        self.server = ThreadingHTTPServer((host, port), StubHandler)
+        self.server.daemon_threads = True
+        self.server.stub = self
+        self.url = f"http://{host}:{self.server.server_port}"
+        self.corpus = Corpus(
+            self.url, items, images_per_item, shared_images, seed=self.config.seed
+        )
+        self.image = make_png(IMAGE_SIZE, IMAGE_SIZE)
+        self.requests = {}
+        self.faults = {}
+        self._rng = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self) -> "StubServer":
+        """
+        Serve on a background thread.
+
+        Returns:
+            server (StubServer): The server itself.
+        """
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    @property
+    def scenex_url(self) -> str:
+        return f"{self.url}/v1/describe"
+
+    @property
+    def shopify_api_url(self) -> str:
+        return f"{self.url}{SHOPIFY_API_PREFIX}"
+
+    def random(self) -> float:
+        with self._lock:
+            return self._rng.random()
+
+    def count(self, route: str, fault: str = None) -> None:
+        with self._lock:
+            self.requests[route] = self.requests.get(route, 0) + 1
+            if fault:
+                self.faults[fault] = self.faults.get(fault, 0) + 1
+
+    def delay(self, seconds: float) -> None:
+        """
+        Sleep for a latency, spread by the configured jitter.
+        """
+        if seconds <= 0:
+            return
+
+        jitter = self.config.jitter
+        time.sleep(seconds * (1 + jitter * (2 * self.random() - 1)))
+
+    def fault(self):
+        """
+        Decide whether to inject a fault into an API request.
+
+        Returns:
+            fault (str): 'throttle', 'error' or None.
+        """
+        roll = self.random()
+        if roll < self.config.throttle_rate:
+            return "throttle"
+        if roll < self.config.throttle_rate + self.config.error_rate:
+            return "error"
+
+        return None
+
+
+# (method, path pattern, handler method) for every endpoint the stub serves
+ROUTES = [
+    ("POST", r"/v1/describe", "describe"),
+    ("GET", r"/images/[^/]+", "image"),
+    ("GET", r"/ghost/api/admin/posts/?", "ghost_list"),
+    ("GET", r"/ghost/api/admin/posts/(?P<id>\w+)/?", "ghost_get"),
+    ("PUT", r"/ghost/api/admin/posts/(?P<id>\w+)/?", "ghost_update"),
+    ("GET", r"/wp-json/wp/v2/(?P<type>posts|pages|media)", "wordpress_list"),
+    ("GET", r"/wp-json/wp/v2/(?P<type>posts|pages|media)/(?P<id>\d+)", "wordpress_get"),
+    (
+        "POST",
+        r"/wp-json/wp/v2/(?P<type>posts|pages|media)/(?P<id>\d+)",
+        "wordpress_update",
+    ),
+    ("GET", r"/wp-json/wc/v3/products", "woocommerce_list"),
+    ("PUT", r"/wp-json/wc/v3/products/(?P<id>\d+)", "woocommerce_update"),
+    ("POST", r"/wp-json/wc/v3/products/batch", "woocommerce_batch"),
+    ("GET", SHOPIFY_API_PREFIX + r"products\.json", "shopify_list"),
+    ("GET", SHOPIFY_API_PREFIX + r"products/(?P<id>\d+)\.json", "shopify_get"),
+    ("PUT", SHOPIFY_API_PREFIX + r"products/(?P<id>\d+)\.json", "shopify_update"),
+    ("POST", SHOPIFY_API_PREFIX + r"graphql\.json", "shopify_graphql"),
+    ("GET", r"/bulk/(?P<id>\d+)\.jsonl", "shopify_bulk_results"),
+]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep connections alive, like the real services
+    disable_nagle_algorithm = True  # headers and body go out in separate writes
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+    @property
+    def stub(self) -> StubServer:
+        return self.server.stub
+
+    def _dispatch(self, method: str) -> None:
+        split = urlsplit(self.path)
+        self.query = {key: values[0] for key, values in parse_qs(split.query).items()}
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        self.body = json.loads(body) if body else {}
+
+        for route_method, pattern, name in ROUTES:
+            match = re.fullmatch(pattern, split.path)
+            if route_method == method and match:
+                break
+        else:
+            self.stub.count("unknown")
+            self._send_json({"error": f"no route for {method} {split.path}"}, 404)
+            return
+
+        fault = None
+        if name == "image":
+            self.stub.delay(self.stub.config.image_latency)
+        else:
+            self.stub.delay(
+                self.stub.config.describe_latency
+                if name == "describe"
+                else self.stub.config.latency
+            )
+            fault = self.stub.fault()
+        self.stub.count(name, fault)
+
+        if fault == "throttle" and name == "shopify_graphql":
+            self._send_json(
+                {
+                    "errors": [
+                        {"message": "Throttled", "extensions": {"code": "THROTTLED"}}
+                    ]
+                }
+            )
+        elif fault == "throttle":
+            self._send_json(
+                {"error": "Too many requests"},
+                429,
+                {"Retry-After": str(self.stub.config.retry_after)},
+            )
+        elif fault == "error":
+            self._send_json({"error": "Internal server error"}, 500)
+        else:
+            getattr(self, name)(**match.groupdict())
+
+    def _send(self, body: bytes, status: int = 200, headers: dict = {}) -> None:
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, data, status: int = 200, headers: dict = {}) -> None:
+        self._send(
+            json.dumps(data).encode(),
+            status,
+            {"Content-Type": "application/json", **headers},
+        )
+
+    def _page(self, items: list, page_size: int) -> tuple:
+        """
+        Cut a page out of a listing, WordPress style.
+
+        Returns:
+            (page_items, headers): Items on the requested page, and X-WP-Total/X-WP-TotalPages headers.
+                page_items is None if the page is out of range.
+        """
+        page = int(self.query.get("page", 1))
+        total_pages = max(1, -(-len(items) // page_size))
+        headers = {"X-WP-Total": str(len(items)), "X-WP-TotalPages": str(total_pages)}
+        if page > total_pages:
+            return None, headers
+
+        return items[(page - 1) * page_size : page * page_size], headers
+
+    # SceneXplain
+
+    def describe(self):
+        result = [
+            {"text": f"An image called {task['image'].rsplit('/', 1)[-1]}"}
+            for task in self.body.get("data", [])
+        ]
+        self._send_json({"result": result})
+
+    def image(self):
+        self._send(self.stub.image, headers={"Content-Type": "image/png"})
+
+    # Ghost
+
+    def ghost_list(self):
+        posts = self.stub.corpus.ghost_posts
+        page_size = int(self.query.get("limit", 15))
+        page = int(self.query.get("page", 1))
+        pages = max(1, -(-len(posts) // page_size))
+        with self.stub.corpus.lock:
+            page_posts = posts[(page - 1) * page_size : page * page_size]
+            if self.query.get("fields"):
+                fields = self.query["fields"].split(",")
+                page_posts = [
+                    {field: post[field] for field in fields if field in post}
+                    for post in page_posts
+                ]
+            data = {
+                "posts": page_posts,
+                "meta": {
+                    "pagination": {
+                        "page": page,
+                        "pages": pages,
+                        "next": page + 1 if page < pages else None,
+                    }
+                },
+            }
+            self._send_json(data)
+
+    def ghost_get(self, id: str):
+        post = self.stub.corpus.ghost_index.get(id)
+        if post is None:
+            self._send_json({"errors": [{"message": "Post not found"}]}, 404)
+        else:
+            self._send_json({"posts": [post]})
+
+    def ghost_update(self, id: str):
+        post = self.stub.corpus.ghost_index.get(id)
+        if post is None:
+            self._send_json({"errors": [{"message": "Post not found"}]}, 404)
+            return
+
+        with self.stub.corpus.lock:
+            update = self.body["posts"][0]
+            for key in ["lexical", "feature_image_alt"]:
+                if key in update:
+                    post[key] = update[key]
+            self._send_json({"posts": [post]})
+
+    # WordPress
+
+    def wordpress_list(self, type: str):
+        items = self.stub.corpus.wordpress_items[type]
+        page_items, headers = self._page(items, int(self.query.get("per_page", 10)))
+        if page_items is None:
+            self._send_json({"code": "rest_post_invalid_page_number"}, 400, headers)
+        else:
+            with self.stub.corpus.lock:
+                self._send_json(page_items, headers=headers)
+
+    def wordpress_get(self, type: str, id: str):
+        item = self.stub.corpus.wordpress_index.get((type, int(id)))
+        if item is None:
+            self._send_json({"code": "rest_post_invalid_id"}, 404)
+        else:
+            self._send_json(item)
+
+    def wordpress_update(self, type: str, id: str):
+        item = self.stub.corpus.wordpress_index.get((type, int(id)))
+        if item is None:
+            self._send_json({"code": "rest_post_invalid_id"}, 404)
+            return
+
+        with self.stub.corpus.lock:
+            if "content" in self.body:
+                item["content"] = {"rendered": self.body["content"]}
+            if "alt_text" in self.body:
+                item["alt_text"] = self.body["alt_text"]
+            self._send_json(item)
+
+    # WooCommerce
+
+    def woocommerce_list(self):
+        products = self.stub.corpus.woocommerce_products
+        page_items, headers = self._page(products, int(self.query.get("per_page", 10)))
+        with self.stub.corpus.lock:
+            self._send_json(page_items or [], headers=headers)
+
+    def _woocommerce_update(self, update: dict):
+        products = self.stub.corpus.woocommerce_products
+        product_id = int(update.get("id", 0))
+        if not 0 < product_id <= len(products):
+            return {
+                "id": product_id,
+                "error": {
+                    "code": "woocommerce_rest_product_invalid_id",
+                    "message": "Invalid ID.",
+                },
+            }
+
+        with self.stub.corpus.lock:
+            product = products[product_id - 1]
+            if "images" in update:
+                product["images"] = update["images"]
+            return dict(product)
+
+    def woocommerce_update(self, id: str):
+        result = self._woocommerce_update({**self.body, "id": id})
+        self._send_json(result, 400 if "error" in result else 200)
+
+    def woocommerce_batch(self):
+        results = [
+            self._woocommerce_update(update) for update in self.body.get("update", [])
+        ]
+        self._send_json({"update": results})
+
+    # Shopify
+
+    def shopify_list(self):
+        products = self.stub.corpus.shopify_products
+        page_size = int(self.query.get("limit", 50))
+        start = int(self.query.get("page_info", 0))
+        headers = {}
+        if start + page_size < len(products):
+            next_url = (
+                f"{self.stub.shopify_api_url}products.json"
+                f"?limit={page_size}&page_info={start + page_size}"
+            )
+            headers["Link"] = f'<{next_url}>; rel="next"'
+
+        with self.stub.corpus.lock:
+            self._send_json(
+                {"products": products[start : start + page_size]}, headers=headers
+            )
+
+    def shopify_get(self, id: str):
+        products = self.stub.corpus.shopify_products
+        if not 0 < int(id) <= len(products):
+            self._send_json({"errors": "Not Found"}, 404)
+        else:
+            self._send_json({"product": products[int(id) - 1]})
+
+    def shopify_update(self, id: str):
+        products = self.stub.corpus.shopify_products
+        if not 0 < int(id) <= len(products):
+            self._send_json({"errors": "Not Found"}, 404)
+            return
+
+        with self.stub.corpus.lock:
+            product = products[int(id) - 1]
+            alts = {
+                image["id"]: image.get("alt")
+                for image in self.body["product"].get("images", [])
+            }
+            for image in product["images"]:
+                if image["id"] in alts:
+                    image["alt"] = alts[image["id"]]
+            self._send_json({"product": product})
+
+    def shopify_graphql(self):
+        query = self.body.get("query", "")
+        variables = self.body.get("variables", {})
+        if "bulkOperationRunQuery" in query:
+            data = {
+                "bulkOperationRunQuery": {
+                    "bulkOperation": {
+                        "id": "gid://shopify/BulkOperation/1",
+                        "status": "CREATED",
+                    },
+                    "userErrors": [],
+                }
+            }
+        elif "BulkOperation" in query:
+            data = {
+                "node": {
+                    "id": variables.get("id"),
+                    "status": "COMPLETED",
+                    "errorCode": None,
+                    "objectCount": len(self.stub.corpus.shopify_bulk_lines()),
+                    "url": f"{self.stub.url}/bulk/1.jsonl",
+                }
+            }
+        elif "productUpdateMedia" in query:
+            data = {}
+            i = 0
+            while f"product{i}" in variables:
+                data[f"update{i}"] = self._update_media(
+                    variables[f"product{i}"], variables[f"media{i}"]
+                )
+                i += 1
+        else:
+            self._send_json({"errors": [{"message": "Unsupported query"}]})
+            return
+
+        throttle_status = {
+            "maximumAvailable": GRAPHQL_COST_LIMIT,
+            "currentlyAvailable": GRAPHQL_COST_LIMIT,
+            "restoreRate": GRAPHQL_COST_LIMIT,
+        }
+        self._send_json(
+            {"data": data, "extensions": {"cost": {"throttleStatus": throttle_status}}}
+        )
+
+    def _update_media(self, product_gid: str, media: list) -> dict:
+        products = self.stub.corpus.shopify_products
+        product_id = int(product_gid.rsplit("/", 1)[-1])
+        if not 0 < product_id <= len(products):
+            return {
+                "media": [],
+                "mediaUserErrors": [
+                    {"field": ["productId"], "message": "Product does not exist"}
+                ],
+            }
+
+        alts = {int(m["id"].rsplit("/", 1)[-1]): m["alt"] for m in media}
+        with self.stub.corpus.lock:
+            for image in products[product_id - 1]["images"]:
+                if image["id"] in alts:
+                    image["alt"] = alts[image["id"]]
+
+        return {"media": [{"id": m["id"]} for m in media], "mediaUserErrors": []}
+
+    def shopify_bulk_results(self, id: str):
+        with self.stub.corpus.lock:
+            lines = self.stub.corpus.shopify_bulk_lines()
+        body = "".join(json.dumps(line) + "\n" for line in lines).encode()
+        self._send(body, headers={"Content-Type": "application/jsonl"})
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve stand-ins for SceneXplain and the platform APIs, for local testing and benchmarks"
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--items", type=int, default=100, help="items per platform")
+    parser.add_argument("--images-per-item", type=int, default=2)
+    parser.add_argument(
+        "--shared-images",
+        type=float,
+        default=0.0,
+        help="share of images used by several items",
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.05, help="seconds per platform request"
+    )
+    parser.add_argument(
+        "--describe-latency",
+        type=float,
+        default=1.0,
+        help="seconds per describe request",
+    )
+    parser.add_argument(
+        "--image-latency", type=float, default=0.0, help="seconds per image download"
+    )
+    parser.add_argument(
+        "--jitter", type=float, default=0.2, help="relative spread of latencies"
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="share of requests failing with a 500",
+    )
+    parser.add_argument(
+        "--throttle-rate",
+        type=float,
+        default=0.0,
+        help="share of requests throttled with a 429",
+    )
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    config = StubConfig(
+        latency=args.latency,
+        describe_latency=args.describe_latency,
+        image_latency=args.image_latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        retry_after=args.retry_after,
+        seed=args.seed,
+    )
+    stub = StubServer(
+        config,
+        items=args.items,
+        images_per_item=args.images_per_item,
+        shared_images=args.shared_images,
+        host=args.host,
+        port=args.port,
+    )
+    print(f"Serving on {stub.url}. Point Alt Texter at it with:")
+    print(f"  SCENE_URL={stub.scenex_url}")
+    print(f"  GHOST_BLOG_URL={stub.url} GHOST_API_KEY=stub:{'00' * 32}")
+    print(f"  WORDPRESS_URL={stub.url} WORDPRESS_USER=stub WORDPRESS_PASSWORD=stub")
+    print(f"  WOOCOMMERCE_URL={stub.url} WOOCOMMERCE_KEY=stub WOOCOMMERCE_SECRET=stub")
+    print(
+        f"  SHOPIFY_API_URL={stub.shopify_api_url} SHOPIFY_SHOP_NAME=stub SHOPIFY_ACCESS_TOKEN=stub"
+    )
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import pytest
+
+from htmlrewrite import find_images, set_alts
+
+
+def unchanged_outside_alts(html: str, updated: str) -> bool:
+    """
+    Whether updated is html with only its img tags' alt attributes changed.
+    """
+    before, after = find_images(html), find_images(updated)
+    if len(before) != len(after):
+        return False
+
+    return _between_images(html, before) == _between_images(updated, after)
+
+
+def _between_images(html: str, images: list) -> list:
+    starts = [0] + [image["end"] for image in images]
+    ends = [image["start"] for image in images] + [len(html)]
+    return [html[start:end] for start, end in zip(starts, ends)]
+
+
+def test_find_images_reports_src_alt_and_offsets():
+    html = '<p>Hi</p><img src="a.png"><img alt="A cat" src="b.png">'
+
+    images = find_images(html)
+
+    assert [(image["src"], image["alt"]) for image in images] == [
+        ("a.png", None),
+        ("b.png", "A cat"),
+    ]
+    assert [html[image["start"] : image["end"]] for image in images] == [
+        '<img src="a.png">',
+        '<img alt="A cat" src="b.png">',
+    ]
+
+
+def test_find_images_skips_comments_and_scripts():
+    html = (
+        '<!-- <img src="a.png"> --><script>"<img src=b.png>"</script><img src="c.png">'
+    )
+
+    assert [image["src"] for image in find_images(html)] == ["c.png"]
+
+
+def test_find_images_counts_offsets_across_lines():
+    html = "<p>\r\n  café 😀</p>\r\n<img\r\n  src='a.png'\r\n>"
+
+    (image,) = find_images(html)
+
+    assert html[image["start"] : image["end"]] == "<img\r\n  src='a.png'\r\n>"
+
+
+@pytest.mark.parametrize(
+    "tag, expected",
+    [
+        ('<img src="a.png">', '<img alt="A cat" src="a.png">'),
+        ('<IMG SRC="a.png"/>', '<IMG alt="A cat" SRC="a.png"/>'),
+        ('<img src="a.png" alt="">', '<img src="a.png" alt="A cat">'),
+        ("<img alt='' src='a.png'>", "<img alt=\"A cat\" src='a.png'>"),
+        ('<img src="a.png" ALT>', '<img src="a.png" alt="A cat">'),
+        (
+            '<img src="a.png" alt = old class="x">',
+            '<img src="a.png" alt="A cat" class="x">',
+        ),
+        (
+            '<img title="alt=x" src="a.png">',
+            '<img alt="A cat" title="alt=x" src="a.png">',
+        ),
+        ("<img data-x='a>b' src=a.png>", "<img alt=\"A cat\" data-x='a>b' src=a.png>"),
+    ],
+)
+def test_set_alts_changes_only_the_alt_attribute(tag, expected):
+    html = f"<p>Before</p>\n{tag}\n<p>After</p>"
+
+    updated = set_alts(html, find_images(html), ["A cat"])
+
+    assert updated == f"<p>Before</p>\n{expected}\n<p>After</p>"
+
+
+def test_set_alts_escapes_alt_text():
+    html = '<img src="a.png">'
+
+    updated = set_alts(html, find_images(html), ['A "quoted" <b> & more'])
+
+    assert (
+        updated == '<img alt="A &quot;quoted&quot; &lt;b&gt; &amp; more" src="a.png">'
+    )
+    assert find_images(updated)[0]["alt"] == 'A "quoted" <b> & more'
+
+
+def test_set_alts_leaves_images_without_alt_text_alone():
+    html = '<img src="a.png"><img src="b.png"><img src="c.png">'
+
+    updated = set_alts(html, find_images(html), [None, "B", ""])
+
+    assert updated == '<img src="a.png"><img alt="B" src="b.png"><img src="c.png">'
+
+
+def test_set_alts_is_byte_identical_outside_alt_attributes():
+    html = (
+        "<!DOCTYPE html>\r\n<html><head><style>img { border: 0 }</style></head>\r\n"
+        "<body>\n\t<p class='x'>Caf&eacute; &amp; 😀 &#x2603;</p>"
+        '<!-- <img src="hidden.png"> -->\n'
+        '<figure><IMG  SRC="a.png"\n   width=10 ALT=""  /></figure>'
+        '<script>document.write("<img src=b.png>")</script>'
+        "<img src='c.png' alt='Already set'>"
+        '<img src="d.png" title="alt=&quot;x&quot;" data-x=\'a>b\'>\n'
+        "</body></html>\r\n"
+    )
+    images = find_images(html)
+
+    updated = set_alts(html, images, ["A", "C", "D"])
+
+    assert unchanged_outside_alts(html, updated)
+    assert [image["alt"] for image in find_images(updated)] == ["A", "C", "D"]
+
+
+def test_set_alts_without_alt_texts_returns_html_unchanged():
+    html = '<p>Text</p>\r\n<img src="a.png">  '
+
+    assert set_alts(html, find_images(html), [None]) == html
+    assert set_alts(html, [], []) == html
@@ -0,0 +1,136 @@
+import struct
+
+import pytest
+
+from imageprobe import (MAX_IMAGE_BYTES, image_dimensions, rejection_reason,
+                        sniff_format)
+from stub_server import make_png
+
+
+def jpeg(width: int, height: int, sof: int = 0xC0, exif: bytes = b"") -> bytes:
+    """
+    JPEG header up to its start of frame, behind an EXIF segment and a Huffman table like real files have.
+    """
+    app1 = b"\xff\xe1" + struct.pack(">H", 2 + len(exif)) + exif
+    dht = b"\xff\xc4" + struct.pack(">H", 5) + b"\x00\x00\x00"
+    frame = bytes([0xFF, sof]) + struct.pack(">HBHHB", 11, 8, height, width, 1)
+    return b"\xff\xd8" + app1 + b"\xff\xff" + dht + frame + b"\x01\x11\x00"
+
+
+def gif(width: int, height: int) -> bytes:
+    return b"GIF89a" + struct.pack("<HH", width, height) + b"\x00" * 3
+
+
+def webp(chunk: bytes, payload: bytes) -> bytes:
+    return b"RIFF" + struct.pack("<I", 30) + b"WEBP" + chunk + b"\x00" * 4 + payload
+
+
+def webp_lossy(width: int, height: int) -> bytes:
+    return webp(
+        b"VP8 ", b"\x00" * 3 + b"\x9d\x01\x2a" + struct.pack("<HH", width, height)
+    )
+
+
+def webp_lossless(width: int, height: int) -> bytes:
+    bits = (width - 1) | ((height - 1) << 14)
+    return webp(b"VP8L", b"\x2f" + struct.pack("<I", bits))
+
+
+def webp_extended(width: int, height: int) -> bytes:
+    return webp(
+        b"VP8X",
+        b"\x00" * 4
+        + (width - 1).to_bytes(3, "little")
+        + (height - 1).to_bytes(3, "little"),
+    )
+
+
+@pytest.mark.parametrize(
+    "head, image_format",
+    [
+        (make_png(20, 10), "png"),
+        (jpeg(20, 10), "jpeg"),
+        (gif(20, 10), "gif"),
+        (webp_lossy(20, 10), "webp"),
+        (b"<!DOCTYPE html><html>", None),
+        (b"RIFF\x00\x00\x00\x00WAVEfmt ", None),
+        (b"", None),
+    ],
+)
+def test_sniff_format(head, image_format):
+    assert sniff_format(head) == image_format
+
+
+@pytest.mark.parametrize(
+    "head, image_format",
+    [
+        (make_png(640, 480), "png"),
+        (jpeg(640, 480), "jpeg"),
+        (jpeg(640, 480, sof=0xC2), "jpeg"),
+        (jpeg(640, 480, exif=b"Exif\x00\x00" + b"\x00" * 30_000), "jpeg"),
+        (gif(640, 480), "gif"),
+        (webp_lossy(640, 480), "webp"),
+        (webp_lossless(640, 480), "webp"),
+        (webp_extended(640, 480), "webp"),
+    ],
+)
+def test_image_dimensions_reads_the_header(head, image_format):
+    assert image_dimensions(head, image_format) == (640, 480)
+
+
+@pytest.mark.parametrize(
+    "head, image_format",
+    [
+        (make_png(640, 480)[:20], "png"),
+        (jpeg(640, 480)[:20], "jpeg"),
+        (b"\xff\xd8\x00\x00\x00\x00\x00\x00\x00\x00\x00", "jpeg"),
+        (gif(640, 480)[:8], "gif"),
+        (webp(b"VP8?", b"\x00" * 10), "webp"),
+    ],
+)
+def test_image_dimensions_of_cut_off_or_malformed_headers(head, image_format):
+    assert image_dimensions(head, image_format) is None
+
+
+def test_rejection_reason_accepts_ordinary_images():
+    assert rejection_reason(make_png(640, 480), "image/png", size=2048) is None
+    assert rejection_reason(jpeg(640, 480), "image/jpeg; charset=binary") is None
+    # the format is sniffed, so a wrong or missing Content-Type doesn't matter
+    assert rejection_reason(webp_lossy(640, 480), "application/octet-stream") is None
+    assert rejection_reason(gif(640, 480)) is None
+
+
+def test_rejection_reason_rejects_pages_served_instead_of_images():
+    assert (
+        rejection_reason(make_png(640, 480), "text/html") == "not an image (text/html)"
+    )
+    assert (
+        rejection_reason(b"{}", "application/json") == "not an image (application/json)"
+    )
+
+
+def test_rejection_reason_rejects_unsupported_formats():
+    bmp = b"BM" + b"\x00" * 40
+    assert rejection_reason(bmp, "image/bmp") == "unsupported format (image/bmp)"
+    assert rejection_reason(bmp) == "unsupported format (unknown)"
+
+
+def test_rejection_reason_rejects_tracking_pixels_and_spacers():
+    assert rejection_reason(gif(1, 1), "image/gif") == "too small (1x1)"
+    assert rejection_reason(make_png(640, 8)) == "too small (640x8)"
+    assert rejection_reason(make_png(8, 8), min_dimension=4) is None
+
+
+def test_rejection_reason_rejects_files_too_large_to_describe():
+    size = MAX_IMAGE_BYTES + 1024
+    assert (
+        rejection_reason(jpeg(640, 480), size=size) == f"too large ({size // 1024} KB)"
+    )
+    assert (
+        rejection_reason(jpeg(640, 480), size=2048, max_bytes=1024)
+        == "too large (2 KB)"
+    )
+
+
+def test_rejection_reason_gives_cut_off_headers_the_benefit_of_the_doubt():
+    assert rejection_reason(jpeg(640, 480)[:20], "image/jpeg") is None
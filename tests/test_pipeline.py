@@ -0,0 +1,210 @@
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from benchmark import make_tagger
+from metrics import Metrics
+from pipeline import FairScheduler, Pipeline, Stage, Task
+from priority import Budget
+from stub_server import StubServer
+
+logging.getLogger("rich").setLevel(logging.CRITICAL)
+
+
+def mark(seconds: int) -> datetime:
+    return datetime(2024, 1, 1, 0, 0, seconds, tzinfo=timezone.utc)
+
+
+def pipeline_threads() -> list:
+    return [
+        thread
+        for thread in threading.enumerate()
+        if thread.name.endswith(("(_feed)", "(_work)"))
+    ]
+
+
+@pytest.fixture
+def stub():
+    with StubServer(items=5) as stub:
+        yield stub
+
+
+@pytest.fixture
+def tagger(stub):
+    return make_tagger("ghost", "sync", stub.url, 4, Metrics())
+
+
+def test_pipeline_runs_every_task_through_every_stage():
+    def stage(name):
+        def func(task):
+            task.item.append(name)
+
+        return Stage(name, func, workers=3)
+
+    pipeline = Pipeline([stage("fetch"), stage("describe"), stage("write")])
+
+    done = list(pipeline.run(Task(i, []) for i in range(20)))
+
+    assert sorted(task.key for task in done) == list(range(20))
+    assert all(task.item == ["fetch", "describe", "write"] for task in done)
+
+
+def test_pipeline_batches_tasks_for_batched_stages():
+    batches = []
+
+    def write(tasks):
+        batches.append(len(tasks))
+        for task in tasks:
+            task.status = "updated"
+
+    pipeline = Pipeline([Stage("write", write, workers=1, batch_size=4)])
+
+    done = list(pipeline.run(Task(i) for i in range(10)))
+
+    assert len(done) == 10
+    assert sum(batches) == 10
+    assert max(batches) <= 4
+
+
+def test_stage_error_fails_its_task_and_later_stages_skip_it():
+    written = []
+
+    def describe(task):
+        if task.key == 3:
+            raise ValueError("boom")
+
+    def write(task):
+        written.append(task.key)
+        task.status = "updated"
+
+    pipeline = Pipeline(
+        [Stage("describe", describe, workers=2), Stage("write", write, workers=2)]
+    )
+
+    done = {task.key: task for task in pipeline.run(Task(i) for i in range(6))}
+
+    assert done[3].status == "failed"
+    assert isinstance(done[3].error, ValueError)
+    assert 3 not in written
+    assert all(done[i].status == "updated" for i in [0, 1, 2, 4, 5])
+
+
+def test_listing_error_is_raised_once_listed_tasks_finish():
+
+    def tasks():
+        yield from (Task(i) for i in range(3))
+        raise RuntimeError("listing failed")
+
+    def write(task):
+        task.status = "updated"
+
+    pipeline = Pipeline([Stage("write", write, workers=2)])
+    done = []
+    with pytest.raises(RuntimeError, match="listing failed"):
+        for task in pipeline.run(tasks()):
+            done.append(task.key)
+
+    assert sorted(done) == [0, 1, 2]
+    assert pipeline_threads() == []
+
+
+def test_closing_the_run_early_stops_all_threads():
+    pipeline = Pipeline(
+        [
+            Stage("describe", lambda task: None, workers=4),
+            Stage("write", lambda task: None),
+        ]
+    )
+
+    run = pipeline.run(Task(i) for i in range(1000))
+    next(run)
+    run.close()
+
+    assert pipeline_threads() == []
+
+
+def test_fair_scheduler_hands_freed_slots_out_in_turn():
+    scheduler = FairScheduler(1)
+    scheduler.acquire("big")
+    order = []
+
+    def wait_for_slot(site):
+        scheduler.acquire(site)
+        order.append(site)
+        scheduler.release()
+
+    threads = []
+    for site in ["big", "big", "small"]:
+        threads.append(threading.Thread(target=wait_for_slot, args=(site,)))
+        threads[-1].start()
+        # queue them up one by one, so the turn order is known
+        while sum(len(turns) for turns in scheduler._waiting.values()) < len(threads):
+            time.sleep(0.01)
+    scheduler.release()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert order == ["big", "small", "big"]
+
+
+def test_run_pipeline_moves_the_high_water_mark_to_the_newest_item(stub, tagger):
+    statuses = [task.status for task in tagger.run_pipeline()]
+
+    assert statuses == ["updated"] * 5
+    assert tagger.high_water_mark.value == mark(4)
+    assert stub.corpus.missing_alts("ghost") == 0
+
+
+def test_run_pipeline_holds_the_mark_before_an_item_that_failed_to_write(tagger):
+    failing = "000000000000000000000002"
+    update_post = tagger.update_post
+
+    def flaky_update_post(post_id, post_data):
+        if post_id == failing:
+            raise ConnectionError("write failed")
+        return update_post(post_id, post_data)
+
+    tagger.update_post = flaky_update_post
+
+    statuses = {task.key: task.status for task in tagger.run_pipeline()}
+
+    assert statuses.pop(failing) == "failed"
+    assert set(statuses.values()) == {"updated"}
+    assert tagger.high_water_mark.value == mark(1)
+
+
+def test_run_pipeline_keeps_the_mark_when_listing_fails(tagger):
+    iter_posts = tagger._iter_posts
+
+    def broken_iter_posts(*args, **kwargs):
+        for i, post in enumerate(iter_posts(*args, **kwargs)):
+            if i == 3:
+                raise RuntimeError("listing failed")
+            yield post
+
+    tagger._iter_posts = broken_iter_posts
+
+    with pytest.raises(RuntimeError, match="listing failed"):
+        for _ in tagger.run_pipeline():
+            pass
+
+    assert tagger.high_water_mark.value is None
+    assert pipeline_threads() == []
+
+
+def test_run_pipeline_keeps_the_mark_when_stopped_early(tagger):
+    run = tagger.run_pipeline()
+    next(run)
+    run.close()
+
+    assert tagger.high_water_mark.value is None
+
+
+def test_run_pipeline_holds_the_mark_before_deferred_items(tagger):
+    statuses = [task.status for task in tagger.run_pipeline(budget=Budget(max_calls=0))]
+
+    assert statuses == ["deferred"] * 5
+    assert tagger.high_water_mark.value is None
@@ -2,8 +2,8 @@ import time
 
 import streamlit as st
 
-from helper import (GhostTagger, ShopifyHandler, WooCommerceTagger,
-                    WordPressTagger)
+from helper import (PIPELINE_WORKERS, GhostTagger, ShopifyHandler,
+                    WooCommerceTagger, WordPressTagger)
 
 help_markdown = """
 Alt Texter automatically adds alt tags to all the images (including featured images) on your blog using [SceneXplain](https://scenex.jina.ai).
@@ -81,6 +81,14 @@ elif platform == "Shopify":
         label="Shopify access token", type="password"
     )
 
+describe_workers = st.sidebar.number_input(
+    label="Concurrent SceneXplain requests",
+    min_value=1,
+    max_value=32,
+    value=PIPELINE_WORKERS["describe"],
+    help="How many items are described at the same time. Fetching and writing content run alongside.",
+)
+
 # --- end settings
 
 run_button = st.sidebar.button(label="Run")
@@ -90,6 +98,7 @@ if run_button:
     placeholder.empty()
     log_placeholder.empty()
     counter = 0  # track count of updated items
+    list_kwargs = {}
 
     if platform == "Ghost":
         alt_texter = GhostTagger(
@@ -98,25 +107,6 @@ if run_button:
             ghost_api_key=ghost_api_key,
         )
 
-        post_ids = alt_texter._get_post_ids()
-
-        status_indicator = st.status(
-            f"Processing {len(post_ids)} {platform} posts", expanded=True
-        )
-        with log_placeholder.container():
-            with status_indicator:
-                # with st.status(f"Processing {len(post_ids)} posts", expanded=True):
-                for post_id in post_ids:
-                    post = alt_texter._get_post(post_id)
-                    st.write(f":gear: Processing **{post['title']}**")
-                    post_with_alts = alt_texter.add_alts(post_id)
-
-                    if alt_texter._is_post_changed(post, post_with_alts):
-                        st.write(f":arrow_up: Updating **{post['title']}** on Ghost")
-                        alt_texter.update_post(post_id, post_with_alts)
-
-                    counter += 1
-
     elif platform == "WordPress":
         alt_texter = WordPressTagger(
             scenex_api_key=scenex_api_key,
@@ -124,21 +114,7 @@ if run_button:
             wordpress_username=wordpress_username,
             wordpress_password=wordpress_password,
         )
-
-        status_indicator = st.status("Processing {platform} data", expanded=True)
-        wordpress_items = []
-        with log_placeholder.container():
-            with status_indicator:
-                for item_type in wordpress_item_types:
-                    st.write(f":arrow_down: Retrieving WordPress {item_type}")
-                    items = alt_texter._get_items(content_types=wordpress_item_types)
-                    wordpress_items.extend(items)
-
-                for item in wordpress_items:
-                    st.write(f":gear: Processing **{item['title']['rendered']}**")
-                    updated_item_data = alt_texter.add_alts(item)
-                    alt_texter.update_item(updated_item_data)
-                    counter += 1
+        list_kwargs["content_types"] = wordpress_item_types
 
     elif platform == "WooCommerce":
         alt_texter = WooCommerceTagger(
@@ -148,19 +124,6 @@ if run_button:
             woocommerce_consumer_secret=woocommerce_consumer_secret,
         )
 
-        status_indicator = st.status(f"Processing {platform} data", expanded=True)
-        with log_placeholder.container():
-            with status_indicator:
-                # with st.status("Processing WooCommerce data", expanded=True):
-                st.write(":arrow_down: Retrieving products")
-                products = alt_texter.get_products()
-
-                for product in products:
-                    st.write(f":gear: Processing **{product['name']}**")
-                    updated_product_data = alt_texter.add_alts(product)
-                    alt_texter.update_product(updated_product_data)
-                    counter += 1
-
     elif platform == "Shopify":
         alt_texter = ShopifyHandler(
             scenex_api_key=scenex_api_key,
@@ -169,16 +132,22 @@ if run_button:
             shopify_access_token=shopify_access_token,
         )
 
-        status_indicator = st.status(f"Processing {platform} data", expanded=True)
-        with log_placeholder.container():
-            with status_indicator:
-                # with st.status("Processing WooCommerce data", expanded=True):
-                products = alt_texter.get_products()
-
-                for product in products:
-                    st.write(f":gear: Processing **{product['title']}**")
-                    updated_product_data = alt_texter.add_alts(product)
-                    alt_texter.update_product(updated_product_data)
-                    counter += 1
+    status_indicator = st.status(f"Processing {platform} data", expanded=True)
+    with log_placeholder.container():
+        with status_indicator:
+            # items are processed on background threads, and reported here as they finish
+            tasks = alt_texter.run_pipeline(
+                workers={"describe": describe_workers}, **list_kwargs
+            )
+            for task in tasks:
+                if task.status == "updated":
+                    st.write(f":arrow_up: Updated **{task.title}** on {platform}")
+                elif task.status == "failed":
+                    st.write(f":x: Failed to process **{task.title}**")
+                else:
+                    st.write(
+                        f":white_check_mark: Nothing to update for **{task.title}**"
+                    )
+                counter += 1
 
     placeholder.success(f":white_check_mark: All done! {counter} items processed.")